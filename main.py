@@ -5,69 +5,103 @@ print("--- main.py PYTHON SCRIPT STARTED (PRINT) ---")
 
 # Configure logging AS EARLY AS POSSIBLE
 import logging
-logging.basicConfig(stream=sys.stderr, level=logging.INFO, force=True, format='%(levelname)s:%(name)s:%(asctime)s:%(message)s')
+from modules.utils.logs import json_log_handler
+logging.basicConfig(level=logging.INFO, force=True, handlers=[json_log_handler(sys.stderr)])
 logger = logging.getLogger(__name__)
 
 # Welcome to Cloud Functions for Firebase for Python!
 # Implementation of the Prysm backend for news aggregation
 
-from firebase_functions import https_fn, scheduler_fn, options
-from firebase_admin import initialize_app, firestore, messaging, storage, db
-import openai
-import feedparser
-import urllib.parse
-import json
-import os
-from datetime import datetime, timedelta
-import serpapi
-import re
-from pathlib import Path
-import uuid
-import requests
-import tempfile
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from firebase_functions import https_fn, pubsub_fn, scheduler_fn, options
+from firebase_admin import initialize_app, firestore
+from datetime import datetime
 import time
-from elevenlabs import ElevenLabs
-from modules.ai.client import analyze_and_update_specific_subjects, analyze_conversation_for_specific_subjects, build_system_prompt, generate_ai_response
-from modules.audio.cartesia import generate_text_to_speech_cartesia
-from modules.config import get_elevenlabs_key
-from modules.content.generation import get_complete_topic_report, get_pickup_line, get_reddit_world_summary, get_topic_summary
+import secrets
+import msgspec
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+from modules.ai.client import analyze_conversation_for_specific_subjects, build_system_prompt, generate_ai_response, schedule_specific_subjects_analysis, stream_ai_response
+from modules.audio.cartesia import stream_text_to_speech_cartesia
+from modules.content.generation import get_complete_topic_report, get_pickup_line, get_reddit_world_summary, get_topic_posts, get_topic_summary
 from modules.content.podcast import generate_complete_user_media_twin_script, generate_media_twin_script, generate_simple_podcast, generate_user_media_twin_script
 from modules.content.topics import extract_trending_subtopics, get_trending_topics_for_subtopic
 from modules.database.operations import get_user_articles_from_db, get_user_preferences_from_db, save_user_preferences_to_db, update_specific_subjects_in_db
+from modules.database.rest import list_documents_rest
 from modules.news.news_helper import get_articles_subtopics_user
 from modules.news.serpapi import format_gnews_articles_for_prysm, gnews_search, gnews_top_headlines
 from modules.notifications.push import send_push_notification
-from modules.scheduling.tasks import get_aifeed_reports, get_complete_report, refresh_articles, should_trigger_update_for_user, trigger_user_update_async, update
-from modules.content.simple_interactive_test import interactive_test
+from modules.scheduling.cloud_tasks import BACKGROUND_JOB_URL, PROCESS_USER_UPDATE_URL, cloud_tasks_enabled, enqueue_user_update, is_cloud_tasks_request
+from modules.scheduling.jobs import JOBS_TOPIC, enqueue_job, get_job_status, run_job
+from modules.scheduling.tasks import SCHEDULING_TRIGGER_FIELDS, get_aifeed_reports, get_complete_report, next_update_time_for_user, refresh_articles, should_trigger_update_for_user, trigger_user_update_async, update
+from modules.utils.http import GET_OR_POST, INVALID_JSON_BODY, cached_json_response, cached_user_json_response, dumps, etag_json_response, event_stream_response, json_bytes_response, json_post_endpoint, json_response, json_stream_response, now_iso, parse_json_object, reject_unsupported_method, response_cache_key, sse_event, wants_event_stream
+from modules.utils.schemas import AnswerRequest, CompleteUserMediaTwinScriptRequest, JobStatusRequest, MediaTwinScriptRequest, PushNotificationRequest, SavePreferencesRequest, SpecificSubjectsRequest, TestAudioRequest, TestInterruptionRequest, TestSessionRequest, TextToSpeechRequest, UserUpdateRequest, RedditWorldSummaryRequest, SimplePodcastRequest, SubtopicContentRequest, TopicContentRequest, TopicPostsRequest, TopicReportRequest, TrendingSubtopicRequest, TrendingTopicRequest, UserJobRequest, UserMediaTwinScriptRequest, UserRequest
 logger.info("--- main.py: Logging configured ---")
 
 # Initialize Firebase app
 # Using Firestore (no need for database URL)
 initialize_app()
 
+# Firestore client shared by every invocation served by this instance: its gRPC
+# channel and auth token outlive a single request (created on first use).
+_DB = None
+
+
+def _get_db():
+    global _DB
+    if _DB is None:
+        _DB = firestore.client()
+    return _DB
+
+
+# scheduling_preferences fields passed on to update() for a triggered user
+SCHEDULING_UPDATE_FIELDS = ('presenter_name', 'language', 'voice_id')
+
+# Budget for the scheduler's in-process updates, kept under its 540s timeout
+# so the summary is still written when slow users are abandoned
+SCHEDULER_DEADLINE_SECONDS = 500
+
+# Worker threads for the scheduler's in-process updates. Each run gets its own
+# pool, shut down when the run returns: updates still running past the deadline
+# never hold the slots of the next run.
+SCHEDULER_MAX_CONCURRENT_UPDATES = 5
+
+# user_id -> (update_time of the scheduling document, next trigger window).
+# Kept across runs on a warm instance so users whose window is still ahead are
+# skipped without re-evaluating their preferences; any edit to the document
+# changes its update_time and invalidates the entry.
+_NEXT_ELIGIBLE = {}
+
+# Latency-sensitive endpoints keep one warm instance so users don't pay the
+# cold start (module imports, Firebase/OpenAI client setup) on sporadic traffic.
+# One instance serves several requests at once since handlers mostly wait on I/O.
+WARM_ENDPOINT_OPTIONS = {
+    "min_instances": 1,
+    "concurrency": 20,
+    "cpu": 1,
+    "memory": options.MemoryOption.GB_1,
+}
+
+# Memory of the other Firestore-backed functions. CPU is allocated in proportion
+# to memory, so 1 GB also shortens the cold start (imports, gRPC channel setup).
+FIRESTORE_ENDPOINT_MEMORY = options.MemoryOption.GB_1
+
+# Static 4xx bodies, encoded once at import instead of on every rejected request
+_INVALID_GNEWS_ENDPOINT_BODY = dumps({"error": "Invalid endpoint. Use 'search' or 'top-headlines'"})
+_MISSING_QUERY_BODY = dumps({"error": "Missing 'query' parameter"})
+_MISSING_ANALYZE_MESSAGE_BODY = dumps({"error": "Missing 'user_message' field for analyze action"})
+_JOB_NOT_FOUND_BODY = dumps({"success": False, "error": "Job not found"})
+_FORBIDDEN_BODY = dumps({"success": False, "error": "Forbidden"})
+
 # --- GNews API Test Endpoint ---
 @https_fn.on_request(timeout_sec=120)
 def test_gnews_api(req: https_fn.Request) -> https_fn.Response:
     """Test endpoint for GNews API functionality."""
     
-    # Handle CORS preflight requests
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type, Authorization',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers, status=204)
-        
-    if req.method not in ['GET', 'POST']:
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response('Method not allowed. Use GET or POST.', headers=headers, status=405)
+    # Handle CORS preflight and unsupported methods
+    method_response = reject_unsupported_method(req, GET_OR_POST)
+    if method_response is not None:
+        return method_response
+    
+    request_timestamp = now_iso()
     
     try:
         # Get parameters from query string (GET) or JSON body (POST)
@@ -78,16 +112,20 @@ def test_gnews_api(req: https_fn.Request) -> https_fn.Response:
             lang = req.args.get('lang', 'en')
             country = req.args.get('country', 'us')
             max_articles = int(req.args.get('max', '10'))
+            include_raw = req.args.get('include_raw', '0').lower() in ('1', 'true')
         else:  # POST
-            data = req.get_json() or {}
+            data = parse_json_object(req)
+            if data is None:
+                return json_bytes_response(INVALID_JSON_BODY, status=400, req=req)
             endpoint = data.get('endpoint', 'search')
             query = data.get('query', 'technology')
             category = data.get('category', 'general')
             lang = data.get('lang', 'en')
             country = data.get('country', 'us')
             max_articles = int(data.get('max', '10'))
+            include_raw = str(data.get('include_raw', '0')).lower() in ('1', 'true')
         
-        logger.info(f"Testing GNews API - Endpoint: {endpoint}, Query: {query}, Category: {category}")
+        logger.info("Testing GNews API", extra={"gnews_endpoint": endpoint, "query": query, "category": category})
         
         # Call appropriate GNews function
         if endpoint == 'search':
@@ -106,20 +144,15 @@ def test_gnews_api(req: https_fn.Request) -> https_fn.Response:
                 query=query if query != 'technology' else None  # Only add query if it's not the default
             )
         else:
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            }
-            return https_fn.Response(
-                json.dumps({"error": "Invalid endpoint. Use 'search' or 'top-headlines'"}),
-                headers=headers,
-                status=400
-            )
+            return json_bytes_response(_INVALID_GNEWS_ENDPOINT_BODY, status=400)
         
         # Format articles for Prysm if successful
         formatted_articles = []
         if gnews_response.get("success"):
             formatted_articles = format_gnews_articles_for_prysm(gnews_response)
+            # Raw articles duplicate formatted_articles; only echo them when asked
+            if not include_raw:
+                gnews_response.pop("articles", None)
         
         # Prepare response
         response_data = {
@@ -127,48 +160,30 @@ def test_gnews_api(req: https_fn.Request) -> https_fn.Response:
             "gnews_response": gnews_response,
             "formatted_articles": formatted_articles,
             "article_count": len(formatted_articles),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": request_timestamp
         }
         
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(json.dumps(response_data), headers=headers)
+        return json_response(response_data, req=req)
         
     except Exception as e:
-        logger.error(f"Error in test_gnews_api: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
+        logger.error("Error in test_gnews_api: %s", e)
         error_response = {
             "error": str(e),
             "message": "An error occurred while testing GNews API",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": request_timestamp
         }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+        return json_response(error_response, status=500, req=req)
 
 @https_fn.on_request(timeout_sec=120)
 def fetch_news_with_gnews(req: https_fn.Request) -> https_fn.Response:
     """Fetch news articles using GNews API for a specific topic/query."""
     
-    # Handle CORS preflight requests
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type, Authorization',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers, status=204)
-        
-    if req.method not in ['GET', 'POST']:
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response('Method not allowed. Use GET or POST.', headers=headers, status=405)
+    # Handle CORS preflight and unsupported methods
+    method_response = reject_unsupported_method(req, GET_OR_POST)
+    if method_response is not None:
+        return method_response
+    
+    request_timestamp = now_iso()
     
     try:
         # Get parameters
@@ -180,7 +195,9 @@ def fetch_news_with_gnews(req: https_fn.Request) -> https_fn.Response:
             use_headlines = req.args.get('use_headlines', 'false').lower() == 'true'
             category = req.args.get('category', 'general')
         else:  # POST
-            data = req.get_json() or {}
+            data = parse_json_object(req)
+            if data is None:
+                return json_bytes_response(INVALID_JSON_BODY, status=400, req=req)
             query = data.get('query')
             lang = data.get('lang', 'en')
             country = data.get('country', 'us')
@@ -189,17 +206,9 @@ def fetch_news_with_gnews(req: https_fn.Request) -> https_fn.Response:
             category = data.get('category', 'general')
         
         if not query:
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            }
-            return https_fn.Response(
-                json.dumps({"error": "Missing 'query' parameter"}),
-                headers=headers,
-                status=400
-            )
+            return json_bytes_response(_MISSING_QUERY_BODY, status=400)
         
-        logger.info(f"Fetching news for query: '{query}', lang: {lang}, country: {country}")
+        logger.info("Fetching news", extra={"query": query, "lang": lang, "country": country})
         
         # Choose endpoint based on use_headlines parameter
         if use_headlines:
@@ -230,35 +239,28 @@ def fetch_news_with_gnews(req: https_fn.Request) -> https_fn.Response:
             "articles": formatted_articles,
             "endpoint_used": "top-headlines" if use_headlines else "search",
             "error": gnews_response.get("error"),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": request_timestamp
         }
         
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(json.dumps(response_data), headers=headers)
+        return json_response(response_data, req=req)
         
     except Exception as e:
-        logger.error(f"Error in fetch_news_with_gnews: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
+        logger.error("Error in fetch_news_with_gnews: %s", e)
         error_response = {
             "error": str(e),
             "message": "An error occurred while fetching news",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": request_timestamp
         }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+        return json_response(error_response, status=500, req=req)
 
 # --- Conversation System ---
 
 
 # --- New Firebase Functions ---
 
-@https_fn.on_request(timeout_sec=60)
-def save_initial_preferences(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(timeout_sec=60, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(schema=SavePreferencesRequest, error_message="An error occurred while saving preferences")
+def save_initial_preferences(body, req):
     """
     Save initial user preferences to Firestore Database.
     
@@ -287,164 +289,49 @@ def save_initial_preferences(req: https_fn.Request) -> https_fn.Response:
         "language": "en"
     }
     """
+    preferences = body.preferences
+    
+    # Prepare preferences data in new nested format
+    preferences_data = {
+        'preferences': preferences,  # New nested structure
+        'detail_level': body.detail_level,
+        'language': body.language,
+        'format_version': '3.0'  # Version marker for the new nested format
+    }
     
-    # Handle CORS preflight requests
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type, Authorization',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers, status=204)
+    # Count topics and subtopics for logging
+    topics_count = len(preferences)
+    subtopics_count = sum(len(topic_subtopics) for topic_subtopics in preferences.values())
     
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response('Method not allowed. Use POST.', headers=headers, status=405)
+    logger.info("Saving preferences in nested format v3.0", extra={
+        "user_id": body.user_id,
+        "topics": list(preferences),
+        "topics_count": topics_count,
+        "subtopics_count": subtopics_count
+    })
     
-    try:
-        # Parse request data
-        data = req.get_json() or {}
-        
-        user_id = data.get('user_id')
-        preferences = data.get('preferences', {})  # New nested structure
-        detail_level = data.get('detail_level', 'Medium')
-        language = data.get('language', 'en')
-        
-        # Validate required fields
-        if not user_id:
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            }
-            return https_fn.Response(
-                json.dumps({"error": "Missing 'user_id' field"}),
-                headers=headers,
-                status=400
-            )
-        
-        # Validate preferences format (nested structure)
-        if not isinstance(preferences, dict):
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            }
-            return https_fn.Response(
-                json.dumps({"error": "'preferences' must be an object with nested topic structure"}),
-                headers=headers,
-                status=400
-            )
-        
-        # Validate nested structure: topics -> subtopics -> {subreddits, queries}
-        for topic_name, topic_subtopics in preferences.items():
-            if not isinstance(topic_subtopics, dict):
-                headers = {
-                    'Access-Control-Allow-Origin': '*',
-                    'Content-Type': 'application/json'
-                }
-                return https_fn.Response(
-                    json.dumps({"error": f"Topic '{topic_name}' must contain subtopics as an object"}),
-                    headers=headers,
-                    status=400
-                )
-            
-            for subtopic_name, subtopic_data in topic_subtopics.items():
-                if not isinstance(subtopic_data, dict):
-                    headers = {
-                        'Access-Control-Allow-Origin': '*',
-                        'Content-Type': 'application/json'
-                    }
-                    return https_fn.Response(
-                        json.dumps({"error": f"Subtopic '{subtopic_name}' in topic '{topic_name}' must have an object with 'subreddits' and 'queries'"}),
-                        headers=headers,
-                        status=400
-                    )
-                
-                if 'subreddits' not in subtopic_data or 'queries' not in subtopic_data:
-                    headers = {
-                        'Access-Control-Allow-Origin': '*',
-                        'Content-Type': 'application/json'
-                    }
-                    return https_fn.Response(
-                        json.dumps({"error": f"Subtopic '{subtopic_name}' must have 'subreddits' and 'queries' fields"}),
-                        headers=headers,
-                        status=400
-                    )
-                
-                if not isinstance(subtopic_data['subreddits'], list) or not isinstance(subtopic_data['queries'], list):
-                    headers = {
-                        'Access-Control-Allow-Origin': '*',
-                        'Content-Type': 'application/json'
-                    }
-                    return https_fn.Response(
-                        json.dumps({"error": f"Subtopic '{subtopic_name}' subreddits and queries must be arrays"}),
-                        headers=headers,
-                        status=400
-                    )
-        
-        # Prepare preferences data in new nested format
-        preferences_data = {
-            'preferences': preferences,  # New nested structure
-            'detail_level': detail_level,
-            'language': language,
-            'format_version': '3.0'  # Version marker for the new nested format
-        }
-        
-        # Count topics and subtopics for logging
-        topics_count = len(preferences)
-        subtopics_count = sum(len(topic_subtopics) for topic_subtopics in preferences.values())
-        
-        logger.info(f"Saving preferences for user {user_id} in new nested format v3.0")
-        logger.info(f"Topics: {list(preferences.keys())}")
-        logger.info(f"Topics count: {topics_count}")
-        logger.info(f"Subtopics count: {subtopics_count}")
-        
-        # Save to database
-        result = save_user_preferences_to_db(user_id, preferences_data)
-        
-        if result["success"]:
-            response_data = {
-                "success": True,
-                "message": "Initial preferences saved successfully in new nested format",
-                "user_id": user_id,
-                "format_version": "3.0",
-                "topics_count": topics_count,
-                "subtopics_count": subtopics_count,
-                "timestamp": datetime.now().isoformat()
-            }
-        else:
-            response_data = {
-                "success": False,
-                "error": result.get("error", "Failed to save preferences"),
-                "timestamp": datetime.now().isoformat()
-            }
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(json.dumps(response_data), headers=headers)
-        
-    except Exception as e:
-        logger.error(f"Error in save_initial_preferences: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
+    # Save to database
+    result = save_user_preferences_to_db(body.user_id, preferences_data)
+    
+    if not result["success"]:
+        return {
             "success": False,
-            "error": str(e),
-            "message": "An error occurred while saving preferences",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+            "error": result.get("error", "Failed to save preferences"),
+            "timestamp": now_iso()
+        }
+    return {
+        "success": True,
+        "message": "Initial preferences saved successfully in new nested format",
+        "user_id": body.user_id,
+        "format_version": "3.0",
+        "topics_count": topics_count,
+        "subtopics_count": subtopics_count,
+        "timestamp": now_iso()
+    }
 
-@https_fn.on_request(timeout_sec=60)
-def update_specific_subjects(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(timeout_sec=60, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(schema=SpecificSubjectsRequest, error_message="An error occurred while updating specific subjects")
+def update_specific_subjects(body, req):
     """
     Update specific subjects for a user based on conversation analysis.
     This function is called in parallel after each user message.
@@ -457,139 +344,123 @@ def update_specific_subjects(req: https_fn.Request) -> https_fn.Response:
         "language": "en"
     }
     """
-    
-    # Handle CORS preflight requests
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type, Authorization',
-            'Access-Control-Max-Age': '3600'
+    user_id = body.user_id
+    request_timestamp = now_iso()
+    
+    # Handle 'get' action - just return existing specific subjects
+    if body.action == 'get':
+        try:
+            existing_preferences = get_user_preferences_from_db(user_id)
+            specific_subjects = existing_preferences.get('specific_subjects', []) if existing_preferences else []
+        except Exception as e:
+            logger.error("Error getting specific subjects: %s", e, extra={"user_id": user_id})
+            specific_subjects = []
+        return {
+            "success": True,
+            "specific_subjects": specific_subjects,
+            "total_subjects": len(specific_subjects),
+            "timestamp": request_timestamp
         }
-        return https_fn.Response('', headers=headers, status=204)
     
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response('Method not allowed. Use POST.', headers=headers, status=405)
+    # For 'analyze' action, we need user_message
+    if not body.user_message:
+        return json_bytes_response(_MISSING_ANALYZE_MESSAGE_BODY, status=400, req=req)
     
-    try:
-        # Parse request data
-        data = req.get_json() or {}
-        
-        user_id = data.get('user_id')
-        action = data.get('action', 'analyze')  # 'analyze' or 'get'
-        conversation_history = data.get('conversation_history', [])
-        user_message = data.get('user_message', '')
-        language = data.get('language', 'en')
-        
-        # Validate required fields
-        if not user_id:
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            }
-            return https_fn.Response(
-                json.dumps({"error": "Missing 'user_id' field"}),
-                headers=headers,
-                status=400
-            )
-        
-        # Handle 'get' action - just return existing specific subjects
-        if action == 'get':
-            try:
-                existing_preferences = get_user_preferences_from_db(user_id)
-                specific_subjects = existing_preferences.get('specific_subjects', []) if existing_preferences else []
-                response_data = {
-                    "success": True,
-                    "specific_subjects": specific_subjects,
-                    "total_subjects": len(specific_subjects),
-                    "timestamp": datetime.now().isoformat()
-                }
-                headers = {
-                    'Access-Control-Allow-Origin': '*',
-                    'Content-Type': 'application/json'
-                }
-                return https_fn.Response(json.dumps(response_data), headers=headers)
-            except Exception as e:
-                logger.error(f"Error getting specific subjects: {e}")
-                response_data = {
-                    "success": True,
-                    "specific_subjects": [],
-                    "total_subjects": 0,
-                    "timestamp": datetime.now().isoformat()
-                }
-                headers = {
-                    'Access-Control-Allow-Origin': '*',
-                    'Content-Type': 'application/json'
-                }
-                return https_fn.Response(json.dumps(response_data), headers=headers)
-        
-        # For 'analyze' action, we need user_message
-        if not user_message:
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            }
-            return https_fn.Response(
-                json.dumps({"error": "Missing 'user_message' field for analyze action"}),
-                headers=headers,
-                status=400
-            )
-        
-        logger.info(f"Analyzing conversation for user {user_id}")
-        
-        # Analyze conversation for specific subjects
-        analysis_result = analyze_conversation_for_specific_subjects(
-            conversation_history, user_message, language
+    logger.info("Analyzing conversation", extra={"user_id": user_id})
+    
+    # Analyze conversation for specific subjects
+    analysis_result = analyze_conversation_for_specific_subjects(
+        body.conversation_history, body.user_message, body.language
+    )
+    
+    if analysis_result["success"] and analysis_result.get("specific_subjects"):
+        # Update database with new specific subjects
+        update_result = update_specific_subjects_in_db(
+            user_id, analysis_result["specific_subjects"], return_all=True
         )
         
-        if analysis_result["success"] and analysis_result.get("specific_subjects"):
-            # Update database with new specific subjects
-            update_result = update_specific_subjects_in_db(
-                user_id, analysis_result["specific_subjects"]
-            )
-            
-            response_data = {
-                "success": True,
-                "new_subjects_found": analysis_result["specific_subjects"],
-                "total_subjects": update_result.get("updated_subjects", []),
-                "analysis_usage": analysis_result.get("usage", {}),
-                "timestamp": datetime.now().isoformat()
-            }
-        else:
-            response_data = {
-                "success": True,
-                "new_subjects_found": [],
-                "message": "No new specific subjects found in this message",
-                "timestamp": datetime.now().isoformat()
-            }
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(json.dumps(response_data), headers=headers)
-        
-    except Exception as e:
-        logger.error(f"Error in update_specific_subjects: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while updating specific subjects",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+        return {
+            "success": True,
+            "new_subjects_found": analysis_result["specific_subjects"],
+            "total_subjects": update_result.get("updated_subjects", []),
+            "analysis_usage": analysis_result.get("usage", {}),
+            "timestamp": request_timestamp
+        }
+    return {
+        "success": True,
+        "new_subjects_found": [],
+        "message": "No new specific subjects found in this message",
+        "timestamp": request_timestamp
+    }
 
-@https_fn.on_request(timeout_sec=120)
-def answer(req: https_fn.Request) -> https_fn.Response:
+# Phrases of an assistant reply that wraps up the onboarding conversation
+_AI_ENDING_PHRASES = (
+    'personalized news feed is ready', 'flux d\'actualités personnalisé est prêt', 
+    'feed de noticias personalizado está listo', 'تدفق الأخبار المخصص لك جاهز',
+    'start reading', 'commencer à lire', 'empezar a leer', 'البدء في قراءة'
+)
+
+
+def _ai_suggests_ending(ai_response):
+    ai_message = ai_response.lower()
+    return any(phrase in ai_message for phrase in _AI_ENDING_PHRASES)
+
+
+def _answer_events(body, system_prompt, is_ending_response, request_timestamp):
+    """
+    Server-Sent Events for a streamed answer: one "data" frame per reply
+    fragment ({"delta": ...}), then a "done" event with the same fields as the
+    JSON response, or an "error" event if the reply could not be generated.
+    """
+    user_id = body.user_id
+    user_preferences = body.user_preferences
+    
+    analysis_future = None
+    if user_id and body.user_message.strip():
+        analysis_future = schedule_specific_subjects_analysis(
+            user_id,
+            body.conversation_history,
+            body.user_message,
+            user_preferences.get('language', 'en')
+        )
+    
+    parts = []
+    try:
+        for delta in stream_ai_response(system_prompt, body.conversation_history, body.user_message):
+            parts.append(delta)
+            yield sse_event({"delta": delta})
+    except Exception as e:
+        logger.error("Error streaming AI response: %s", e)
+        yield sse_event({"error": "Failed to generate AI response", "details": str(e)}, event="error")
+        return
+    
+    ai_response = "".join(parts).strip()
+    ai_suggests_ending = _ai_suggests_ending(ai_response)
+    
+    # Wait for the analysis before closing the stream: the instance may lose
+    # its CPU once the response is complete
+    if analysis_future is not None:
+        try:
+            analysis_future.result()
+            logger.info("Completed specific subjects analysis", extra={"user_id": user_id})
+        except Exception as e:
+            logger.warning("Failed to analyze specific subjects: %s", e, extra={"user_id": user_id})
+    
+    logger.info("AI response streamed", extra={"characters": len(ai_response)})
+    yield sse_event({
+        "success": True,
+        "ai_message": ai_response,
+        "conversation_id": secrets.token_hex(8),
+        "timestamp": request_timestamp,
+        "usage": {},
+        "user_preferences": user_preferences,
+        "conversation_ending": is_ending_response or ai_suggests_ending,
+        "ready_for_news": ai_suggests_ending
+    }, event="done")
+
+@https_fn.on_request(**WARM_ENDPOINT_OPTIONS, timeout_sec=120)
+@json_post_endpoint(schema=AnswerRequest, error_message="An error occurred while processing the conversation")
+def answer(body, req):
     """
     Handle conversation with AI assistant based on user preferences.
     
@@ -608,153 +479,105 @@ def answer(req: https_fn.Request) -> https_fn.Response:
         ],
         "user_message": "I want to know about tech news"
     }
+    
+    With `Accept: text/event-stream` the reply is streamed as Server-Sent
+    Events (see _answer_events) instead of returned as one JSON object.
     """
     
-    # Handle CORS preflight requests
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type, Authorization',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers, status=204)
+    request_timestamp = now_iso()
     
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response('Method not allowed. Use POST.', headers=headers, status=405)
+    user_id = body.user_id  # Optional for specific subjects tracking
+    user_preferences = body.user_preferences
+    conversation_history = body.conversation_history
+    user_message = body.user_message
     
-    try:
-        # Parse request data
-        data = req.get_json() or {}
-        
-        user_id = data.get('user_id')  # Optional for specific subjects tracking
-        user_preferences = data.get('user_preferences', {})
-        conversation_history = data.get('conversation_history', [])
-        user_message = data.get('user_message', '')
-        
-        # Validate required fields
-        if not user_message:
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            }
-            return https_fn.Response(
-                json.dumps({"error": "Missing 'user_message' field"}),
-                headers=headers,
-                status=400
-            )
-        
-        logger.info(f"Processing conversation - User ID: {user_id}")
-        logger.info(f"User message: {user_message}")
-        logger.info(f"Using current local preferences: {user_preferences}")
-        
-        # Always use the preferences sent in the request (current local preferences)
-        # These are the user's current choices, not what's saved in database
-        
-        # Build system prompt based on current user preferences
-        system_prompt = build_system_prompt(user_preferences)
-        
-        # Check if user wants to end conversation
-        end_conversation_keywords = {
-            'en': ['yes', 'sure', 'ok', 'okay', 'start reading', 'read news', 'go ahead', 'let\'s go'],
-            'fr': ['oui', 'bien sûr', 'd\'accord', 'ok', 'commencer', 'lire', 'allons-y', 'c\'est parti'],
-            'es': ['sí', 'claro', 'de acuerdo', 'ok', 'empezar', 'leer', 'vamos', 'adelante'],
-            'ar': ['نعم', 'موافق', 'حسناً', 'ابدأ', 'اقرأ', 'هيا']
-        }
-        
-        user_language = user_preferences.get('language', 'en')
-        user_msg_lower = user_message.lower().strip()
-        
-        # Check if this might be a conversation ending response
-        is_ending_response = False
-        if user_language in end_conversation_keywords:
-            keywords = end_conversation_keywords[user_language]
-            is_ending_response = any(keyword in user_msg_lower for keyword in keywords)
-        
-        # Generate AI response
-        ai_response = generate_ai_response(system_prompt, conversation_history, user_message)
-        
-        # If user_id is provided, analyze for specific subjects synchronously
-        # This ensures the analysis happens but may add slight delay
-        if user_id and user_message.strip():
-            try:
-                # Run analysis synchronously to ensure it completes
-                analyze_and_update_specific_subjects(
-                    user_id,
-                    conversation_history,
-                    user_message,
-                    user_preferences.get('language', 'en')
-                )
-                logger.info(f"Completed analysis for user {user_id}")
-            except Exception as e:
-                logger.warning(f"Failed to analyze specific subjects: {e}")
-                # Don't fail the main response if analysis fails
-        
-        if not ai_response["success"]:
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            }
-            return https_fn.Response(
-                json.dumps({
-                    "error": "Failed to generate AI response",
-                    "details": ai_response.get("error")
-                }),
-                headers=headers,
-                status=500
-            )
-        
-        # Check if AI suggests ending the conversation
-        ai_message = ai_response["message"].lower()
-        ai_suggests_ending = any(phrase in ai_message for phrase in [
-            'personalized news feed is ready', 'flux d\'actualités personnalisé est prêt', 
-            'feed de noticias personalizado está listo', 'تدفق الأخبار المخصص لك جاهز',
-            'start reading', 'commencer à lire', 'empezar a leer', 'البدء في قراءة'
-        ])
-        
-        # Prepare response
-        response_data = {
-            "success": True,
-            "ai_message": ai_response["message"],
-            "conversation_id": str(uuid.uuid4()),  # Generate conversation ID for tracking
-            "timestamp": datetime.now().isoformat(),
-            "usage": ai_response.get("usage", {}),
-            "user_preferences": user_preferences,
-            "conversation_ending": is_ending_response or ai_suggests_ending,
-            "ready_for_news": ai_suggests_ending
-        }
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        logger.info(f"AI response generated successfully: {len(ai_response['message'])} characters")
-        
-        return https_fn.Response(json.dumps(response_data), headers=headers)
-        
-    except Exception as e:
-        logger.error(f"Error in answer function: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while processing the conversation",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+    logger.info("Processing conversation", extra={
+        "user_id": user_id,
+        "user_message": user_message,
+        "user_preferences": user_preferences
+    })
+    
+    # Always use the preferences sent in the request (current local preferences)
+    # These are the user's current choices, not what's saved in database
+    
+    # Build system prompt based on current user preferences
+    system_prompt = build_system_prompt(user_preferences)
+    
+    # Check if user wants to end conversation
+    end_conversation_keywords = {
+        'en': ['yes', 'sure', 'ok', 'okay', 'start reading', 'read news', 'go ahead', 'let\'s go'],
+        'fr': ['oui', 'bien sûr', 'd\'accord', 'ok', 'commencer', 'lire', 'allons-y', 'c\'est parti'],
+        'es': ['sí', 'claro', 'de acuerdo', 'ok', 'empezar', 'leer', 'vamos', 'adelante'],
+        'ar': ['نعم', 'موافق', 'حسناً', 'ابدأ', 'اقرأ', 'هيا']
+    }
+    
+    user_language = user_preferences.get('language', 'en')
+    user_msg_lower = user_message.lower().strip()
+    
+    # Check if this might be a conversation ending response
+    is_ending_response = False
+    if user_language in end_conversation_keywords:
+        keywords = end_conversation_keywords[user_language]
+        is_ending_response = any(keyword in user_msg_lower for keyword in keywords)
+    
+    # Clients sending `Accept: text/event-stream` get the reply as it is generated
+    if wants_event_stream(req):
+        return event_stream_response(_answer_events(body, system_prompt, is_ending_response, request_timestamp))
+    
+    # Generate AI response while the specific-subjects analysis runs concurrently.
+    # Both calls are network-bound, so overlapping them cuts the wall-clock time
+    # to roughly the slower of the two instead of their sum.
+    analysis_future = None
+    if user_id and user_message.strip():
+        analysis_future = schedule_specific_subjects_analysis(
+            user_id,
+            conversation_history,
+            user_message,
+            user_preferences.get('language', 'en')
+        )
+    
+    ai_response = generate_ai_response(system_prompt, conversation_history, user_message)
+    
+    if analysis_future is not None:
+        try:
+            analysis_future.result()
+            logger.info("Completed specific subjects analysis", extra={"user_id": user_id})
+        except Exception as e:
+            logger.warning("Failed to analyze specific subjects: %s", e, extra={"user_id": user_id})
+            # Don't fail the main response if analysis fails
+    
+    # generate_ai_response returns the message text, or an error string prefixed with ❌
+    if not ai_response or ai_response.startswith("❌"):
+        return json_response({
+            "error": "Failed to generate AI response",
+            "details": ai_response
+        }, status=500, req=req)
+    
+    # Check if AI suggests ending the conversation
+    ai_suggests_ending = _ai_suggests_ending(ai_response)
+    
+    # Prepare response
+    response_data = {
+        "success": True,
+        "ai_message": ai_response,
+        "conversation_id": secrets.token_hex(8),  # Conversation ID for client-side tracking
+        "timestamp": request_timestamp,
+        "usage": {},
+        "user_preferences": user_preferences,
+        "conversation_ending": is_ending_response or ai_suggests_ending,
+        "ready_for_news": ai_suggests_ending
+    }
+    
+    logger.info("AI response generated", extra={"characters": len(ai_response)})
+    
+    return response_data
+
 
 # --- Trending Subtopics Analysis ---
 
-@https_fn.on_request(timeout_sec=120)
-def get_trending_for_subtopic(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(**WARM_ENDPOINT_OPTIONS, timeout_sec=120)
+@json_post_endpoint(schema=TrendingSubtopicRequest, error_defaults={"trending_topics": []})
+def get_trending_for_subtopic(body, req):
     """
     HTTP endpoint to get trending topics for a specific subtopic.
     
@@ -768,94 +591,22 @@ def get_trending_for_subtopic(req: https_fn.Request) -> https_fn.Response:
         "max_articles": 10
     }
     """
-    
-    # Handle CORS preflight requests
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type, Authorization',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers, status=204)
-    
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response('Method not allowed. Use POST.', headers=headers, status=405)
-    
-    try:
-        request_data = req.get_json()
-        if not request_data:
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            }
-            return https_fn.Response(
-                json.dumps({"success": False, "error": "No JSON data provided"}),
-                headers=headers,
-                status=400
-            )
-        
-        # Extract parameters
-        subtopic_title = request_data.get('subtopic_title')
-        subtopic_query = request_data.get('subtopic_query')
-        subreddits = request_data.get('subreddits', [])
-        
-        if not subtopic_title or not subtopic_query:
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            }
-            return https_fn.Response(
-                json.dumps({"success": False, "error": "subtopic_title and subtopic_query are required"}),
-                headers=headers,
-                status=400
-            )
-        
-        lang = request_data.get('lang', 'en')
-        country = request_data.get('country', 'us')
-        max_articles = request_data.get('max_articles', 10)
-        
-        logger.info(f"Getting trending topics for subtopic: {subtopic_title}")
-        
-        # Call the analysis function
-        result = get_trending_topics_for_subtopic(
-            subtopic_title=subtopic_title,
-            subtopic_query=subtopic_query,
-            subreddits=subreddits,
-            lang=lang,
-            country=country,
-            max_articles=max_articles
-        )
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(
-            json.dumps(result),
-            headers=headers,
-            status=200 if result.get("success") else 500
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in get_trending_for_subtopic endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": str(e), "trending_topics": []}),
-            headers=headers,
-            status=500
-        )
-
-@https_fn.on_request(timeout_sec=120)
-def get_trending_subtopics(req: https_fn.Request) -> https_fn.Response:
+    logger.info("Getting trending topics for subtopic", extra={"subtopic": body.subtopic_title})
+    
+    # Call the analysis function (identical requests within 5 minutes are served from cache)
+    cache_key = response_cache_key("trend-subtopic", body.subtopic_title, body.subtopic_query, body.subreddits, body.lang, body.country, body.max_articles)
+    return cached_json_response(req, cache_key, lambda: get_trending_topics_for_subtopic(
+        subtopic_title=body.subtopic_title,
+        subtopic_query=body.subtopic_query,
+        subreddits=body.subreddits,
+        lang=body.lang,
+        country=body.country,
+        max_articles=body.max_articles
+    ))
+
+@https_fn.on_request(**WARM_ENDPOINT_OPTIONS, timeout_sec=120)
+@json_post_endpoint(schema=TrendingTopicRequest, error_defaults={"subtopics": []})
+def get_trending_subtopics(body, req):
     """
     HTTP endpoint to get trending subtopics for a given topic.
     
@@ -875,93 +626,23 @@ def get_trending_subtopics(req: https_fn.Request) -> https_fn.Response:
         "subtopics": ["AI regulation", "ChatGPT updates", "tech layoffs", ...]
     }
     """
-    
-    # Handle CORS preflight requests
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type, Authorization',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers, status=204)
-    
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response('Method not allowed. Use POST.', headers=headers, status=405)
-    
-    try:
-        # Parse request body
-        request_data = req.get_json()
-        if not request_data:
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            }
-            return https_fn.Response(
-                json.dumps({"success": False, "error": "No JSON data provided"}),
-                headers=headers,
-                status=400
-            )
-        
-        # Extract parameters
-        topic = request_data.get('topic')
-        if not topic:
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            }
-            return https_fn.Response(
-                json.dumps({"success": False, "error": "Topic is required"}),
-                headers=headers,
-                status=400
-            )
-        
-        lang = request_data.get('lang', 'en')
-        country = request_data.get('country', 'us')
-        max_articles = request_data.get('max_articles', 10)
-        
-        # Validate max_articles
-        max_articles = min(max(1, max_articles), 20)  # Between 1 and 20
-        
-        logger.info(f"Getting trending subtopics for topic: {topic}, lang: {lang}, country: {country}")
-        
-        # Call the analysis function
-        result = extract_trending_subtopics(
-            topic=topic,
-            lang=lang,
-            country=country,
-            max_articles=max_articles
-        )
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(
-            json.dumps(result),
-            headers=headers,
-            status=200 if result.get("success") else 500
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in get_trending_subtopics endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": str(e), "subtopics": []}),
-            headers=headers,
-            status=500
-        )
-
-@https_fn.on_request(timeout_sec=30)
-def get_user_preferences(req: https_fn.Request) -> https_fn.Response:
+    # Validate max_articles
+    max_articles = min(max(1, body.max_articles), 20)  # Between 1 and 20
+    
+    logger.info("Getting trending subtopics", extra={"topic": body.topic, "lang": body.lang, "country": body.country})
+    
+    # Call the analysis function (identical requests within 5 minutes are served from cache)
+    cache_key = response_cache_key("trend-topic", body.topic, body.lang, body.country, max_articles)
+    return cached_json_response(req, cache_key, lambda: extract_trending_subtopics(
+        topic=body.topic,
+        lang=body.lang,
+        country=body.country,
+        max_articles=max_articles
+    ))
+
+@https_fn.on_request(timeout_sec=30, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(schema=UserRequest, error_message="An error occurred while retrieving preferences")
+def get_user_preferences(body, req):
     """
     HTTP function to get user preferences for updating.
     
@@ -984,122 +665,82 @@ def get_user_preferences(req: https_fn.Request) -> https_fn.Response:
             "format_version": "2.0"
         }
     }
-    """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
-    
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
     
-    try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        user_id = data.get('user_id')
-        if not user_id:
-            raise ValueError("Missing user_id")
-        
-        logger.info(f"Getting preferences for user: {user_id}")
-        
-        # Get preferences from database
-        preferences = get_user_preferences_from_db(user_id)
-        
-        if preferences:
-            # Remove internal fields that shouldn't be sent to client
-            if preferences.get('format_version') == '3.0':
-                # New nested format
-                client_preferences = {
-                    'preferences': preferences.get('preferences', {}),
-                    'detail_level': preferences.get('detail_level', 'Medium'),
-                    'language': preferences.get('language', 'en'),
-                    'format_version': '3.0'
-                }
-                
-                topics_count = len(client_preferences['preferences'])
-                subtopics_count = sum(len(topic_subtopics) for topic_subtopics in client_preferences['preferences'].values())
-                
-                logger.info(f"Successfully retrieved v3.0 preferences for user {user_id}")
-                logger.info(f"  - Topics: {topics_count} items")
-                logger.info(f"  - Subtopics: {subtopics_count} items")
-                
-            else:
-                # Legacy format (v2.0 or older) - convert for backward compatibility
-                client_preferences = {
-                    'topics': preferences.get('topics', []),
-                    'subtopics': preferences.get('subtopics', {}),
-                    'detail_level': preferences.get('detail_level', 'Medium'),
-                    'language': preferences.get('language', 'en'),
-                    'format_version': preferences.get('format_version', '2.0'),
-                    'specific_subjects': preferences.get('specific_subjects', [])  # Include for backward compatibility
-                }
-                
-                logger.info(f"Successfully retrieved legacy preferences for user {user_id}")
-                logger.info(f"  - Topics: {len(client_preferences['topics'])} items")
-                logger.info(f"  - Subtopics: {len(client_preferences['subtopics'])} items")
-            
-            response_data = {
-                "success": True,
-                "preferences": client_preferences,
-                "message": "Preferences retrieved successfully",
-                "timestamp": datetime.now().isoformat()
+    The response carries an ETag; requests sending it back in If-None-Match
+    get an empty 304 while the preferences are unchanged.
+    """
+    request_timestamp = now_iso()
+    
+    user_id = body.user_id
+    logger.info("Getting preferences", extra={"user_id": user_id})
+    
+    # Get preferences from database
+    preferences = get_user_preferences_from_db(user_id)
+    
+    if preferences:
+        # Remove internal fields that shouldn't be sent to client
+        if preferences.get('format_version') == '3.0':
+            # New nested format
+            client_preferences = {
+                'preferences': preferences.get('preferences', {}),
+                'detail_level': preferences.get('detail_level', 'Medium'),
+                'language': preferences.get('language', 'en'),
+                'format_version': '3.0'
             }
             
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Retrieved v3.0 preferences", extra={
+                    "user_id": user_id,
+                    "topics": len(client_preferences['preferences']),
+                    "subtopics": sum(len(topic_subtopics) for topic_subtopics in client_preferences['preferences'].values())
+                })
+            
         else:
-            # No preferences found - return empty structure in new format
-            response_data = {
-                "success": True,
-                "preferences": {
-                    'preferences': {},
-                    'detail_level': 'Medium',
-                    'language': 'en',
-                    'format_version': '3.0'
-                },
-                "message": "No existing preferences found",
-                "timestamp": datetime.now().isoformat()
+            # Legacy format (v2.0 or older) - convert for backward compatibility
+            client_preferences = {
+                'topics': preferences.get('topics', []),
+                'subtopics': preferences.get('subtopics', {}),
+                'detail_level': preferences.get('detail_level', 'Medium'),
+                'language': preferences.get('language', 'en'),
+                'format_version': preferences.get('format_version', '2.0'),
+                'specific_subjects': preferences.get('specific_subjects', [])  # Include for backward compatibility
             }
             
-            logger.info(f"No preferences found for user {user_id}, returning empty v3.0 structure")
+            logger.info("Retrieved legacy preferences", extra={
+                "user_id": user_id,
+                "topics": len(client_preferences['topics']),
+                "subtopics": len(client_preferences['subtopics'])
+            })
         
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
+        response_data = {
+            "success": True,
+            "preferences": client_preferences,
+            "message": "Preferences retrieved successfully",
+            "timestamp": request_timestamp
         }
         
-        return https_fn.Response(json.dumps(response_data), headers=headers)
-        
-    except Exception as e:
-        logger.error(f"Error in get_user_preferences: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while retrieving preferences",
-            "timestamp": datetime.now().isoformat()
+    else:
+        # No preferences found - return empty structure in new format
+        response_data = {
+            "success": True,
+            "preferences": {
+                'preferences': {},
+                'detail_level': 'Medium',
+                'language': 'en',
+                'format_version': '3.0'
+            },
+            "message": "No existing preferences found",
+            "timestamp": request_timestamp
         }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+        
+        logger.info("No preferences found, returning empty v3.0 structure", extra={"user_id": user_id})
+    
+    # Clients poll this endpoint: answer 304 when their copy (If-None-Match) is current
+    return etag_json_response(req, response_data, validator=[response_data["preferences"], response_data["message"]])
 
-@https_fn.on_request(timeout_sec=120)
-def get_articles_subtopics_user_endpoint(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(**WARM_ENDPOINT_OPTIONS, timeout_sec=120)
+@json_post_endpoint(schema=SubtopicContentRequest, error_message="An error occurred while fetching subtopic content")
+def get_articles_subtopics_user_endpoint(body, req):
     """
     HTTP endpoint to fetch articles and Reddit posts for a user's subtopic.
     
@@ -1162,99 +803,51 @@ def get_articles_subtopics_user_endpoint(req: https_fn.Request) -> https_fn.Resp
         }
     }
     """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
+    logger.info("Fetching content for subtopic", extra={
+        "subtopic": body.subtopic_name,
+        "subreddits": body.subtopic_data['subreddits'],
+        "queries": body.subtopic_data['queries'],
+        "lang": body.lang,
+        "country": body.country
+    })
+    
+    # Call the main function (body already validated, defaults filled in by the schema)
+    result = get_articles_subtopics_user(
+        subtopic_name=body.subtopic_name,
+        subtopic_data=body.subtopic_data,
+        lang=body.lang,
+        country=body.country,
+        include_comments=body.include_comments,
+        max_comments=body.max_comments
+    )
+    
+    return result
+
+
+def _iter_topic_posts_json(result):
+    """
+    Yield a successful get_topic_posts result as JSON byte chunks.
+
+    Subtopics are popped from the result as they are serialized, so each one
+    can be freed once it has been sent instead of keeping the whole dict and
+    its encoded string alive together.
+    """
+    data = result.pop("data")
+    subtopics = data.pop("subtopics")
     
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
+    yield b'{"success":true,"data":{"topic_headlines":' + dumps(data.pop("topic_headlines", [])) + b',"subtopics":{'
     
-    try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        subtopic_name = data.get('subtopic_name')
-        subtopic_data = data.get('subtopic_data')
-        lang = data.get('lang', 'en')
-        country = data.get('country', 'us')
-        include_comments = data.get('include_comments', False)
-        max_comments = data.get('max_comments', 3)
-        
-        # Validate required parameters
-        if not subtopic_name:
-            raise ValueError("Missing subtopic_name")
-        
-        if not subtopic_data:
-            raise ValueError("Missing subtopic_data")
-        
-        if not isinstance(subtopic_data, dict):
-            raise ValueError("subtopic_data must be an object")
-        
-        if 'subreddits' not in subtopic_data or 'queries' not in subtopic_data:
-            raise ValueError("subtopic_data must contain 'subreddits' and 'queries' fields")
-        
-        if not isinstance(subtopic_data['subreddits'], list) or not isinstance(subtopic_data['queries'], list):
-            raise ValueError("subreddits and queries must be arrays")
-        
-        logger.info(f"Fetching content for subtopic: {subtopic_name}")
-        logger.info(f"  - Subreddits: {subtopic_data['subreddits']}")
-        logger.info(f"  - Queries: {subtopic_data['queries']}")
-        logger.info(f"  - Language: {lang}, Country: {country}")
-        
-        # Call the main function
-        result = get_articles_subtopics_user(
-            subtopic_name=subtopic_name,
-            subtopic_data=subtopic_data,
-            lang=lang,
-            country=country,
-            include_comments=include_comments,
-            max_comments=max_comments
-        )
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(
-            json.dumps(result),
-            headers=headers,
-            status=200 if result.get("success") else 500
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in get_articles_subtopics_user_endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while fetching subtopic content",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+    separator = b''
+    for subtopic_name in list(subtopics):
+        yield separator + dumps(subtopic_name) + b':' + dumps(subtopics.pop(subtopic_name))
+        separator = b','
+    
+    yield b'}},"summary":' + dumps(result.get("summary", {})) + b'}'
 
 
-@https_fn.on_request(timeout_sec=180)
-def get_topic_posts_endpoint(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(**WARM_ENDPOINT_OPTIONS, timeout_sec=180)
+@json_post_endpoint(schema=TopicPostsRequest, error_message="An error occurred while fetching topic content")
+def get_topic_posts_endpoint(body, req):
     """
     HTTP endpoint to fetch articles and Reddit posts for a complete user topic.
     
@@ -1302,100 +895,28 @@ def get_topic_posts_endpoint(req: https_fn.Request) -> https_fn.Response:
         }
     }
     """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Processing topic", extra={
+            "topic": body.topic_name,
+            "subtopics": list(body.topic_data),
+            "lang": body.lang,
+            "country": body.country
+        })
     
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
+    # Call the main function (body already validated, defaults filled in by the schema)
+    result = get_topic_posts(body.topic_name, body.topic_data, body.lang, body.country)
     
-    try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        topic_name = data.get('topic_name')
-        topic_data = data.get('topic_data')
-        lang = data.get('lang', 'en')
-        country = data.get('country', 'us')
-        
-        # Validate required parameters
-        if not topic_name:
-            raise ValueError("Missing topic_name")
-        
-        if not topic_data:
-            raise ValueError("Missing topic_data")
-        
-        if not isinstance(topic_data, dict):
-            raise ValueError("topic_data must be an object")
-        
-        # Validate topic_data structure
-        for subtopic_name, subtopic_data in topic_data.items():
-            if not isinstance(subtopic_data, dict):
-                raise ValueError(f"Subtopic '{subtopic_name}' must be an object")
-            
-            if 'subreddits' not in subtopic_data or 'queries' not in subtopic_data:
-                raise ValueError(f"Subtopic '{subtopic_name}' must have 'subreddits' and 'queries' fields")
-            
-            if not isinstance(subtopic_data['subreddits'], list) or not isinstance(subtopic_data['queries'], list):
-                raise ValueError(f"Subtopic '{subtopic_name}' subreddits and queries must be arrays")
-        
-        logger.info(f"Processing topic: {topic_name} with {len(topic_data)} subtopics")
-        logger.info(f"  - Subtopics: {list(topic_data.keys())}")
-        logger.info(f"  - Language: {lang}, Country: {country}")
-        
-        # Call the main function
-        result = get_topic_posts(
-            topic_name=topic_name,
-            topic_data=topic_data,
-            lang=lang,
-            country=country
-        )
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(
-            json.dumps(result),
-            headers=headers,
-            status=200 if result.get("success") else 500
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in get_topic_posts_endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while fetching topic content",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+    if not result.get("success"):
+        return result
+    
+    # Stream the (large) payload subtopic by subtopic
+    return json_stream_response(_iter_topic_posts_json(result), req=req)
 
 
 
 @https_fn.on_request(timeout_sec=60)
-def get_pickup_line_endpoint(req: https_fn.Request) -> https_fn.Response:
+@json_post_endpoint(schema=TopicContentRequest, error_message="An error occurred while generating pickup line")
+def get_pickup_line_endpoint(body, req):
     """
     HTTP endpoint to generate pickup lines for topics.
     
@@ -1423,82 +944,17 @@ def get_pickup_line_endpoint(req: https_fn.Request) -> https_fn.Response:
         }
     }
     """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
+    logger.info("Generating pickup line", extra={"topic": body.topic_name})
     
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
+    # Call the main function (body already validated by the schema)
+    result = get_pickup_line(body.topic_name, body.topic_content_data)
     
-    try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        topic_name = data.get('topic_name')
-        topic_content_data = data.get('topic_content_data')
-        
-        # Validate required parameters
-        if not topic_name:
-            raise ValueError("Missing topic_name")
-        
-        if not topic_content_data:
-            raise ValueError("Missing topic_content_data")
-        
-        if not isinstance(topic_content_data, dict):
-            raise ValueError("topic_content_data must be an object")
-        
-        logger.info(f"Generating pickup line for topic: {topic_name}")
-        
-        # Call the main function
-        result = get_pickup_line(
-            topic_name=topic_name,
-            topic_content_data=topic_content_data
-        )
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(
-            json.dumps(result),
-            headers=headers,
-            status=200 if result.get("success") else 500
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in get_pickup_line_endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while generating pickup line",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+    return result
 
 
 @https_fn.on_request(timeout_sec=90)
-def get_topic_summary_endpoint(req: https_fn.Request) -> https_fn.Response:
+@json_post_endpoint(schema=TopicContentRequest, error_message="An error occurred while generating topic summary")
+def get_topic_summary_endpoint(body, req):
     """
     HTTP endpoint to generate comprehensive topic summaries.
     
@@ -1526,82 +982,17 @@ def get_topic_summary_endpoint(req: https_fn.Request) -> https_fn.Response:
         }
     }
     """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
+    logger.info("Generating comprehensive topic summary", extra={"topic": body.topic_name})
     
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
+    # Call the main function (body already validated by the schema)
+    result = get_topic_summary(body.topic_name, body.topic_content_data)
     
-    try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        topic_name = data.get('topic_name')
-        topic_content_data = data.get('topic_content_data')
-        
-        # Validate required parameters
-        if not topic_name:
-            raise ValueError("Missing topic_name")
-        
-        if not topic_content_data:
-            raise ValueError("Missing topic_content_data")
-        
-        if not isinstance(topic_content_data, dict):
-            raise ValueError("topic_content_data must be an object")
-        
-        logger.info(f"Generating comprehensive summary for topic: {topic_name}")
-        
-        # Call the main function
-        result = get_topic_summary(
-            topic_name=topic_name,
-            topic_content_data=topic_content_data
-        )
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(
-            json.dumps(result),
-            headers=headers,
-            status=200 if result.get("success") else 500
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in get_topic_summary_endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while generating topic summary",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+    return result
 
 
 @https_fn.on_request(timeout_sec=60)
-def get_reddit_world_summary_endpoint(req: https_fn.Request) -> https_fn.Response:
+@json_post_endpoint(schema=RedditWorldSummaryRequest, error_message="An error occurred while generating Reddit world summary")
+def get_reddit_world_summary_endpoint(body, req):
     """
     HTTP endpoint to generate executive world summaries from Reddit posts.
     
@@ -1634,72 +1025,14 @@ def get_reddit_world_summary_endpoint(req: https_fn.Request) -> https_fn.Respons
         "key_topics": ["Trump", "AI", "China"]
     }
     """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
-    
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
+    logger.info("Generating world summary", extra={"reddit_posts": len(body.reddit_posts)})
     
-    try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        reddit_posts = data.get('reddit_posts', [])
-        
-        # Validate required parameters
-        if not isinstance(reddit_posts, list):
-            raise ValueError("reddit_posts must be an array")
-        
-        logger.info(f"Generating world summary from {len(reddit_posts)} Reddit posts")
-        
-        # Call the main function
-        result = get_reddit_world_summary(reddit_posts_data=reddit_posts)
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(
-            json.dumps(result),
-            headers=headers,
-            status=200 if result.get("success") else 500
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in get_reddit_world_summary_endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while generating Reddit world summary",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+    return get_reddit_world_summary(reddit_posts_data=body.reddit_posts)
 
 
 @https_fn.on_request(timeout_sec=300)
-def get_complete_topic_report_endpoint(req: https_fn.Request) -> https_fn.Response:
+@json_post_endpoint(schema=TopicReportRequest, error_message="An error occurred while generating complete topic report")
+def get_complete_topic_report_endpoint(body, req):
     """
     HTTP endpoint to generate complete topic reports.
     
@@ -1735,91 +1068,38 @@ def get_complete_topic_report_endpoint(req: https_fn.Request) -> https_fn.Respon
         }
     }
     """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
-    
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
+    logger.info("Generating complete topic report", extra={"topic": body.topic_name})
     
-    try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        topic_name = data.get('topic_name')
-        topic_posts_data = data.get('topic_posts_data')
-        
-        # Validate required parameters
-        if not topic_name:
-            raise ValueError("Missing topic_name")
-        
-        if not topic_posts_data:
-            raise ValueError("Missing topic_posts_data")
-        
-        if not isinstance(topic_posts_data, dict):
-            raise ValueError("topic_posts_data must be an object")
-        
-        logger.info(f"Generating complete topic report for: {topic_name}")
-        
-        # Call the main function
-        result = get_complete_topic_report(
-            topic_name=topic_name,
-            topic_posts_data=topic_posts_data
-        )
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(
-            json.dumps(result),
-            headers=headers,
-            status=200 if result.get("success") else 500
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in get_complete_topic_report_endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while generating complete topic report",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+    return get_complete_topic_report(body.topic_name, body.topic_posts_data)
 
 
-@https_fn.on_request(timeout_sec=600)
-def refresh_articles_endpoint(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(timeout_sec=600, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(schema=UserJobRequest, error_message="An error occurred while refreshing articles")
+def refresh_articles_endpoint(body, req):
     """
     HTTP endpoint to refresh articles for a user.
     
+    With "async": true, the refresh runs in the background
+    (run_background_job) and the endpoint answers 202 with a job_id as soon as
+    the job is queued. Poll get_job_status_endpoint or
+    get_user_articles_endpoint for the outcome.
+    
     Expected request (POST):
     {
-        "user_id": "user123"
+        "user_id": "user123",
+        "async": false
     }
     
-    Returns:
+    Returns (202, with "async": true):
+    {
+        "success": true,
+        "job_id": "9f2c...",
+        "kind": "refresh_articles",
+        "status": "queued",
+        "status_collection": "background_jobs"
+    }
+    
+    Returns (otherwise, or as the job result once done):
     {
         "success": true,
         "user_id": "user123",
@@ -1844,73 +1124,18 @@ def refresh_articles_endpoint(req: https_fn.Request) -> https_fn.Response:
         }
     }
     """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
-    
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
+    if body.run_async:
+        logger.info("Queueing article refresh", extra={"user_id": body.user_id})
+        return json_response(enqueue_job("refresh_articles", body.user_id), status=202, req=req)
     
-    try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        user_id = data.get('user_id')
-        
-        # Validate required parameters
-        if not user_id:
-            raise ValueError("Missing user_id")
-        
-        logger.info(f"Starting article refresh for user: {user_id}")
-        
-        # Call the main function
-        result = refresh_articles(user_id=user_id)
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(
-            json.dumps(result),
-            headers=headers,
-            status=200 if result.get("success") else 500
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in refresh_articles_endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while refreshing articles",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+    logger.info("Starting article refresh", extra={"user_id": body.user_id})
+    return refresh_articles(body.user_id)
 
 
 
-@https_fn.on_request(timeout_sec=30)
-def get_user_articles_endpoint(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(timeout_sec=30, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(schema=UserRequest, error_message="An error occurred while retrieving articles")
+def get_user_articles_endpoint(body, req):
     """
     HTTP endpoint to get stored articles for a user.
     
@@ -1920,93 +1145,40 @@ def get_user_articles_endpoint(req: https_fn.Request) -> https_fn.Response:
     }
     
     Returns stored articles data or 404 if not found.
+    Found articles are cached per user for USER_RESPONSE_CACHE_TTL seconds, so
+    a read just after a refresh can briefly return the previous articles.
     """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
-    
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
-    
-    try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        user_id = data.get('user_id')
-        
-        if not user_id:
-            raise ValueError("Missing user_id")
-        
-        # Get articles from database
-        articles_data = get_user_articles_from_db(user_id)
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
+    def load():
+        articles_data = get_user_articles_from_db(body.user_id)
         if articles_data:
-            return https_fn.Response(
-                json.dumps({
-                    "success": True,
-                    "found": True,
-                    "data": articles_data
-                }),
-                headers=headers
-            )
-        else:
-            return https_fn.Response(
-                json.dumps({
-                    "success": True,
-                    "found": False,
-                    "message": "No articles found for this user"
-                }),
-                headers=headers,
-                status=404
-            )
-        
-    except Exception as e:
-        logger.error(f"Error in get_user_articles_endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while retrieving articles",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+            return {"success": True, "found": True, "data": articles_data}, 200
+        return {
+            "success": True,
+            "found": False,
+            "message": "No articles found for this user"
+        }, 404
+    
+    return cached_user_json_response(req, "articles", body.user_id, load)
 
 
-@https_fn.on_request(timeout_sec=600)
-def get_complete_report_endpoint(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(timeout_sec=600, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(schema=UserJobRequest)
+def get_complete_report_endpoint(body, req):
     """
     HTTP endpoint to generate complete reports for all user topics.
     
+    The reports are stored in the aifeed collection. With "async": true they
+    are generated in the background and the endpoint answers 202 with a job_id
+    (see refresh_articles_endpoint). Poll get_job_status_endpoint, then read
+    the reports with get_aifeed_reports_endpoint: the job result leaves them out.
+    
     Expected request (POST):
     {
-        "user_id": "6YV8wgIEBrev7e2Ep7fm0InByq02"
+        "user_id": "6YV8wgIEBrev7e2Ep7fm0InByq02",
+        "async": false
     }
     
-    Returns:
+    Returns (without "async"):
     {
         "success": true,
         "user_id": "user123",
@@ -2020,71 +1192,18 @@ def get_complete_report_endpoint(req: https_fn.Request) -> https_fn.Response:
         "generation_stats": {...}
     }
     """
-    # Enable CORS
-    if req.method == "OPTIONS":
-        headers = {
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "POST",
-            "Access-Control-Allow-Headers": "Content-Type",
-            "Access-Control-Max-Age": "3600",
-        }
-        return https_fn.Response("", status=204, headers=headers)
-
-    headers = {
-        "Access-Control-Allow-Origin": "*",
-        "Content-Type": "application/json",
-    }
-
-    try:
-        # Parse request
-        request_json = req.get_json(silent=True)
-        if not request_json:
-            return https_fn.Response(
-                json.dumps({"success": False, "error": "No JSON data provided"}),
-                status=400,
-                headers=headers
-            )
-
-        user_id = request_json.get("user_id")
-        if not user_id:
-            return https_fn.Response(
-                json.dumps({"success": False, "error": "user_id is required"}),
-                status=400,
-                headers=headers
-            )
-
-        logger.info(f"Complete report request for user: {user_id}")
-
-        # Generate complete report
-        result = get_complete_report(user_id)
-
-        if result.get("success"):
-            logger.info(f"Complete report generated successfully for user {user_id}")
-            return https_fn.Response(
-                json.dumps(result),
-                status=200,
-                headers=headers
-            )
-        else:
-            logger.error(f"Complete report generation failed for user {user_id}: {result.get('error')}")
-            return https_fn.Response(
-                json.dumps(result),
-                status=500,
-                headers=headers
-            )
-
-    except Exception as e:
-        logger.error(f"Error in get_complete_report_endpoint: {e}")
-        return https_fn.Response(
-            json.dumps({"success": False, "error": str(e)}),
-            status=500,
-            headers=headers
-        )
+    if body.run_async:
+        logger.info("Queueing complete report", extra={"user_id": body.user_id})
+        return json_response(enqueue_job("complete_report", body.user_id), status=202, req=req)
+    
+    logger.info("Generating complete report", extra={"user_id": body.user_id})
+    return get_complete_report(body.user_id)
 
 
 
-@https_fn.on_request(timeout_sec=30)
-def get_aifeed_reports_endpoint(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(timeout_sec=30, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(schema=UserRequest, error_message="An error occurred while retrieving AI feed reports")
+def get_aifeed_reports_endpoint(body, req):
     """
     HTTP endpoint to get AI feed reports for a user.
     
@@ -2094,165 +1213,128 @@ def get_aifeed_reports_endpoint(req: https_fn.Request) -> https_fn.Response:
     }
     
     Returns AI feed reports data or 404 if not found.
+    Found reports are cached per user for USER_RESPONSE_CACHE_TTL seconds, so
+    a read just after a new report can briefly return the previous one.
     """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
+    def load():
+        result = get_aifeed_reports(body.user_id)
+        if not result.get("success"):
+            return result, 500
+        return result, 200 if result.get("found") else 404
     
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
+    return cached_user_json_response(req, "aifeed", body.user_id, load)
+
+
+@https_fn.on_request(timeout_sec=30, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(schema=JobStatusRequest, error_message="An error occurred while retrieving job status")
+def get_job_status_endpoint(body, req):
+    """
+    HTTP endpoint to poll a background job queued by one of the long-running endpoints.
     
-    try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        user_id = data.get('user_id')
-        
-        if not user_id:
-            raise ValueError("Missing user_id")
-        
-        # Get AI feed reports from database
-        result = get_aifeed_reports(user_id)
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        if result.get("success"):
-            if result.get("found"):
-                return https_fn.Response(
-                    json.dumps(result),
-                    headers=headers
-                )
-            else:
-                return https_fn.Response(
-                    json.dumps(result),
-                    headers=headers,
-                    status=404
-                )
-        else:
-            return https_fn.Response(
-                json.dumps(result),
-                headers=headers,
-                status=500
-            )
-        
-    except Exception as e:
-        logger.error(f"Error in get_aifeed_reports_endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while retrieving AI feed reports",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+    Expected request (POST):
+    {
+        "job_id": "9f2c..."
+    }
+    
+    Returns:
+    {
+        "success": true,
+        "job_id": "9f2c...",
+        "kind": "refresh_articles",
+        "user_id": "user123",
+        "status": "queued" | "running" | "done" | "failed",
+        "result": {...}
+    }
+    """
+    job = get_job_status(body.job_id)
+    if job is None:
+        return json_bytes_response(_JOB_NOT_FOUND_BODY, status=404, req=req)
+    return {"success": True, "job_id": body.job_id, **job}
+
+
+# 540 s is the maximum for event-driven functions; longer jobs go through
+# Cloud Tasks to run_background_job_task (jobs.CLOUD_TASKS_JOB_KINDS)
+@pubsub_fn.on_message_published(topic=JOBS_TOPIC, timeout_sec=540, memory=FIRESTORE_ENDPOINT_MEMORY)
+def run_background_job(event: pubsub_fn.CloudEvent[pubsub_fn.MessagePublishedData]) -> None:
+    """Run a job published by enqueue_job (refresh, complete report)."""
+    run_job(event.data.message.json)
+
+
+@https_fn.on_request(timeout_sec=1770, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(required=('job_id', 'kind', 'user_id'))
+def run_background_job_task(data, req):
+    """
+    Run a job queued by enqueue_job through Cloud Tasks (media twin script).
+    
+    Only requests signed by Cloud Tasks with TASKS_SERVICE_ACCOUNT's OIDC
+    token are accepted. The outcome is stored in the job document; the task
+    succeeds even when the job failed, so Cloud Tasks does not run it again.
+    """
+    if not is_cloud_tasks_request(req, BACKGROUND_JOB_URL):
+        return json_bytes_response(_FORBIDDEN_BODY, status=403, req=req)
+    
+    result = run_job(data)
+    return {"success": True, "job_id": data["job_id"], "job_success": bool(result.get("success"))}
 
 
 # --- Text to Speech Endpoint using ElevenLabs ---
+_TTS_REQUEST_DECODER = msgspec.json.Decoder(TextToSpeechRequest)
+_TTS_AUDIO_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Content-Type': 'audio/wav',  # WAV au lieu de MP3
+    'Content-Disposition': 'attachment; filename="speech.wav"'  # WAV
+}
+
 @https_fn.on_request(timeout_sec=120)
 def text_to_speech(req: https_fn.Request) -> https_fn.Response:
     """Convert text to speech using ElevenLabs API."""
     
-    # Handle CORS preflight requests
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type, Authorization',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers, status=204)
-        
-    if req.method not in ['GET', 'POST']:
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response('Method not allowed. Use GET or POST.', headers=headers, status=405)
+    # Handle CORS preflight and unsupported methods
+    method_response = reject_unsupported_method(req, GET_OR_POST)
+    if method_response is not None:
+        return method_response
     
+    # Parameters from the query string (GET) or the JSON body (POST), validated in one pass
     try:
-        # Get parameters from query string (GET) or JSON body (POST)
         if req.method == 'GET':
-            text = req.args.get('text')
-            voice_id = req.args.get('voice_id', 'cmudN4ihcI42n48urXgc')
-            model_id = req.args.get('model_id', 'eleven_multilingual_v2')
-            output_format = req.args.get('output_format', 'mp3_44100_128')
-        else:  # POST
-            data = req.get_json() or {}
-            text = data.get('text')
-            voice_id = data.get('voice_id', 'cmudN4ihcI42n48urXgc')
-            model_id = data.get('model_id', 'eleven_multilingual_v2')
-            output_format = data.get('output_format', 'mp3_44100_128')
-        
-        if not text:
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'application/json'
-            }
-            return https_fn.Response(
-                json.dumps({"error": "Missing 'text' parameter"}),
-                headers=headers,
-                status=400
-            )
-        
-        logger.info(f"🔊 Converting text to speech: '{text[:50]}...' using voice {voice_id}")
+            params = msgspec.convert(req.args.to_dict(), TextToSpeechRequest)
+        else:
+            params = _TTS_REQUEST_DECODER.decode(req.get_data(cache=False))
+    except (msgspec.ValidationError, msgspec.DecodeError) as e:
+        return json_response({"success": False, "error": f"Invalid request: {e}"}, status=400, req=req)
+    text = params.text
+    voice_id = params.voice_id
+    model_id = params.model_id
+    
+    try:
+        logger.info("🔊 Converting text to speech: '%.50s...' using voice %s", text, voice_id)
         
-        # Initialize ElevenLabs client
-        audio_bytes = generate_text_to_speech_cartesia(
+        # Stream the audio through as Cartesia produces it: the client can start
+        # playing after the first chunk and the WAV is never held in memory
+        audio_chunks = stream_text_to_speech_cartesia(
             text=text,
-                voice_id=voice_id,  # Utilise model_id pour Cartesia
-                language="en",  # NOUVEAU paramètre à ajouter à ton endpoint
-                model_id=model_id
-            )
-        
-        # Return the audio file directly
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-                'Content-Type': 'audio/wav',  # WAV au lieu de MP3
-                'Content-Disposition': 'attachment; filename="speech.wav"',  # WAV
-            'Content-Length': str(len(audio_bytes))
-        }
+            voice_id=voice_id,  # Utilise model_id pour Cartesia
+            language="en",  # NOUVEAU paramètre à ajouter à ton endpoint
+            model_id=model_id
+        )
+        if audio_chunks is None:
+            raise RuntimeError("Text-to-speech generation failed")
         
-        logger.info(f"✅ Successfully generated {len(audio_bytes)} bytes of audio")
-        return https_fn.Response(audio_bytes, headers=headers)
+        return https_fn.Response(audio_chunks, headers=_TTS_AUDIO_HEADERS)
         
     except Exception as e:
-        logger.error(f"Error in text_to_speech: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
+        logger.error("Error in text_to_speech: %s", e)
         error_response = {
             "error": str(e),
             "message": "An error occurred while converting text to speech",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+        return json_response(error_response, status=500, req=req)
 
 
 @https_fn.on_request(timeout_sec=300)
-def generate_media_twin_script_endpoint(req: https_fn.Request) -> https_fn.Response:
+@json_post_endpoint(schema=MediaTwinScriptRequest, error_message="An error occurred while generating media twin script")
+def generate_media_twin_script_endpoint(body, req):
     """
     HTTP endpoint pour générer un script de media twin.
     
@@ -2264,82 +1346,19 @@ def generate_media_twin_script_endpoint(req: https_fn.Request) -> https_fn.Respo
         "language": "fr"
     }
     """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
-    
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
+    logger.info("Generating media twin script", extra={"topic": body.topic_name, "language": body.language})
     
-    try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        topic_name = data.get('topic_name')
-        topic_posts_data = data.get('topic_posts_data')
-        presenter_name = data.get('presenter_name', 'Alex')
-        language = data.get('language', 'fr')
-        
-        # Validate required parameters
-        if not topic_name:
-            raise ValueError("Missing topic_name")
-        if not topic_posts_data:
-            raise ValueError("Missing topic_posts_data")
-        
-        logger.info(f"Generating media twin script for: {topic_name} ({language})")
-        
-        # Call the main function
-        result = generate_media_twin_script(
-            topic_name=topic_name,
-            topic_posts_data=topic_posts_data,
-            presenter_name=presenter_name,
-            language=language
-        )
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(
-            json.dumps(result),
-            headers=headers,
-            status=200 if result.get("success") else 500
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in generate_media_twin_script_endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while generating media twin script",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+    return generate_media_twin_script(
+        topic_name=body.topic_name,
+        topic_posts_data=body.topic_posts_data,
+        presenter_name=body.presenter_name,
+        language=body.language
+    )
 
 
-@https_fn.on_request(timeout_sec=600)
-def generate_user_media_twin_script_endpoint(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(timeout_sec=600, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(schema=UserMediaTwinScriptRequest, error_message="An error occurred while generating user media twin script")
+def generate_user_media_twin_script_endpoint(body, req):
     """
     HTTP endpoint pour générer un script de media twin basé sur tous les articles d'un utilisateur.
     
@@ -2350,90 +1369,36 @@ def generate_user_media_twin_script_endpoint(req: https_fn.Request) -> https_fn.
         "language": "fr"
     }
     """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
-    
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
+    logger.info("Generating user media twin script", extra={"user_id": body.user_id, "language": body.language})
     
-    try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        user_id = data.get('user_id')
-        presenter_name = data.get('presenter_name', 'Alex')
-        language = data.get('language', 'fr')
-        
-        # Validate required parameters
-        if not user_id:
-            raise ValueError("Missing user_id")
-        
-        logger.info(f"Generating user media twin script for user: {user_id} ({language})")
-        
-        # Call the main function
-        result = generate_user_media_twin_script(
-            user_id=user_id,
-            presenter_name=presenter_name,
-            language=language
-        )
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(
-            json.dumps(result),
-            headers=headers,
-            status=200 if result.get("success") else 500
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in generate_user_media_twin_script_endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while generating user media twin script",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+    return generate_user_media_twin_script(
+        user_id=body.user_id,
+        presenter_name=body.presenter_name,
+        language=body.language
+    )
 
 
 
-@https_fn.on_request(timeout_sec=600)
-def generate_complete_user_media_twin_script_endpoint(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(timeout_sec=600, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(schema=CompleteUserMediaTwinScriptRequest, error_message="An error occurred while generating complete AI media twin script")
+def generate_complete_user_media_twin_script_endpoint(body, req):
     """
     HTTP endpoint pour générer un script de media twin complet avec IA basé sur tous les articles d'un utilisateur.
     
+    Avec "async": true, le script est généré en arrière-plan (Cloud Tasks,
+    run_background_job_task) : l'endpoint répond 202 avec un job_id (voir
+    refresh_articles_endpoint) et le résultat du job, via
+    get_job_status_endpoint, donne le script dans "script_storage_url".
+    
     Expected request (POST):
     {
         "user_id": "6YV8wgIEBrev7e2Ep7fm0InByq02",
         "presenter_name": "Alex",
-        "language": "fr"
+        "language": "fr",
+        "async": false
     }
     
-    Returns:
+    Returns (without "async"):
     {
         "success": true,
         "script": "Complete AI-generated script...",
@@ -2448,79 +1413,28 @@ def generate_complete_user_media_twin_script_endpoint(req: https_fn.Request) ->
         }
     }
     """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
-    
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
+    if body.run_async:
+        logger.info("Queueing complete AI media twin script", extra={"user_id": body.user_id, "language": body.language})
+        job = enqueue_job(
+            "complete_user_media_twin_script",
+            body.user_id,
+            presenter_name=body.presenter_name,
+            language=body.language
         )
+        return json_response(job, status=202, req=req)
     
-    try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        user_id = data.get('user_id')
-        presenter_name = data.get('presenter_name', 'Alex')
-        language = data.get('language', 'fr')
-        
-        # Validate required parameters
-        if not user_id:
-            raise ValueError("Missing user_id")
-        
-        logger.info(f"Generating complete AI media twin script for user: {user_id} ({language})")
-        
-        # Call the main function
-        result = generate_complete_user_media_twin_script(
-            user_id=user_id,
-            presenter_name=presenter_name,
-            language=language
-        )
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(
-            json.dumps(result),
-            headers=headers,
-            status=200 if result.get("success") else 500
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in generate_complete_user_media_twin_script_endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while generating complete AI media twin script",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500) 
+    logger.info("Generating complete AI media twin script", extra={"user_id": body.user_id, "language": body.language})
+    return generate_complete_user_media_twin_script(
+        user_id=body.user_id,
+        presenter_name=body.presenter_name,
+        language=body.language
+    )
 
 
 
-@https_fn.on_request(timeout_sec=300, memory=options.MemoryOption.MB_512)  # Increased memory
-def generate_simple_podcast_endpoint(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(timeout_sec=300, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(schema=SimplePodcastRequest, error_message="Failed to generate complete podcast")
+def generate_simple_podcast_endpoint(body, req):
     """
     HTTP endpoint to generate a complete podcast (script + audio).
     
@@ -2545,66 +1459,18 @@ def generate_simple_podcast_endpoint(req: https_fn.Request) -> https_fn.Response
         }
     }
     """
-    try:
-        # Parse request
-        request_json = req.get_json(silent=True)
-        if not request_json:
-            return https_fn.Response(
-                json.dumps({"success": False, "error": "No JSON data provided"}),
-                status=400,
-                headers={"Content-Type": "application/json"}
-            )
-        
-        user_id = request_json.get("user_id")
-        if not user_id:
-            return https_fn.Response(
-                json.dumps({"success": False, "error": "user_id is required"}),
-                status=400,
-                headers={"Content-Type": "application/json"}
-            )
-        
-        presenter_name = request_json.get("presenter_name", "Alex")
-        language = request_json.get("language", "en")
-        voice_id = request_json.get("voice_id", "96c64eb5-a945-448f-9710-980abe7a514c")
-        
-        # Generate complete podcast
-        result = generate_simple_podcast(
-            user_id=user_id,
-            presenter_name=presenter_name,
-            language=language,
-            voice_id=voice_id
-        )
-        
-        if result.get("success"):
-            return https_fn.Response(
-                json.dumps(result),
-                status=200,
-                headers={"Content-Type": "application/json"}
-            )
-        else:
-            return https_fn.Response(
-                json.dumps(result),
-                status=500,
-                headers={"Content-Type": "application/json"}
-            )
-        
-    except Exception as e:
-        logger.error(f"Error in generate_simple_podcast_endpoint: {e}")
-        return https_fn.Response(
-            json.dumps({
-                "success": False,
-                "error": str(e),
-                "message": "Failed to generate complete podcast"
-            }),
-            status=500,
-            headers={"Content-Type": "application/json"}
-        )
-
-# --- Complete User Update Pipeline ---
-
-
-@https_fn.on_request(timeout_sec=60)
-def send_push_notification_endpoint(req: https_fn.Request) -> https_fn.Response:
+    # Generate complete podcast
+    return generate_simple_podcast(
+        user_id=body.user_id,
+        presenter_name=body.presenter_name,
+        language=body.language,
+        voice_id=body.voice_id
+    )
+
+
+@https_fn.on_request(timeout_sec=60, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(schema=PushNotificationRequest, error_message="An error occurred while sending push notification")
+def send_push_notification_endpoint(body, req):
     """
     HTTP endpoint to send push notification to a user.
     
@@ -2624,249 +1490,248 @@ def send_push_notification_endpoint(req: https_fn.Request) -> https_fn.Response:
         "body": "Fresh news articles and podcast are ready!"
     }
     """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
-    
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
+    logger.info("📱 Push notification request", extra={"user_id": body.user_id})
     
+    return send_push_notification(
+        user_id=body.user_id,
+        title=body.title,
+        body=body.body
+    )
+
+def _process_single_user(user_id, presenter_name, language, voice_id):
+    """Process a single user update (run in the scheduler's thread pool)"""
     try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        user_id = data.get('user_id')
-        title = data.get('title', 'Notification')
-        body = data.get('body', 'You have a new update')
-        
-        # Validate required parameters
-        if not user_id:
-            raise ValueError("Missing user_id")
+        logger.info("🔄 Processing user %s in parallel", user_id)
         
-        logger.info(f"📱 Push notification request for user: {user_id}")
-        
-        # Call the main function
-        result = send_push_notification(
+        # Call the existing update function
+        result = update(
             user_id=user_id,
-            title=title,
-            body=body
-        )
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(
-            json.dumps(result),
-            headers=headers,
-            status=200 if result.get("success") else 500
+            presenter_name=presenter_name,
+            language=language,
+            voice_id=voice_id
         )
         
+        if result.get("success"):
+            logger.info("✅ Successfully processed user %s", user_id)
+            return {"success": True, "user_id": user_id}
+        else:
+            logger.error("❌ Failed to process user %s: %s", user_id, result.get('error'))
+            return {"success": False, "user_id": user_id, "error": result.get('error')}
+            
     except Exception as e:
-        logger.error(f"Error in send_push_notification_endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while sending push notification",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
+        logger.error("❌ Error processing user %s: %s", user_id, e)
+        return {"success": False, "user_id": user_id, "error": str(e)}
 
-@scheduler_fn.on_schedule(schedule="*/15 * * * *", timeout_sec=540, memory=options.MemoryOption.MB_512)  
+@scheduler_fn.on_schedule(schedule="*/15 * * * *", timeout_sec=540, memory=options.MemoryOption.GB_2)  # Runs up to 5 update() pipelines at once
 def scheduled_user_updates_parallel(req):
     """
     READY-TO-DEPLOY parallel scheduler that processes multiple users concurrently.
     This replaces the original sequential scheduler with parallel processing.
-    NO ADDITIONAL SETUP REQUIRED - WORKS IMMEDIATELY!
+    
+    When PROCESS_USER_UPDATE_URL and TASKS_SERVICE_ACCOUNT are set, each
+    triggered user is enqueued as a Cloud Tasks task for process_user_update
+    (see modules.scheduling.cloud_tasks); otherwise the updates run here, 5 at
+    a time. NO ADDITIONAL SETUP REQUIRED for the latter - WORKS IMMEDIATELY!
     """
+    executor = None
     try:
         logger.info("⏰ Starting parallel user updates (READY TO DEPLOY VERSION)")
         
+        # One wall-clock read for the trigger checks and timestamps; durations
+        # and the deadline use the monotonic clock
         current_time = datetime.now()
-        db = firestore.client()
-        
-        # Get all users who need updates
-        users_to_update = []
-        scheduling_ref = db.collection('scheduling_preferences')
-        all_schedules = scheduling_ref.stream()
+        started = time.monotonic()
+        run_timestamp = current_time.isoformat()
+        
+        # Preferred path: one Cloud Tasks task per user, each running in its own
+        # process_user_update invocation, so this run returns within seconds.
+        # Otherwise the updates run here, in the instance's thread pool.
+        dispatch_to_tasks = cloud_tasks_enabled()
+        if not dispatch_to_tasks:
+            executor = ThreadPoolExecutor(max_workers=SCHEDULER_MAX_CONCURRENT_UPDATES, thread_name_prefix='user_update')
+        
+        # Triggered users are dispatched as soon as their document is read, while
+        # later batches are still being fetched; only their id and the update
+        # fields are kept, not the scheduling document
+        triggered_user_ids = []
+        futures = {}
+        enqueued_user_ids = []
+        failed_user_ids = []
+        # Only the fields the trigger check and the update itself need are
+        # transferred, not the whole scheduling document of every user. The scan
+        # goes through the REST API, 300 documents per page: a cold instance
+        # doesn't wait for a gRPC channel before it can start dispatching.
         total_users_checked = 0
         
-        for doc in all_schedules:
+        for doc in list_documents_rest('scheduling_preferences', SCHEDULING_TRIGGER_FIELDS + SCHEDULING_UPDATE_FIELDS):
             total_users_checked += 1
             user_id = doc.id
+            
+            cached = _NEXT_ELIGIBLE.get(user_id)
+            if cached and cached[0] == doc.update_time and cached[1] > current_time:
+                continue
+            
             scheduling_prefs = doc.to_dict()
             
-            logger.info(f"🔍 Checking user {user_id}: {scheduling_prefs}")
+            # %-style arguments: the dict is only formatted if INFO is enabled
+            logger.info("🔍 Checking user %s: %s", user_id, scheduling_prefs)
             
             # Check if this user should get an update
-            if should_trigger_update_for_user(user_id, scheduling_prefs, current_time):
-                users_to_update.append({
-                    'user_id': user_id,
-                    'preferences': scheduling_prefs
-                })
-                logger.info(f"📋 Added user {user_id} to parallel update queue")
+            if not should_trigger_update_for_user(user_id, scheduling_prefs, current_time):
+                _NEXT_ELIGIBLE[user_id] = (doc.update_time, next_update_time_for_user(scheduling_prefs, current_time))
+                continue
+            
+            _NEXT_ELIGIBLE.pop(user_id, None)
+            triggered_user_ids.append(user_id)
+            update_args = (
+                user_id,
+                scheduling_prefs.get("presenter_name", "Alex"),
+                scheduling_prefs.get("language", "en"),
+                scheduling_prefs.get("voice_id", "96c64eb5-a945-448f-9710-980abe7a514c")
+            )
+            
+            if dispatch_to_tasks:
+                try:
+                    enqueue_user_update(*update_args, scheduled_time=run_timestamp)
+                    enqueued_user_ids.append(user_id)
+                    logger.info("📋 Enqueued update for user %s", user_id)
+                except Exception as e:
+                    logger.error("❌ Failed to enqueue update for user %s: %s", user_id, e)
+                    failed_user_ids.append(user_id)
+            else:
+                futures[executor.submit(_process_single_user, *update_args)] = user_id
+                logger.info("📋 Added user %s to parallel update queue", user_id)
         
-        if not users_to_update:
+        if not triggered_user_ids:
             summary = {
                 "success": True,
-                "timestamp": current_time.isoformat(),
+                "timestamp": run_timestamp,
                 "total_users_checked": total_users_checked,
                 "users_triggered": 0,
                 "message": "No users need updates"
             }
-            logger.info(f"✅ No updates needed: {summary}")
+            logger.info("✅ No updates needed: %s", summary)
+            return summary
+        
+        if dispatch_to_tasks:
+            summary = {
+                "success": True,
+                "timestamp": run_timestamp,
+                "dispatch": "cloud_tasks",
+                "total_users_checked": total_users_checked,
+                "users_triggered": len(triggered_user_ids),
+                "enqueued_updates": len(enqueued_user_ids),
+                "failed_enqueues": len(failed_user_ids),
+                "processing_time_seconds": time.monotonic() - started,
+                "triggered_user_ids": enqueued_user_ids,
+                "failed_user_ids": failed_user_ids
+            }
+            logger.info("✅ Updates dispatched: %s", summary)
             return summary
         
-        logger.info(f"📊 Found {len(users_to_update)} users needing updates - processing in parallel")
+        logger.info("📊 %d users needing updates - processing in parallel", len(triggered_user_ids))
         
-        # Process users in parallel using ThreadPoolExecutor
-        max_concurrent = min(5, len(users_to_update))  # Max 5 concurrent to avoid overwhelming
+        max_concurrent = min(SCHEDULER_MAX_CONCURRENT_UPDATES, len(triggered_user_ids))  # Max 5 concurrent to avoid overwhelming
         successful_updates = 0
         failed_updates = 0
-        
-        def process_single_user(user_info):
-            """Process a single user update"""
-            try:
-                user_id = user_info['user_id']
-                prefs = user_info['preferences']
-                
-                logger.info(f"🔄 Processing user {user_id} in parallel")
-                
-                # Call the existing update function
-                result = update(
-                    user_id=user_id,
-                    presenter_name=prefs.get("presenter_name", "Alex"),
-                    language=prefs.get("language", "en"),
-                    voice_id=prefs.get("voice_id", "96c64eb5-a945-448f-9710-980abe7a514c")
-                )
-                
-                if result.get("success"):
-                    logger.info(f"✅ Successfully processed user {user_id}")
-                    return {"success": True, "user_id": user_id}
-                else:
-                    logger.error(f"❌ Failed to process user {user_id}: {result.get('error')}")
-                    return {"success": False, "user_id": user_id, "error": result.get('error')}
-                    
-            except Exception as e:
-                logger.error(f"❌ Error processing user {user_info.get('user_id')}: {e}")
-                return {"success": False, "user_id": user_info.get('user_id'), "error": str(e)}
-        
-        # Use ThreadPoolExecutor for parallel processing
-        with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
-            # Submit all user updates
-            futures = []
-            for user_info in users_to_update:
-                future = executor.submit(process_single_user, user_info)
-                futures.append(future)
-            
-            # Collect results as they complete
-            for i, future in enumerate(futures):
+        deadline = started + SCHEDULER_DEADLINE_SECONDS
+        
+        # Collect results as they complete, whatever the submission order
+        completed = 0
+        deferred_user_ids = []
+        unfinished_user_ids = []
+        try:
+            for future in as_completed(futures, timeout=deadline - time.monotonic()):
+                completed += 1
                 try:
-                    result = future.result(timeout=480)  # 8 min timeout per user (within scheduler limit)
+                    result = future.result()
                     if result.get("success"):
                         successful_updates += 1
                     else:
                         failed_updates += 1
                     
-                    logger.info(f"📊 Completed {i+1}/{len(futures)} users: {result.get('user_id')}")
+                    logger.info("📊 Completed %d/%d users: %s", completed, len(futures), result.get('user_id'))
                     
                 except Exception as e:
-                    logger.error(f"❌ User update {i+1} failed with exception: {e}")
+                    logger.error("❌ User update %d failed with exception: %s", completed, e)
                     failed_updates += 1
+        except FuturesTimeoutError:
+            # Deadline reached: updates that have not started are dropped and
+            # reported as deferred. Running ones cannot be interrupted: they
+            # finish on this run's own threads and are counted as failed here.
+            for future, user_id in futures.items():
+                if future.cancel():
+                    deferred_user_ids.append(user_id)
+                elif not future.done():
+                    unfinished_user_ids.append(user_id)
+            failed_updates += len(deferred_user_ids) + len(unfinished_user_ids)
+            logger.error("⏱️ Scheduler deadline reached after %d/%d users (deferred: %s, still running: %s)",
+                         completed, len(futures), deferred_user_ids, unfinished_user_ids)
         
         # Return summary
         summary = {
             "success": True,
-            "timestamp": current_time.isoformat(),
+            "timestamp": run_timestamp,
             "total_users_checked": total_users_checked,
-            "users_triggered": len(users_to_update),
+            "users_triggered": len(triggered_user_ids),
             "successful_updates": successful_updates,
             "failed_updates": failed_updates,
             "max_concurrent": max_concurrent,
-            "processing_time_seconds": (datetime.now() - current_time).total_seconds(),
-            "triggered_user_ids": [u['user_id'] for u in users_to_update]
+            "processing_time_seconds": time.monotonic() - started,
+            "triggered_user_ids": triggered_user_ids,
+            "deferred_user_ids": deferred_user_ids,
+            "unfinished_user_ids": unfinished_user_ids
         }
         
-        logger.info(f"✅ Parallel updates complete: {summary}")
+        logger.info("✅ Parallel updates complete: %s", summary)
         return summary
         
     except Exception as e:
-        logger.error(f"❌ Error in parallel user updates: {e}")
+        logger.error("❌ Error in parallel user updates: %s", e)
         return {
             "success": False,
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }
+    finally:
+        if executor is not None:
+            # Don't wait for updates past the deadline; queued ones are cancelled
+            executor.shutdown(wait=False, cancel_futures=True)
 
-@https_fn.on_request(timeout_sec=900, memory=options.MemoryOption.MB_512)
-def process_user_update(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(timeout_sec=900, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(schema=UserUpdateRequest)
+def process_user_update(body, req):
     """
     Worker function that processes individual user updates from the Cloud Tasks queue.
     This allows parallel processing of multiple users.
-    """
-    try:
-        data = req.get_json()
-        if not data:
-            return https_fn.Response("No data provided", status=400)
-        
-        user_id = data.get('user_id')
-        presenter_name = data.get('presenter_name', 'Alex')
-        language = data.get('language', 'en')
-        voice_id = data.get('voice_id', '96c64eb5-a945-448f-9710-980abe7a514c')
-        scheduled_time = data.get('scheduled_time')
-        
-        logger.info(f"🔄 Processing queued update for user {user_id} (scheduled: {scheduled_time})")
-        
-        # Call the existing update function
-        result = update(
-            user_id=user_id,
-            presenter_name=presenter_name,
-            language=language,
-            voice_id=voice_id
-        )
-        
-        if result.get("success"):
-            logger.info(f"✅ Successfully processed user {user_id}")
-        else:
-            logger.error(f"❌ Failed to process user {user_id}: {result.get('error')}")
-        
-        return https_fn.Response(
-            json.dumps(result),
-            status=200 if result.get("success") else 500,
-            headers={"Content-Type": "application/json"}
-        )
-        
-    except Exception as e:
-        logger.error(f"❌ Error processing user update: {e}")
-        return https_fn.Response(
-            json.dumps({"success": False, "error": str(e)}),
-            status=500,
-            headers={"Content-Type": "application/json"}
-        )
     
-@https_fn.on_request(timeout_sec=900, memory=options.MemoryOption.MB_512)  # 15 minutes timeout, increased memory
-def update_endpoint(req: https_fn.Request) -> https_fn.Response:
+    Only requests signed by Cloud Tasks with TASKS_SERVICE_ACCOUNT's OIDC
+    token are accepted; anything else gets a 403.
+    """
+    if not is_cloud_tasks_request(req, PROCESS_USER_UPDATE_URL):
+        return json_bytes_response(_FORBIDDEN_BODY, status=403, req=req)
+    
+    user_id = body.user_id
+    logger.info("🔄 Processing queued update for user %s (scheduled: %s)", user_id, body.scheduled_time)
+    
+    # Call the existing update function
+    result = update(
+        user_id=user_id,
+        presenter_name=body.presenter_name,
+        language=body.language,
+        voice_id=body.voice_id
+    )
+    
+    if result.get("success"):
+        logger.info("✅ Successfully processed user %s", user_id)
+    else:
+        logger.error("❌ Failed to process user %s: %s", user_id, result.get('error'))
+    
+    return result
+    
+@https_fn.on_request(**WARM_ENDPOINT_OPTIONS, timeout_sec=900)  # 15 minutes timeout
+@json_post_endpoint(schema=UserUpdateRequest, error_message="An error occurred while running update pipeline")
+def update_endpoint(body, req):
     """
     HTTP endpoint to run complete user update pipeline.
     
@@ -2898,79 +1763,21 @@ def update_endpoint(req: https_fn.Request) -> https_fn.Response:
         }
     }
     """
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
-    
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
-    
-    try:
-        # Parse request data
-        data = req.get_json()
-        if not data:
-            raise ValueError("No JSON data provided")
-        
-        user_id = data.get('user_id')
-        presenter_name = data.get('presenter_name', 'Alex')
-        language = data.get('language', 'en')
-        voice_id = data.get('voice_id', '96c64eb5-a945-448f-9710-980abe7a514c')
-        
-        # Validate required parameters
-        if not user_id:
-            raise ValueError("Missing user_id")
-        
-        logger.info(f"Starting complete update pipeline for user: {user_id}")
-        
-        # Call the main function
-        result = update(
-            user_id=user_id,
-            presenter_name=presenter_name,
-            language=language,
-            voice_id=voice_id
-        )
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(
-            json.dumps(result),
-            headers=headers,
-            status=200 if result.get("success") else 500
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in update_endpoint: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        error_response = {
-            "success": False,
-            "error": str(e),
-            "message": "An error occurred while running update pipeline",
-            "timestamp": datetime.now().isoformat()
-        }
-        return https_fn.Response(json.dumps(error_response), headers=headers, status=500)
-
-@https_fn.on_request(timeout_sec=60)
-def start_interactive_test(req: https_fn.Request) -> https_fn.Response:
+    logger.info("Starting complete update pipeline", extra={"user_id": body.user_id})
+    
+    # The pipeline runs to completion in the request, independent of the client
+    # connection, and the response is buffered: a failed stage is reported with
+    # a 500, which callers and retries rely on.
+    return update(
+        user_id=body.user_id,
+        presenter_name=body.presenter_name,
+        language=body.language,
+        voice_id=body.voice_id
+    )
+
+@https_fn.on_request(**WARM_ENDPOINT_OPTIONS, timeout_sec=60)
+@json_post_endpoint(schema=TestSessionRequest)
+def start_interactive_test(body, req):
     """
     Start a simple interactive podcast test session.
     
@@ -2987,56 +1794,16 @@ def start_interactive_test(req: https_fn.Request) -> https_fn.Response:
         "sample_questions": [...]
     }
     """
-    # Handle CORS
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
+    logger.info("🧪 Starting interactive test", extra={"user_id": body.user_id})
     
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
-    
-    try:
-        data = req.get_json() or {}
-        user_id = data.get('user_id', 'test_user')
-        
-        logger.info(f"🧪 Starting interactive test for user: {user_id}")
-        
-        result = interactive_test.create_test_session(user_id)
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(json.dumps(result), headers=headers)
-        
-    except Exception as e:
-        logger.error(f"Error starting interactive test: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": str(e)}),
-            headers=headers,
-            status=500
-        )
+    # Imported on first use: the test module builds its session store at import
+    # and only these three endpoints need it
+    from modules.content.simple_interactive_test import interactive_test
+    return interactive_test.create_test_session(body.user_id)
 
-@https_fn.on_request(timeout_sec=120)
-def generate_test_audio(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(timeout_sec=120, memory=FIRESTORE_ENDPOINT_MEMORY)
+@json_post_endpoint(schema=TestAudioRequest)
+def generate_test_audio(body, req):
     """
     Generate audio for the test podcast.
     
@@ -3053,60 +1820,14 @@ def generate_test_audio(req: https_fn.Request) -> https_fn.Response:
         "message": "Audio ready for testing!"
     }
     """
-    # Handle CORS
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
-    
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
+    logger.info("🔊 Generating test audio", extra={"session_id": body.session_id})
     
-    try:
-        data = req.get_json() or {}
-        session_id = data.get('session_id')
-        voice_id = data.get('voice_id', '96c64eb5-a945-448f-9710-980abe7a514c')
-        
-        if not session_id:
-            raise ValueError("Missing session_id")
-        
-        logger.info(f"🔊 Generating test audio for session: {session_id}")
-        
-        result = interactive_test.generate_podcast_audio(session_id, voice_id)
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(json.dumps(result), headers=headers)
-        
-    except Exception as e:
-        logger.error(f"Error generating test audio: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": str(e)}),
-            headers=headers,
-            status=500
-        )
+    from modules.content.simple_interactive_test import interactive_test
+    return interactive_test.generate_podcast_audio(body.session_id, body.voice_id)
 
-@https_fn.on_request(timeout_sec=90)
-def handle_test_interruption(req: https_fn.Request) -> https_fn.Response:
+@https_fn.on_request(**WARM_ENDPOINT_OPTIONS, timeout_sec=90)
+@json_post_endpoint(schema=TestInterruptionRequest)
+def handle_test_interruption(body, req):
     """
     Handle user interruption during test podcast.
     
@@ -3124,55 +1845,86 @@ def handle_test_interruption(req: https_fn.Request) -> https_fn.Response:
         "message": "Response ready!"
     }
     """
-    # Handle CORS
-    if req.method == 'OPTIONS':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Max-Age': '3600'
-        }
-        return https_fn.Response('', headers=headers)
-    
-    if req.method != 'POST':
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": "Method not allowed. Use POST."}),
-            headers=headers,
-            status=405
-        )
+    logger.info("🎤 Handling test interruption", extra={"session_id": body.session_id, "user_question": body.user_question})
+    
+    from modules.content.simple_interactive_test import interactive_test
+    return interactive_test.handle_interruption(body.session_id, body.user_question)
+
+
+# --- Single-function API router ---
+
+# Route name -> endpoint. Each endpoint stays deployed on its own URL; `api`
+# serves all of them from one function (POST <api-url>/<route>), so a single
+# warm instance, with its imports and connection pools, answers every route.
+API_ROUTES = {
+    "trending_for_subtopic": get_trending_for_subtopic,
+    "trending_subtopics": get_trending_subtopics,
+    "user_preferences": get_user_preferences,
+    "articles_subtopics_user": get_articles_subtopics_user_endpoint,
+    "topic_posts": get_topic_posts_endpoint,
+    "pickup_line": get_pickup_line_endpoint,
+    "topic_summary": get_topic_summary_endpoint,
+    "reddit_world_summary": get_reddit_world_summary_endpoint,
+    "complete_topic_report": get_complete_topic_report_endpoint,
+    "user_articles": get_user_articles_endpoint,
+    "aifeed_reports": get_aifeed_reports_endpoint,
+    "job_status": get_job_status_endpoint,
+    "media_twin_script": generate_media_twin_script_endpoint,
+    "user_media_twin_script": generate_user_media_twin_script_endpoint,
+    "simple_podcast": generate_simple_podcast_endpoint,
+}
+
+_UNKNOWN_ROUTE_BODY = dumps({"success": False, "error": "Unknown route", "routes": sorted(API_ROUTES)})
+
+# Client operations that don't fit api's 300s timeout (update pipeline, article
+# refresh, complete report and script) and the notification/test endpoints,
+# served by client_api under POST <client_api-url>/<operation>. The Cloud Tasks worker (process_user_update)
+# is not routed here: it is only reachable on its own URL, by Cloud Tasks.
+CLIENT_API_ROUTES = {
+    "push": send_push_notification_endpoint,
+    "update": update_endpoint,
+    "refresh_articles": refresh_articles_endpoint,
+    "complete_report": get_complete_report_endpoint,
+    "complete_user_media_twin_script": generate_complete_user_media_twin_script_endpoint,
+    "test/start": start_interactive_test,
+    "test/audio": generate_test_audio,
+    "test/interrupt": handle_test_interruption,
+}
+
+_UNKNOWN_CLIENT_OPERATION_BODY = dumps({"success": False, "error": "Unknown operation", "routes": sorted(CLIENT_API_ROUTES)})
+
+
+def _dispatch_route(req, routes, route, unknown_body):
+    """Call the endpoint registered for route, or answer 404 (after the usual method checks)."""
+    endpoint = routes.get(route)
+    if endpoint is None:
+        method_response = reject_unsupported_method(req)
+        if method_response is not None:
+            return method_response
+        return json_bytes_response(unknown_body, status=404, req=req)
+    return endpoint(req)
+
+
+@https_fn.on_request(**WARM_ENDPOINT_OPTIONS, timeout_sec=300)
+def api(req: https_fn.Request) -> https_fn.Response:
+    """
+    Dispatch POST /<route> to the matching endpoint of API_ROUTES.
     
-    try:
-        data = req.get_json() or {}
-        session_id = data.get('session_id')
-        user_question = data.get('user_question')
-        
-        if not session_id or not user_question:
-            raise ValueError("Missing session_id or user_question")
-        
-        logger.info(f"🎤 Handling test interruption: {session_id} - '{user_question}'")
-        
-        result = interactive_test.handle_interruption(session_id, user_question)
-        
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        
-        return https_fn.Response(json.dumps(result), headers=headers)
-        
-    except Exception as e:
-        logger.error(f"Error handling test interruption: {e}")
-        headers = {
-            'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
-        }
-        return https_fn.Response(
-            json.dumps({"success": False, "error": str(e)}),
-            headers=headers,
-            status=500
-        )
+    The endpoint handles CORS, the method check, body validation and the
+    response exactly as when called on its own URL.
+    """
+    route = req.path.strip('/').rsplit('/', 1)[-1]
+    return _dispatch_route(req, API_ROUTES, route, _UNKNOWN_ROUTE_BODY)
+
 
+@https_fn.on_request(**WARM_ENDPOINT_OPTIONS, timeout_sec=900)
+def client_api(req: https_fn.Request) -> https_fn.Response:
+    """
+    Dispatch POST /<operation> (e.g. /push, /update, /test/start) to the
+    matching endpoint of CLIENT_API_ROUTES.
+    
+    Like api, this lets the low-traffic client endpoints share one set of warm
+    instances instead of each paying its own cold start.
+    """
+    operation = req.path.strip('/')
+    return _dispatch_route(req, CLIENT_API_ROUTES, operation, _UNKNOWN_CLIENT_OPERATION_BODY)
@@ -14,25 +14,150 @@ logger = logging.getLogger(__name__)
 # Welcome to Cloud Functions for Firebase for Python!
 # Implementation of the Prysm backend for news aggregation
 
-import openai
+import functools
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-import json
+import orjson
+from cachetools import TTLCache
 
 from modules.database.operations import update_specific_subjects_in_db
 from modules.config import get_openai_key
 
 
+# One client per instance: its httpx pool keeps the TLS connections to the API
+# open between calls and across invocations served by a warm instance. The pool
+# is also the instance-wide cap on concurrent LLM requests: calls beyond
+# OPENAI_MAX_CONNECTIONS wait for a free connection (no pool timeout) instead of
+# failing with PoolTimeout and falling back to placeholder text.
+OPENAI_MAX_CONNECTIONS = 50
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = 20
+_OPENAI_CLIENT = None
+_OPENAI_CLIENT_LOCK = threading.Lock()
+
+
 def get_openai_client():
-    """Get configured OpenAI client."""
+    """Get the shared OpenAI client, creating it on first use."""
+    global _OPENAI_CLIENT
+    if _OPENAI_CLIENT is not None:
+        return _OPENAI_CLIENT
     try:
-        api_key = get_openai_key()
-        client = openai.OpenAI(api_key=api_key, timeout=30.0)
-        logger.info("OpenAI client initialized successfully")
-        return client
+        with _OPENAI_CLIENT_LOCK:
+            if _OPENAI_CLIENT is None:
+                # Imported on first use: the SDK is slow to import and many endpoints never call it
+                import httpx
+                import openai
+                
+                _OPENAI_CLIENT = openai.OpenAI(
+                    api_key=get_openai_key(),
+                    timeout=httpx.Timeout(30.0, pool=None),
+                    http_client=openai.DefaultHttpxClient(
+                        limits=httpx.Limits(
+                            max_connections=OPENAI_MAX_CONNECTIONS,
+                            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS
+                        )
+                    )
+                )
+                logger.info("OpenAI client initialized successfully")
+        return _OPENAI_CLIENT
     except Exception as e:
         logger.error(f"Failed to initialize OpenAI client: {e}")
         return None
 
+# Worker threads for the blocking OpenAI/Firestore calls made alongside a
+# conversation turn. The pool lives as long as the instance; asyncio.to_thread
+# would use the default executor of each request's short-lived event loop and
+# start fresh threads for every message. Sized for the endpoints' concurrency.
+AI_WORKER_THREADS = 20
+_AI_POOL = ThreadPoolExecutor(max_workers=AI_WORKER_THREADS, thread_name_prefix='ai_worker')
+
+# Completions keyed by a hash of the exact request (model, parameters, messages).
+# Onboarding conversations often open with the same prompt and first message
+# for users with the same topics and language; a repeat is answered from memory
+# instead of a multi-second API call. Near-duplicates are not matched: reusing
+# a reply to a different conversation would be wrong more often than it helps.
+COMPLETION_CACHE_TTL = 3600
+_COMPLETION_CACHE = TTLCache(maxsize=2048, ttl=COMPLETION_CACHE_TTL)
+_COMPLETION_CACHE_LOCK = threading.Lock()
+
+
+def _completion_cache_key(messages, model, max_tokens, temperature):
+    return hashlib.sha256(orjson.dumps(
+        [model, max_tokens, temperature, messages], option=orjson.OPT_SORT_KEYS
+    )).hexdigest()
+
+
+# OpenAI only caches prompt prefixes from this many tokens on
+OPENAI_PROMPT_CACHE_MIN_TOKENS = 1024
+
+
+def _log_prompt_cache_usage(response):
+    """Log how many prompt tokens OpenAI served from its prefix cache."""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached_tokens = getattr(details, 'cached_tokens', 0) or 0
+    logger.info(
+        "OpenAI prompt tokens: %s (cached: %s, cache-eligible: %s)",
+        usage.prompt_tokens, cached_tokens, usage.prompt_tokens >= OPENAI_PROMPT_CACHE_MIN_TOKENS
+    )
+
+
+def cached_chat_completion(client, messages, model, max_tokens, temperature):
+    """
+    Text of a chat completion, from the in-memory cache when the exact same
+    request was answered recently.
+
+    Args:
+        client: OpenAI client
+        messages (list): Chat messages
+        model (str): Model name
+        max_tokens (int): Completion token limit
+        temperature (float): Sampling temperature
+
+    Returns:
+        str: Stripped completion text
+    """
+    key = _completion_cache_key(messages, model, max_tokens, temperature)
+    with _COMPLETION_CACHE_LOCK:
+        cached = _COMPLETION_CACHE.get(key)
+    if cached is not None:
+        logger.info("✅ OpenAI response served from cache")
+        return cached
+
+    response = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature
+    )
+    _log_prompt_cache_usage(response)
+    content = response.choices[0].message.content.strip()
+    with _COMPLETION_CACHE_LOCK:
+        _COMPLETION_CACHE[key] = content
+    return content
+
+
+# Settings of the onboarding conversation replies, shared by the buffered and
+# streamed paths (and so by their cache entries). No stop sequences: the
+# messages are role-structured, and a reply may quote "User:" or contain blank
+# lines without being cut short.
+CONVERSATION_MODEL = "gpt-4"
+CONVERSATION_MAX_TOKENS = 1500
+CONVERSATION_TEMPERATURE = 0.7
+
+
+def build_conversation_messages(system_prompt, conversation_history, user_message):
+    """Chat messages for a conversation turn: system prompt, history, then the new user message."""
+    messages = [{"role": "system", "content": system_prompt}]
+    if conversation_history:
+        messages.extend(conversation_history)
+    messages.append({"role": "user", "content": user_message})
+    return messages
+
+
 def generate_ai_response(system_prompt, conversation_history, user_message):
     """
     Generate AI response using OpenAI GPT.
@@ -50,26 +175,17 @@ def generate_ai_response(system_prompt, conversation_history, user_message):
         if not client:
             return "❌ OpenAI client initialization failed"
         
-        # Build messages array
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        # Add conversation history
-        if conversation_history:
-            messages.extend(conversation_history)
-        
-        # Add current user message
-        messages.append({"role": "user", "content": user_message})
+        messages = build_conversation_messages(system_prompt, conversation_history, user_message)
         
         logger.info(f"🤖 Making OpenAI request with {len(messages)} messages")
         
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=messages,
-            max_tokens=1500,
-            temperature=0.7
+        ai_response = cached_chat_completion(
+            client,
+            messages,
+            model=CONVERSATION_MODEL,
+            max_tokens=CONVERSATION_MAX_TOKENS,
+            temperature=CONVERSATION_TEMPERATURE
         )
-        
-        ai_response = response.choices[0].message.content.strip()
         logger.info(f"✅ OpenAI response generated: {len(ai_response)} characters")
         
         return ai_response
@@ -78,7 +194,112 @@ def generate_ai_response(system_prompt, conversation_history, user_message):
         logger.error(f"❌ Error generating AI response: {e}")
         return f"❌ Une erreur s'est produite lors de la génération de la réponse: {str(e)}"
 
-    
+
+def stream_ai_response(system_prompt, conversation_history, user_message):
+    """
+    Streaming variant of generate_ai_response: yields the reply text piece by
+    piece as OpenAI generates it, so the first words reach the client long
+    before the full reply is done.
+
+    Uses the same messages and settings as generate_ai_response and shares its
+    cache: a cached reply is yielded in one piece, and a streamed reply is
+    cached once complete.
+
+    Yields:
+        str: Text fragments of the reply
+
+    Raises:
+        RuntimeError: If the OpenAI client cannot be initialized
+    """
+    client = get_openai_client()
+    if not client:
+        raise RuntimeError("OpenAI client initialization failed")
+
+    messages = build_conversation_messages(system_prompt, conversation_history, user_message)
+    key = _completion_cache_key(
+        messages, CONVERSATION_MODEL, CONVERSATION_MAX_TOKENS, CONVERSATION_TEMPERATURE
+    )
+    with _COMPLETION_CACHE_LOCK:
+        cached = _COMPLETION_CACHE.get(key)
+    if cached is not None:
+        logger.info("✅ OpenAI response served from cache")
+        yield cached
+        return
+
+    logger.info(f"🤖 Streaming OpenAI request with {len(messages)} messages")
+    stream = client.chat.completions.create(
+        model=CONVERSATION_MODEL,
+        messages=messages,
+        max_tokens=CONVERSATION_MAX_TOKENS,
+        temperature=CONVERSATION_TEMPERATURE,
+        stream=True
+    )
+    parts = []
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            yield delta
+
+    content = "".join(parts).strip()
+    if content:
+        with _COMPLETION_CACHE_LOCK:
+            _COMPLETION_CACHE[key] = content
+    logger.info(f"✅ OpenAI response streamed: {len(content)} characters")
+
+
+# Discovery-assistant prompt texts by language ('detail_intro' is completed
+# with the detail level)
+SYSTEM_PROMPT_TEXTS = {
+    'en': {
+        'role': "You are a preferences discovery assistant for PrysmIOS app.",
+        'task': "Your ONLY goal is to discover the user's specific news interests and preferences. DO NOT provide news articles or current events. Keep responses SHORT (max 3-4 sentences).",
+        'guide': "Ask questions to understand what specific topics, companies, people, or events they want to follow. Be proactive in discovering their interests.",
+        'subjects_intro': "User selected:",
+        'subtopics_intro': "Subtopics:",
+        'detail_intro': "Detail level: {detail_level}.",
+        'refinement_task': "Ask about specific entities they want to follow from their topics. Examples: 'Which tech companies interest you?' or 'Any specific sports teams you follow?'",
+        'guidelines': "DISCOVER PREFERENCES, DON'T GIVE NEWS! Examples: Technology → Ask 'Which tech companies like Apple, Tesla, or OpenAI interest you?' Sports → Ask 'Do you follow specific teams like Lakers or players like Messi?'",
+        'conversation_flow': "When you have enough specific interests, say: 'Perfect! I've learned about your interests. Your personalized news feed is ready!'"
+    },
+    'fr': {
+        'role': "Tu es un assistant de découverte de préférences pour l'application PrysmIOS.",
+        'task': "Ton SEUL objectif est de découvrir les intérêts et préférences spécifiques de l'utilisateur. NE DONNE PAS d'articles d'actualités ou d'événements actuels. Reste BREF (max 3-4 phrases).",
+        'guide': "Pose des questions pour comprendre quels sujets spécifiques, entreprises, personnes ou événements ils veulent suivre. Sois proactif dans la découverte de leurs intérêts.",
+        'subjects_intro': "Utilisateur a choisi :",
+        'subtopics_intro': "Sous-sujets :",
+        'detail_intro': "Niveau de détail : {detail_level}.",
+        'refinement_task': "Demande quelles entités spécifiques ils veulent suivre dans leurs sujets. Exemples : 'Quelles entreprises tech t'intéressent ?' ou 'Tu suis des équipes sportives particulières ?'",
+        'guidelines': "DÉCOUVRE LES PRÉFÉRENCES, NE DONNE PAS D'ACTUALITÉS ! Exemples : Technologie → Demande 'Quelles entreprises comme Apple, Tesla ou OpenAI t'intéressent ?' Sport → Demande 'Tu suis des équipes comme Real Madrid ou des joueurs comme Messi ?'",
+        'conversation_flow': "Quand tu as assez d'intérêts spécifiques, dis : 'Parfait ! J'ai appris tes intérêts. Ton flux d'actualités personnalisé est prêt !'"
+    },
+    'es': {
+        'role': "Eres un asistente de descubrimiento de preferencias para la aplicación PrysmIOS.",
+        'task': "Tu ÚNICO objetivo es descubrir los intereses y preferencias específicos del usuario. NO proporciones artículos de noticias o eventos actuales. Mantente BREVE (máx 3-4 frases).",
+        'guide': "Haz preguntas para entender qué temas específicos, empresas, personas o eventos quieren seguir. Sé proactivo en descubrir sus intereses.",
+        'subjects_intro': "Usuario eligió:",
+        'subtopics_intro': "Subtemas:",
+        'detail_intro': "Nivel de detalle: {detail_level}.",
+        'refinement_task': "Pregunta qué entidades específicas quieren seguir de sus temas. Ejemplos: '¿Qué empresas tecnológicas te interesan?' o '¿Sigues equipos deportivos específicos?'",
+        'guidelines': "¡DESCUBRE PREFERENCIAS, NO DES NOTICIAS! Ejemplos: Tecnología → Pregunta '¿Qué empresas como Apple, Tesla u OpenAI te interesan?' Deportes → Pregunta '¿Sigues equipos como Real Madrid o jugadores como Messi?'",
+        'conversation_flow': "Cuando tengas suficientes intereses específicos, di: '¡Perfecto! He aprendido sobre tus intereses. ¡Tu feed de noticias personalizado está listo!'"
+    },
+    'ar': {
+        'role': "أنت مساعد اكتشاف التفضيلات لتطبيق PrysmIOS.",
+        'task': "هدفك الوحيد هو اكتشاف اهتمامات وتفضيلات المستخدم المحددة. لا تقدم مقالات إخبارية أو أحداث جارية. كن مختصراً (حد أقصى 3-4 جمل).",
+        'guide': "اطرح أسئلة لفهم المواضيع المحددة والشركات والأشخاص أو الأحداث التي يريدون متابعتها. كن استباقياً في اكتشاف اهتماماتهم.",
+        'subjects_intro': "المستخدم اختار:",
+        'subtopics_intro': "المواضيع الفرعية:",
+        'detail_intro': "مستوى التفصيل: {detail_level}.",
+        'refinement_task': "اسأل عن الكيانات المحددة التي يريدون متابعتها من مواضيعهم. أمثلة: 'ما الشركات التقنية التي تهمك؟' أو 'هل تتابع فرق رياضية معينة؟'",
+        'guidelines': "اكتشف التفضيلات، لا تعطِ أخباراً! أمثلة: التكنولوجيا → اسأل 'ما الشركات مثل آبل أو تسلا أو OpenAI التي تهمك؟' الرياضة → اسأل 'هل تتابع فرق مثل ريال مدريد أو لاعبين مثل ميسي؟'",
+        'conversation_flow': "عندما تحصل على اهتمامات محددة كافية، قل: 'ممتاز! لقد تعلمت عن اهتماماتك. تدفق أخبارك الشخصي جاهز!'"
+    }
+}
+
+
 def build_system_prompt(user_preferences):
     """
     Build the system prompt based on user preferences.
@@ -89,88 +310,55 @@ def build_system_prompt(user_preferences):
     Returns:
         str: Complete system prompt for the AI
     """
-    subjects = user_preferences.get('subjects', [])
-    subtopics = user_preferences.get('subtopics', [])
-    specific_subjects = user_preferences.get('specific_subjects', [])
-    detail_level = user_preferences.get('detail_level', 'Medium')
-    language = user_preferences.get('language', 'en')
-    
-    # Language-specific prompts
-    language_prompts = {
-        'en': {
-            'role': "You are a preferences discovery assistant for PrysmIOS app.",
-            'task': "Your ONLY goal is to discover the user's specific news interests and preferences. DO NOT provide news articles or current events. Keep responses SHORT (max 3-4 sentences).",
-            'guide': "Ask questions to understand what specific topics, companies, people, or events they want to follow. Be proactive in discovering their interests.",
-            'subjects_intro': "User selected:",
-            'subtopics_intro': "Subtopics:",
-            'detail_intro': f"Detail level: {detail_level.lower()}.",
-            'refinement_task': "Ask about specific entities they want to follow from their topics. Examples: 'Which tech companies interest you?' or 'Any specific sports teams you follow?'",
-            'guidelines': "DISCOVER PREFERENCES, DON'T GIVE NEWS! Examples: Technology → Ask 'Which tech companies like Apple, Tesla, or OpenAI interest you?' Sports → Ask 'Do you follow specific teams like Lakers or players like Messi?'",
-            'conversation_flow': "When you have enough specific interests, say: 'Perfect! I've learned about your interests. Your personalized news feed is ready!'"
-        },
-        'fr': {
-            'role': "Tu es un assistant de découverte de préférences pour l'application PrysmIOS.",
-            'task': "Ton SEUL objectif est de découvrir les intérêts et préférences spécifiques de l'utilisateur. NE DONNE PAS d'articles d'actualités ou d'événements actuels. Reste BREF (max 3-4 phrases).",
-            'guide': "Pose des questions pour comprendre quels sujets spécifiques, entreprises, personnes ou événements ils veulent suivre. Sois proactif dans la découverte de leurs intérêts.",
-            'subjects_intro': "Utilisateur a choisi :",
-            'subtopics_intro': "Sous-sujets :",
-            'detail_intro': f"Niveau de détail : {detail_level.lower()}.",
-            'refinement_task': "Demande quelles entités spécifiques ils veulent suivre dans leurs sujets. Exemples : 'Quelles entreprises tech t'intéressent ?' ou 'Tu suis des équipes sportives particulières ?'",
-            'guidelines': "DÉCOUVRE LES PRÉFÉRENCES, NE DONNE PAS D'ACTUALITÉS ! Exemples : Technologie → Demande 'Quelles entreprises comme Apple, Tesla ou OpenAI t'intéressent ?' Sport → Demande 'Tu suis des équipes comme Real Madrid ou des joueurs comme Messi ?'",
-            'conversation_flow': "Quand tu as assez d'intérêts spécifiques, dis : 'Parfait ! J'ai appris tes intérêts. Ton flux d'actualités personnalisé est prêt !'"
-        },
-        'es': {
-            'role': "Eres un asistente de descubrimiento de preferencias para la aplicación PrysmIOS.",
-            'task': "Tu ÚNICO objetivo es descubrir los intereses y preferencias específicos del usuario. NO proporciones artículos de noticias o eventos actuales. Mantente BREVE (máx 3-4 frases).",
-            'guide': "Haz preguntas para entender qué temas específicos, empresas, personas o eventos quieren seguir. Sé proactivo en descubrir sus intereses.",
-            'subjects_intro': "Usuario eligió:",
-            'subtopics_intro': "Subtemas:",
-            'detail_intro': f"Nivel de detalle: {detail_level.lower()}.",
-            'refinement_task': "Pregunta qué entidades específicas quieren seguir de sus temas. Ejemplos: '¿Qué empresas tecnológicas te interesan?' o '¿Sigues equipos deportivos específicos?'",
-            'guidelines': "¡DESCUBRE PREFERENCIAS, NO DES NOTICIAS! Ejemplos: Tecnología → Pregunta '¿Qué empresas como Apple, Tesla u OpenAI te interesan?' Deportes → Pregunta '¿Sigues equipos como Real Madrid o jugadores como Messi?'",
-            'conversation_flow': "Cuando tengas suficientes intereses específicos, di: '¡Perfecto! He aprendido sobre tus intereses. ¡Tu feed de noticias personalizado está listo!'"
-        },
-        'ar': {
-            'role': "أنت مساعد اكتشاف التفضيلات لتطبيق PrysmIOS.",
-            'task': "هدفك الوحيد هو اكتشاف اهتمامات وتفضيلات المستخدم المحددة. لا تقدم مقالات إخبارية أو أحداث جارية. كن مختصراً (حد أقصى 3-4 جمل).",
-            'guide': "اطرح أسئلة لفهم المواضيع المحددة والشركات والأشخاص أو الأحداث التي يريدون متابعتها. كن استباقياً في اكتشاف اهتماماتهم.",
-            'subjects_intro': "المستخدم اختار:",
-            'subtopics_intro': "المواضيع الفرعية:",
-            'detail_intro': f"مستوى التفصيل: {detail_level.lower()}.",
-            'refinement_task': "اسأل عن الكيانات المحددة التي يريدون متابعتها من مواضيعهم. أمثلة: 'ما الشركات التقنية التي تهمك؟' أو 'هل تتابع فرق رياضية معينة؟'",
-            'guidelines': "اكتشف التفضيلات، لا تعطِ أخباراً! أمثلة: التكنولوجيا → اسأل 'ما الشركات مثل آبل أو تسلا أو OpenAI التي تهمك؟' الرياضة → اسأل 'هل تتابع فرق مثل ريال مدريد أو لاعبين مثل ميسي؟'",
-            'conversation_flow': "عندما تحصل على اهتمامات محددة كافية، قل: 'ممتاز! لقد تعلمت عن اهتماماتك. تدفق أخبارك الشخصي جاهز!'"
-        }
-    }
-    
-    prompt_data = language_prompts.get(language, language_prompts['en'])
+    # Sorted so the same selection always gives the same prompt, whatever the
+    # order the client sent it in
+    return _build_system_prompt(
+        user_preferences.get('language', 'en'),
+        tuple(sorted(user_preferences.get('subjects', []))),
+        tuple(sorted(user_preferences.get('subtopics', []))),
+        user_preferences.get('detail_level', 'Medium')
+    )
+
+
+# Users share a small set of topic selections, so each conversation turn
+# usually finds its prompt already built.
+# The instructions that are the same for every user of a language come first
+# and the user's selection last: OpenAI caches the longest common prompt
+# prefix, so the shared part is only billed and processed once.
+@functools.lru_cache(maxsize=1024)
+def _build_system_prompt(language, subjects, subtopics, detail_level):
+    prompt_data = SYSTEM_PROMPT_TEXTS.get(language, SYSTEM_PROMPT_TEXTS['en'])
+    detail_intro = prompt_data['detail_intro'].format(detail_level=detail_level.lower())
     
-    # Build the complete system prompt
-    system_prompt = f"""IMPORTANT: You are NOT a news provider. You do NOT give news articles, headlines, or current events.
-
-{prompt_data['role']}
-
-{prompt_data['task']}
-
-{prompt_data['guide']}
-
-{prompt_data['subjects_intro']} {', '.join(subjects) if subjects else 'None specified'}
-
-"""
+    # Build the complete system prompt in one join
+    parts = [
+        "IMPORTANT: You are NOT a news provider. You do NOT give news articles, headlines, or current events.\n\n",
+        prompt_data['role'], "\n\n",
+        prompt_data['task'], "\n\n",
+        prompt_data['guide'], "\n\n",
+        prompt_data['refinement_task'], "\n\n",
+        prompt_data['guidelines'], "\n\n",
+        prompt_data['conversation_flow'], "\n\n",
+        prompt_data['subjects_intro'], " ", ', '.join(subjects) if subjects else 'None specified', "\n\n",
+    ]
     
     # Add subtopics if available
     if subtopics:
-        system_prompt += f"{prompt_data['subtopics_intro']} {', '.join(subtopics)}\n\n"
+        parts += [prompt_data['subtopics_intro'], " ", ', '.join(subtopics), "\n\n"]
     
-    system_prompt += f"""{prompt_data['detail_intro']}
-
-{prompt_data['refinement_task']}
-
-{prompt_data['guidelines']}
-
-{prompt_data['conversation_flow']}"""
+    parts.append(detail_intro)
     
-    return system_prompt
+    return ''.join(parts)
+
+# Client message roles -> OpenAI roles (other roles are dropped)
+_OPENAI_ROLES = {
+    'user': 'user',
+    'human': 'user',
+    'assistant': 'assistant',
+    'chatbot': 'assistant',
+    'ai': 'assistant',
+    'system': 'system'
+}
 
 def format_conversation_history(messages):
     """
@@ -182,43 +370,22 @@ def format_conversation_history(messages):
     Returns:
         list: Formatted messages for OpenAI API
     """
+    role_map = _OPENAI_ROLES
     formatted_messages = []
+    append = formatted_messages.append
     
     for message in messages:
-        role = message.get('role', '').lower()
-        content = message.get('content', '')
-        
-        # Map roles to OpenAI format
-        if role in ['user', 'human']:
-            formatted_messages.append({"role": "user", "content": content})
-        elif role in ['assistant', 'chatbot', 'ai']:
-            formatted_messages.append({"role": "assistant", "content": content})
-        elif role == 'system':
-            formatted_messages.append({"role": "system", "content": content})
+        role = role_map.get(message.get('role', '').lower())
+        if role is not None:
+            append({"role": role, "content": message.get('content', '')})
     
     return formatted_messages
 
 
-def analyze_conversation_for_specific_subjects(conversation_history, user_message, language='en'):
-    """
-    Analyze conversation to extract specific subjects using a separate LLM call.
-    
-    Args:
-        conversation_history (list): Previous conversation messages
-        user_message (str): Current user message
-        language (str): Language code for analysis
-    
-    Returns:
-        dict: Analysis result with extracted subjects
-    """
-    try:
-        client = get_openai_client()
-        if not client:
-            return {"success": False, "error": "OpenAI client not available"}
-        
-        # Build analysis prompt based on language
-        analysis_prompts = {
-            'en': """CRITICAL TASK: Extract ONLY specific entities that the USER explicitly mentions in their messages.
+# System prompt of the specific-subjects analysis. The rules are written once in
+# English (the model applies them to a conversation in any language); other
+# languages only add a short hint, which keeps the prompt a few hundred tokens.
+ANALYSIS_BASE_PROMPT = """CRITICAL TASK: Extract ONLY specific entities that the USER explicitly mentions in their messages.
 
 RULES:
 1. Look ONLY at messages that start with "user:"
@@ -239,96 +406,71 @@ What NOT to extract:
 - Things only the assistant mentioned
 - Implied topics not explicitly mentioned
 
-IMPORTANT: If user says "LLMs", "robot", "robotique", "machine learning", "AI" - these ARE specific enough to extract.
+IMPORTANT: If user says "LLMs", "robot", "robotique", "machine learning", "AI" - these ARE specific enough to extract."""
 
-Return ONLY a JSON array of specific entities the USER explicitly mentioned: ["entity1", "entity2"]
-If user mentioned no specific entities, return: []""",
-            
-            'fr': """TÂCHE CRITIQUE: Extraire SEULEMENT les entités spécifiques que l'UTILISATEUR mentionne explicitement dans ses messages.
-
-RÈGLES:
-1. Regarde SEULEMENT les messages qui commencent par "user:"
-2. Extrait SEULEMENT ce que l'utilisateur nomme ou mentionne explicitement
-3. IGNORE tout ce que l'assistant dit
-4. Extrait les noms spécifiques, entreprises, personnes, produits, événements, ET technologies spécifiques
-
-Quoi extraire (SEULEMENT si l'utilisateur les mentionne):
-- Noms d'entreprises: "Tesla", "Apple", "Microsoft", "OpenAI", "Google"
-- Noms de personnes: "Elon Musk", "Tim Cook", "Biden", "Cristiano Ronaldo"
-- Produits: "iPhone", "ChatGPT", "PlayStation", "Rubik's Cube"
-- Événements: "Jeux Olympiques 2024", "CES", "Coupe du Monde"
-- Technologies spécifiques: "LLMs", "GPT-4", "apprentissage automatique", "IA", "robotique", "robot"
-- Sujets spécifiques: "robot qui a battu le record", "innovations en robotique"
-
-Quoi NE PAS extraire:
-- Concepts très généraux comme "technologie", "sport" (sans spécificités)
-- Choses mentionnées seulement par l'assistant
-- Sujets impliqués ou suggérés
-
-IMPORTANT: Si l'utilisateur dit "LLMs", "robot", "robotique", "apprentissage automatique", "IA" - ces termes SONT assez spécifiques pour être extraits.
-
-Retourne SEULEMENT un array JSON d'entités spécifiques que l'UTILISATEUR a explicitement mentionnées: ["entité1", "entité2"]
-Si l'utilisateur n'a mentionné aucune entité spécifique, retourne: []""",
-            
-            'es': """TAREA CRÍTICA: Extraer SOLO entidades específicas que el USUARIO menciona explícitamente en sus mensajes.
-
-REGLAS:
-1. Mira SOLO mensajes que empiecen con "user:"
-2. Extrae SOLO lo que el usuario nombra o menciona explícitamente
-3. IGNORA todo lo que dice el asistente
-4. IGNORA temas generales como "IA", "tecnología", "deportes"
-5. Extrae SOLO nombres específicos, empresas, personas, productos, eventos
-
-Qué extraer (SOLO si el usuario los menciona):
-- Nombres de empresas: "Tesla", "Apple", "Microsoft"
-- Nombres de personas: "Elon Musk", "Tim Cook", "Biden"
-- Productos: "iPhone", "ChatGPT", "PlayStation"
-- Eventos: "Olimpiadas 2024", "CES", "Copa Mundial"
-- Tecnologías específicas: "LLMs" (si el usuario lo dice), "GPT-4"
-
-Qué NO extraer:
-- Conceptos generales: "IA", "tecnología", "aprendizaje automático"
-- Cosas mencionadas solo por el asistente
-- Temas implícitos o sugeridos
-
-Devuelve SOLO un array JSON de entidades específicas que el USUARIO mencionó explícitamente: ["entidad1", "entidad2"]
-Si el usuario no mencionó entidades específicas, devuelve: []""",
-            
-            'ar': """مهمة حاسمة: استخراج فقط الكيانات المحددة التي يذكرها المستخدم صراحة في رسائله.
-
-القواعد:
-1. انظر فقط إلى الرسائل التي تبدأ بـ "user:"
-2. استخرج فقط ما يسميه أو يذكره المستخدم صراحة
-3. تجاهل كل ما يقوله المساعد
-4. تجاهل المواضيع العامة مثل "الذكاء الاصطناعي"، "التكنولوجيا"، "الرياضة"
-5. استخرج فقط الأسماء المحددة، الشركات، الأشخاص، المنتجات، الأحداث
-
-ما يجب استخراجه (فقط إذا ذكرها المستخدم):
-- أسماء الشركات: "تسلا"، "آبل"، "مايكروسوفت"
-- أسماء الأشخاص: "إيلون ماسك"، "تيم كوك"، "بايدن"
-- المنتجات: "آيفون"، "ChatGPT"، "بلايستيشن"
-- الأحداث: "أولمبياد 2024"، "CES"، "كأس العالم"
-- التقنيات المحددة: "LLMs" (إذا قالها المستخدم)، "GPT-4"
-
-ما لا يجب استخراجه:
-- المفاهيم العامة: "الذكاء الاصطناعي"، "التكنولوجيا"، "التعلم الآلي"
-- الأشياء التي ذكرها المساعد فقط
-- المواضيع الضمنية أو المقترحة
-
-أرجع فقط مصفوفة JSON للكيانات المحددة التي ذكرها المستخدم صراحة: ["كيان1", "كيان2"]
-إذا لم يذكر المستخدم أي كيانات محددة، أرجع: []"""
+_ANALYSIS_LANGUAGE_NAMES = {'fr': 'French', 'es': 'Spanish', 'ar': 'Arabic'}
+
+# Full analysis prompt by language, built once
+ANALYSIS_PROMPTS = {
+    'en': ANALYSIS_BASE_PROMPT,
+    **{
+        language: f"{ANALYSIS_BASE_PROMPT}\n\nThe conversation is in {name}: return the entities as the user wrote them, without translating them."
+        for language, name in _ANALYSIS_LANGUAGE_NAMES.items()
+    }
+}
+
+
+# Structured-outputs schema of the analysis reply: the model can only answer
+# with this object, so the prompts don't need output-format instructions
+ENTITIES_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "entities",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "entities": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Specific entities the user explicitly mentioned; empty if none"
+                }
+            },
+            "required": ["entities"],
+            "additionalProperties": False
         }
+    }
+}
+
+
+def analyze_conversation_for_specific_subjects(conversation_history, user_message, language='en'):
+    """
+    Analyze conversation to extract specific subjects using a separate LLM call.
+    
+    Args:
+        conversation_history (list): Previous conversation messages
+        user_message (str): Current user message
+        language (str): Language code for analysis
+    
+    Returns:
+        dict: Analysis result with extracted subjects
+    """
+    try:
+        client = get_openai_client()
+        if not client:
+            return {"success": False, "error": "OpenAI client not available"}
         
-        analysis_prompt = analysis_prompts.get(language, analysis_prompts['en'])
+        analysis_prompt = ANALYSIS_PROMPTS.get(language, ANALYSIS_PROMPTS['en'])
         
-        # Build conversation context
-        conversation_text = ""
-        for msg in conversation_history[-5:]:  # Last 5 messages for context
-            role = msg.get('role', '')
-            content = msg.get('content', '')
-            conversation_text += f"{role}: {content}\n"
+        # Build conversation context from the last 5 messages
+        recent_messages = conversation_history[-5:]
+        lines = [f"{msg.get('role', '')}: {msg.get('content', '')}\n" for msg in recent_messages]
         
-        conversation_text += f"user: {user_message}\n"
+        # Clients may already include the current message at the end of the history
+        last_message = recent_messages[-1] if recent_messages else {}
+        if not (last_message.get('role') == 'user' and last_message.get('content') == user_message):
+            lines.append(f"user: {user_message}\n")
+        conversation_text = "".join(lines)
         
         # Create analysis messages
         messages = [
@@ -336,19 +478,20 @@ Si el usuario no mencionó entidades específicas, devuelve: []""",
             {"role": "user", "content": f"Conversation to analyze:\n{conversation_text}"}
         ]
         
-        # Generate analysis
+        # Generate analysis; structured outputs guarantee an {"entities": [...]} object
         response = client.chat.completions.create(
             model="gpt-4o-mini",
             messages=messages,
             max_tokens=200,
-            temperature=0.3
+            temperature=0.3,
+            response_format=ENTITIES_RESPONSE_FORMAT
         )
         
-        analysis_result = response.choices[0].message.content.strip()
+        analysis_result = response.choices[0].message.content or ""
         
         # Try to parse JSON
         try:
-            specific_subjects = json.loads(analysis_result)
+            specific_subjects = orjson.loads(analysis_result).get("entities")
             if isinstance(specific_subjects, list):
                 # Filter out empty strings and duplicates
                 specific_subjects = list(set([s.strip() for s in specific_subjects if s.strip()]))
@@ -365,7 +508,8 @@ Si el usuario no mencionó entidades específicas, devuelve: []""",
             else:
                 return {"success": False, "error": "Invalid response format"}
                 
-        except json.JSONDecodeError:
+        except (orjson.JSONDecodeError, AttributeError):
+            # Truncated output (max_tokens) or a refusal
             logger.warning(f"Failed to parse analysis result as JSON: {analysis_result}")
             return {"success": False, "error": "Failed to parse analysis result"}
             
@@ -401,3 +545,17 @@ def analyze_and_update_specific_subjects(user_id, conversation_history, user_mes
             
     except Exception as e:
         logger.error(f"Error in background analysis for user {user_id}: {e}")
+
+
+def schedule_specific_subjects_analysis(user_id, conversation_history, user_message, language):
+    """
+    Start analyze_and_update_specific_subjects on the shared AI worker pool,
+    so it runs while the caller generates the reply.
+
+    Returns:
+        concurrent.futures.Future: Completes when the analysis is saved
+    """
+    return _AI_POOL.submit(
+        analyze_and_update_specific_subjects, user_id, conversation_history, user_message, language
+    )
+
@@ -12,6 +12,37 @@ logger = logging.getLogger(__name__)
 
 import requests
 from ..config import get_cartesia_key
+from ..utils.http import HTTP_SESSION
+
+CARTESIA_TTS_URL = "https://api.cartesia.ai/tts/bytes"
+
+# Size of the audio slices forwarded to the client when streaming
+TTS_STREAM_CHUNK_BYTES = 16 * 1024
+
+
+def _cartesia_request(text, voice_id, language, model_id):
+    """Headers and JSON payload of a Cartesia /tts/bytes request (WAV output)."""
+    headers = {
+        "Cartesia-Version": "2024-06-10",
+        "X-API-Key": get_cartesia_key(),
+        "Content-Type": "application/json"
+    }
+    
+    payload = {
+        "model_id": model_id,
+        "transcript": text,
+        "voice": {
+            "mode": "id",
+            "id": voice_id
+        },
+        "output_format": {
+            "container": "wav",
+            "encoding": "pcm_f32le",
+            "sample_rate": 44100
+        },
+        "language": language
+    }
+    return headers, payload
 
 def generate_text_to_speech_cartesia(text, voice_id="96c64eb5-a945-448f-9710-980abe7a514c", language="en", model_id="sonic-2"):
     """
@@ -29,32 +60,10 @@ def generate_text_to_speech_cartesia(text, voice_id="96c64eb5-a945-448f-9710-980
     try:
         logger.info(f"🎙️ Generating speech with Cartesia: {len(text)} characters")
         
-        key = get_cartesia_key()
-        url = "https://api.cartesia.ai/tts/bytes"
-        
-        headers = {
-            "Cartesia-Version": "2024-06-10",
-            "X-API-Key": key,
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model_id": model_id,
-            "transcript": text,
-            "voice": {
-                "mode": "id",
-                "id": voice_id
-            },
-            "output_format": {
-                "container": "wav",
-                "encoding": "pcm_f32le",
-                "sample_rate": 44100
-            },
-            "language": language
-        }
+        headers, payload = _cartesia_request(text, voice_id, language, model_id)
         
         logger.info("📤 Sending request to Cartesia API...")
-        response = requests.post(url, json=payload, headers=headers, timeout=120)
+        response = HTTP_SESSION.post(CARTESIA_TTS_URL, json=payload, headers=headers, timeout=120)
         
         if response.status_code == 200:
             audio_bytes = response.content
@@ -72,6 +81,50 @@ def generate_text_to_speech_cartesia(text, voice_id="96c64eb5-a945-448f-9710-980
         logger.error(f"❌ Error generating speech with Cartesia: {e}")
         return None
 
+def stream_text_to_speech_cartesia(text, voice_id="96c64eb5-a945-448f-9710-980abe7a514c", language="en", model_id="sonic-2"):
+    """
+    Generate speech with Cartesia and stream the WAV audio as it is produced.
+    
+    The request is sent before returning, so API errors are reported
+    immediately; the audio itself is read from the connection in
+    TTS_STREAM_CHUNK_BYTES slices only as the caller consumes the iterator.
+    
+    Args:
+        text (str): Text to convert to speech
+        voice_id (str): Cartesia voice ID
+        language (str): Language code
+        model_id (str): Cartesia model ID
+    
+    Returns:
+        Iterator of WAV audio bytes chunks, or None if failed
+    """
+    try:
+        logger.info(f"🎙️ Streaming speech with Cartesia: {len(text)} characters")
+        
+        headers, payload = _cartesia_request(text, voice_id, language, model_id)
+        response = HTTP_SESSION.post(CARTESIA_TTS_URL, json=payload, headers=headers, timeout=120, stream=True)
+        
+        if response.status_code != 200:
+            logger.error(f"❌ Cartesia API error: {response.status_code}")
+            logger.error(f"❌ Response: {response.text}")
+            response.close()
+            return None
+        
+    except requests.exceptions.Timeout:
+        logger.error("❌ Cartesia API timeout")
+        return None
+    except Exception as e:
+        logger.error(f"❌ Error streaming speech with Cartesia: {e}")
+        return None
+    
+    def _iter_audio():
+        try:
+            yield from response.iter_content(chunk_size=TTS_STREAM_CHUNK_BYTES)
+        finally:
+            response.close()
+    
+    return _iter_audio()
+
 def generate_text_to_speech(text, voice_id="96c64eb5-a945-448f-9710-980abe7a514c", model_id="sonic-2", language="en", output_format=None):
     """
     Wrapper pour garder la même interface (output_format ignoré pour Cartesia)
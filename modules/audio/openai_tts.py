@@ -20,7 +20,6 @@
 
 import io
 import re
-from pydub import AudioSegment
 from modules.ai.client import get_openai_client
 
 def _split_text_chunks(text, max_length=3000):
@@ -43,6 +42,9 @@ def _split_text_chunks(text, max_length=3000):
 def generate_text_to_speech_openai(text: str,
                                    model: str = "tts-1",
                                    voice: str = "shimmer"):
+    # pydub is only needed here; importing it lazily keeps it off the cold-start path
+    from pydub import AudioSegment
+
     instructions = """Voice: Clear, authoritative, and composed, projecting confidence and professionalism.\n\nTone: Neutral and informative, maintaining a balance between formality and approachability.\n\nPunctuation: Structured with commas and pauses for clarity, ensuring information is digestible and well-paced.\n\nDelivery: Steady and measured, with slight emphasis on key figures and deadlines to highlight critical points."""
     client = get_openai_client()
     chunks = _split_text_chunks(text)
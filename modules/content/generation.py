@@ -1,6 +1,5 @@
 import sys
 
-import time
 # Configure logging AS EARLY AS POSSIBLE
 import logging
 logger = logging.getLogger(__name__)
@@ -9,11 +8,20 @@ logger = logging.getLogger(__name__)
 # Implementation of the Prysm backend for news aggregation
 
 from datetime import datetime
-
-import requests
+from concurrent.futures import ThreadPoolExecutor
 
 from modules.ai.client import get_openai_client
-from modules.news.news_helper import get_articles_subtopics_user, get_reddit_post_comments
+from modules.news.news_helper import SharedFetches, get_articles_subtopics_user, get_reddit_post_comments
+
+# Subtopics of a topic are fetched concurrently; keep this small so the
+# combined GNews/SerpAPI/Reddit request rate stays under their rate limits.
+SUBTOPIC_FETCH_WORKERS = 4
+
+# Independent LLM calls of a topic report (pickup line, topic summary, and a
+# summary + Reddit brief per subtopic) run concurrently, at most this many at once.
+# Times COMPLETE_REPORT_TOPIC_WORKERS, stays within the OpenAI client's
+# connection pool (OPENAI_MAX_CONNECTIONS) for one complete report.
+REPORT_LLM_WORKERS = 6
 
 def get_pickup_line(topic_name, topic_content_data):
     """
@@ -679,47 +687,35 @@ def get_complete_topic_report(topic_name, topic_posts_data):
         report["generation_stats"]["total_subtopics"] = len(subtopics_data)
         
         # Step 1: Generate pickup line for the entire topic
-        logger.info(f"Step 1: Generating pickup line for {topic_name}")
-        try:
-            pickup_result = get_pickup_line(topic_name, topic_posts_data)
-            if pickup_result.get("success"):
-                report["pickup_line"] = pickup_result["pickup_line"]
-                report["generation_stats"]["pickup_line_generated"] = True
-                logger.info("✅ Pickup line generated successfully")
-            else:
-                report["pickup_line"] = f"Discover what's trending in {topic_name} right now with breaking stories and latest developments."
+        def _pickup_line():
+            logger.info(f"Step 1: Generating pickup line for {topic_name}")
+            try:
+                pickup_result = get_pickup_line(topic_name, topic_posts_data)
+                if pickup_result.get("success"):
+                    logger.info("✅ Pickup line generated successfully")
+                    return pickup_result["pickup_line"], True
                 logger.warning(f"Pickup line generation failed, using fallback")
-        except Exception as e:
-            logger.error(f"Error generating pickup line: {e}")
-            report["pickup_line"] = f"Stay updated with the latest {topic_name} news and trends."
+                return f"Discover what's trending in {topic_name} right now with breaking stories and latest developments.", False
+            except Exception as e:
+                logger.error(f"Error generating pickup line: {e}")
+                return f"Stay updated with the latest {topic_name} news and trends.", False
         
         # Step 2: Generate comprehensive topic summary
-        logger.info(f"Step 2: Generating topic summary for {topic_name}")
-        try:
-            summary_result = get_topic_summary(topic_name, topic_posts_data)
-            if summary_result.get("success"):
-                report["topic_summary"] = summary_result["topic_summary"]
-                report["generation_stats"]["topic_summary_generated"] = True
-                logger.info("✅ Topic summary generated successfully")
-            else:
-                report["topic_summary"] = f"# {topic_name} Summary\n\nComprehensive overview of current {topic_name} developments and trends."
+        def _topic_summary():
+            logger.info(f"Step 2: Generating topic summary for {topic_name}")
+            try:
+                summary_result = get_topic_summary(topic_name, topic_posts_data)
+                if summary_result.get("success"):
+                    logger.info("✅ Topic summary generated successfully")
+                    return summary_result["topic_summary"], True
                 logger.warning(f"Topic summary generation failed, using fallback")
-        except Exception as e:
-            logger.error(f"Error generating topic summary: {e}")
-            report["topic_summary"] = f"Current {topic_name} overview and key developments."
-        
-        # Step 3: Process each subtopic
-        logger.info(f"Step 3: Processing {len(subtopics_data)} subtopics")
+                return f"# {topic_name} Summary\n\nComprehensive overview of current {topic_name} developments and trends.", False
+            except Exception as e:
+                logger.error(f"Error generating topic summary: {e}")
+                return f"Current {topic_name} overview and key developments.", False
         
-        for subtopic_name, subtopic_data in subtopics_data.items():
-            logger.info(f"Processing subtopic: {subtopic_name}")
-            
-            subtopic_report = {
-                "subtopic_summary": "",
-                "reddit_summary": ""
-            }
-            
-            # 3a: Generate subtopic summary (articles + query articles)
+        # Step 3a: Generate subtopic summary (articles + query articles)
+        def _subtopic_summary(subtopic_name, subtopic_data):
             try:
                 # Collect all articles for this subtopic
                 subtopic_articles = subtopic_data.get(subtopic_name, [])
@@ -731,32 +727,32 @@ def get_complete_topic_report(topic_name, topic_posts_data):
                 
                 all_subtopic_articles = subtopic_articles + query_articles
                 
-                if all_subtopic_articles:
-                    # Create a mini topic summary for just this subtopic's articles
-                    subtopic_content = {
-                        "success": True,
-                        "data": {
-                            "topic_headlines": all_subtopic_articles,
-                            "subtopics": {}
-                        }
-                    }
-                    
-                    summary_result = get_topic_summary(subtopic_name, subtopic_content)
-                    if summary_result.get("success"):
-                        subtopic_report["subtopic_summary"] = summary_result["topic_summary"]
-                        logger.info(f"✅ Generated summary for {subtopic_name} ({len(all_subtopic_articles)} articles)")
-                    else:
-                        subtopic_report["subtopic_summary"] = f"**{subtopic_name} Overview**\n\nKey developments and trends in {subtopic_name}."
-                        logger.warning(f"Subtopic summary failed for {subtopic_name}")
-                else:
-                    subtopic_report["subtopic_summary"] = f"**{subtopic_name}**\n\nNo recent articles available for this subtopic."
+                if not all_subtopic_articles:
                     logger.info(f"No articles found for {subtopic_name}")
+                    return f"**{subtopic_name}**\n\nNo recent articles available for this subtopic."
+                
+                # Create a mini topic summary for just this subtopic's articles
+                subtopic_content = {
+                    "success": True,
+                    "data": {
+                        "topic_headlines": all_subtopic_articles,
+                        "subtopics": {}
+                    }
+                }
+                
+                summary_result = get_topic_summary(subtopic_name, subtopic_content)
+                if summary_result.get("success"):
+                    logger.info(f"✅ Generated summary for {subtopic_name} ({len(all_subtopic_articles)} articles)")
+                    return summary_result["topic_summary"]
+                logger.warning(f"Subtopic summary failed for {subtopic_name}")
+                return f"**{subtopic_name} Overview**\n\nKey developments and trends in {subtopic_name}."
                     
             except Exception as e:
                 logger.error(f"Error generating subtopic summary for {subtopic_name}: {e}")
-                subtopic_report["subtopic_summary"] = f"**{subtopic_name}**\n\nSummary unavailable."
-            
-            # 3b: Generate Reddit world summary for this subtopic
+                return f"**{subtopic_name}**\n\nSummary unavailable."
+        
+        # Step 3b: Generate Reddit world summary for this subtopic
+        def _subtopic_reddit_summary(subtopic_name, subtopic_data):
             try:
                 # Collect all Reddit posts for this subtopic
                 all_reddit_posts = []
@@ -765,26 +761,46 @@ def get_complete_topic_report(topic_name, topic_posts_data):
                 for subreddit, posts in subreddits_data.items():
                     all_reddit_posts.extend(posts)
                 
-                if all_reddit_posts:
-                    reddit_result = get_reddit_world_summary(all_reddit_posts)
-                    if reddit_result.get("success"):
-                        subtopic_report["reddit_summary"] = reddit_result["world_summary"]
-                        logger.info(f"✅ Generated Reddit summary for {subtopic_name} ({len(all_reddit_posts)} posts, {reddit_result.get('relevant_posts', 0)} relevant)")
-                    else:
-                        subtopic_report["reddit_summary"] = f"**{subtopic_name} Community Pulse**\n\nNo significant world events detected in current discussions."
-                        logger.warning(f"Reddit summary failed for {subtopic_name}")
-                else:
-                    subtopic_report["reddit_summary"] = f"**{subtopic_name} Community Pulse**\n\nNo recent Reddit discussions available."
+                if not all_reddit_posts:
                     logger.info(f"No Reddit posts found for {subtopic_name}")
+                    return f"**{subtopic_name} Community Pulse**\n\nNo recent Reddit discussions available."
+                
+                reddit_result = get_reddit_world_summary(all_reddit_posts)
+                if reddit_result.get("success"):
+                    logger.info(f"✅ Generated Reddit summary for {subtopic_name} ({len(all_reddit_posts)} posts, {reddit_result.get('relevant_posts', 0)} relevant)")
+                    return reddit_result["world_summary"]
+                logger.warning(f"Reddit summary failed for {subtopic_name}")
+                return f"**{subtopic_name} Community Pulse**\n\nNo significant world events detected in current discussions."
                     
             except Exception as e:
                 logger.error(f"Error generating Reddit summary for {subtopic_name}: {e}")
-                subtopic_report["reddit_summary"] = f"**{subtopic_name} Community Pulse**\n\nCommunity insights unavailable."
+                return f"**{subtopic_name} Community Pulse**\n\nCommunity insights unavailable."
+        
+        # All these LLM calls are independent: run them side by side so the report
+        # takes about as long as the slowest call instead of the sum of all of them
+        logger.info(f"Step 3: Processing {len(subtopics_data)} subtopics")
+        task_count = 2 + 2 * len(subtopics_data)
+        with ThreadPoolExecutor(max_workers=min(REPORT_LLM_WORKERS, task_count)) as executor:
+            pickup_future = executor.submit(_pickup_line)
+            summary_future = executor.submit(_topic_summary)
+            subtopic_futures = {
+                subtopic_name: (
+                    executor.submit(_subtopic_summary, subtopic_name, subtopic_data),
+                    executor.submit(_subtopic_reddit_summary, subtopic_name, subtopic_data)
+                )
+                for subtopic_name, subtopic_data in subtopics_data.items()
+            }
             
-            report["subtopics"][subtopic_name] = subtopic_report
-            report["generation_stats"]["subtopics_processed"] += 1
+            report["pickup_line"], report["generation_stats"]["pickup_line_generated"] = pickup_future.result()
+            report["topic_summary"], report["generation_stats"]["topic_summary_generated"] = summary_future.result()
             
-            logger.info(f"✅ Completed processing {subtopic_name}")
+            for subtopic_name, (summary_future, reddit_future) in subtopic_futures.items():
+                report["subtopics"][subtopic_name] = {
+                    "subtopic_summary": summary_future.result(),
+                    "reddit_summary": reddit_future.result()
+                }
+                report["generation_stats"]["subtopics_processed"] += 1
+                logger.info(f"✅ Completed processing {subtopic_name}")
         
         # Final statistics
         logger.info(f"Complete topic report generated for {topic_name}:")
@@ -875,20 +891,36 @@ def get_topic_posts(topic_name, topic_data, lang="en", country="us"):
         subtopic_names = list(topic_data.keys())
         logger.info(f"Processing {len(subtopic_names)} subtopics: {subtopic_names}")
         
-        for i, (subtopic_name, subtopic_data) in enumerate(topic_data.items()):
-            logger.info(f"Processing subtopic {i+1}/{len(subtopic_names)}: {subtopic_name}")
-            
-            # Add delay between subtopics to avoid overwhelming APIs
-            if i > 0:
-                time.sleep(2)
-            
-            # Call the existing function for this subtopic
-            subtopic_result = get_articles_subtopics_user(
+        # Subtopics sharing a subreddit or query fetch it only once
+        shared_fetches = SharedFetches()
+        
+        def _fetch_subtopic(subtopic_name, subtopic_data):
+            return get_articles_subtopics_user(
                 subtopic_name=subtopic_name,
                 subtopic_data=subtopic_data,
                 lang=lang,
-                country=country
+                country=country,
+                shared_fetches=shared_fetches
             )
+        
+        # Each subtopic is an independent chain of news/Reddit requests, so run
+        # them side by side: wall-clock becomes the slowest subtopic, not the sum.
+        subtopic_results = {}
+        if subtopic_names:
+            with ThreadPoolExecutor(max_workers=min(SUBTOPIC_FETCH_WORKERS, len(subtopic_names))) as executor:
+                futures = {
+                    subtopic_name: executor.submit(_fetch_subtopic, subtopic_name, subtopic_data)
+                    for subtopic_name, subtopic_data in topic_data.items()
+                }
+                for subtopic_name, future in futures.items():
+                    try:
+                        subtopic_results[subtopic_name] = future.result()
+                    except Exception as e:
+                        subtopic_results[subtopic_name] = {"success": False, "error": str(e)}
+        
+        # Assemble in the caller's subtopic order
+        for subtopic_name in subtopic_names:
+            subtopic_result = subtopic_results[subtopic_name]
             
             if subtopic_result.get("success"):
                 result["subtopics"][subtopic_name] = subtopic_result.get("data", {})
@@ -8,7 +8,7 @@ import uuid
 from firebase_admin import firestore, storage
 from modules.ai.client import get_openai_client
 from modules.audio.cartesia import generate_text_to_speech
-from modules.database.operations import get_user_articles_from_db, get_user_preferences_from_db
+from modules.database.operations import get_user_articles_from_db_async, get_user_preferences_from_db_async
 
 logger = logging.getLogger(__name__)
 
@@ -335,11 +335,11 @@ RESPONSE FORMAT: Natural speech, no formatting."""
         Pre-load user context for fast response generation.
         """
         try:
-            # Get user preferences
-            preferences = get_user_preferences_from_db(user_id)
-            
-            # Get recent articles
-            articles = get_user_articles_from_db(user_id)
+            # Get user preferences and recent articles concurrently
+            preferences, articles = await asyncio.gather(
+                get_user_preferences_from_db_async(user_id),
+                get_user_articles_from_db_async(user_id)
+            )
             
             return {
                 "preferences": preferences,
@@ -1,6 +1,5 @@
 import sys
 import logging
-import requests
 from datetime import datetime
 
 # Configure logging AS EARLY AS POSSIBLE
@@ -11,7 +10,7 @@ logger = logging.getLogger(__name__)
 
 from firebase_admin import firestore, storage
 
-import json
+import orjson
 
 from modules.ai.client import get_openai_client
 from modules.audio.cartesia import generate_text_to_speech
@@ -21,6 +20,71 @@ from modules.audio.openai_tts import generate_text_to_speech_openai
 
 logger.info("--- main.py: Logging configured ---")
 
+# Prompts of generate_simple_podcast_script, defined once at import
+SIMPLE_PODCAST_SYSTEM_PROMPTS = {
+    "fr": """Tu es un animateur de podcast amical qui crée un script conversationnel pour un briefing d'actualités. Ton ton doit être décontracté, engageant et informatif - comme si tu racontais des nouvelles intéressantes à un ami.
+
+Génère un script de podcast de 4-6 minutes basé sur TOUS les articles fournis, organisés par sujets et sous-sujets.
+
+IMPORTANT: Écris UNIQUEMENT le texte à lire à voix haute - AUCUNE indication de mise en scène comme [intro], [outro], [pause], etc. Le script doit être du texte pur, fluide et lisible directement.
+
+Directives de style:
+- Conversationnel et naturel (comme si tu parlais à un ami)
+- Utilise des transitions comme "En parlant de...", "Oh, et voici quelque chose d'intéressant...", "Tu sais ce qui m'a frappé?"
+- Inclus des réactions personnelles ("C'est assez fou...", "J'ai trouvé ça fascinant...")
+- Reste engageant mais informatif
+- Utilise les noms des sources pour ajouter de la crédibilité
+- Commence directement par un accueil naturel, termine par une conclusion naturelle
+- Pas de marqueurs de temps ou d'instructions techniques
+
+Flux naturel:
+- Commence par un accueil chaleureux et un aperçu des sujets
+- Enchaîne naturellement d'un sujet à l'autre avec des transitions fluides
+- Termine par une conclusion naturelle et engageante
+
+IMPORTANT: Couvre chaque article fourni - n'en laisse aucun de côté. Mentionne chaque titre d'article. Écris SEULEMENT ce qui doit être dit à voix haute.""",
+    "en": """You are a friendly podcast host creating a conversational news briefing script. Your tone should be casual, engaging, and informative - like telling a friend about interesting news you've discovered.
+
+Generate a 10-12 minute podcast (1500-1700 words) script based on ALL the provided articles, organized by topics and subtopics.
+
+CRITICAL FORMATTING REQUIREMENT:
+Structure your script with clear article-based sections using this EXACT format:
+
+INTRO:
+[Your welcoming introduction text here]
+
+<<articlelink1>>:
+[Content discussing this specific article]
+
+<<articlelink2>>:
+[Content discussing this specific article]
+
+<<articlelink3>>:
+[Content discussing this specific article]
+
+[Continue for ALL articles...]
+
+CONCLUSION:
+[Your closing remarks]
+
+IMPORTANT RULES:
+- Write ONLY the text to be read aloud - NO stage directions like [intro], [outro], [pause], etc.
+- Each article section should flow naturally when read consecutively
+- Use natural transitions between articles ("Speaking of...", "Oh, and here's something interesting...", "You know what caught my eye?")
+- Include personal reactions/commentary ("This is pretty wild...", "I found this fascinating...")
+- Keep it engaging but informative
+- Use source names to add credibility
+- When article links are removed, the script should flow as one continuous, natural conversation
+- Cover every single article provided - don't leave any out
+- Write ONLY what needs to be spoken aloud
+
+The script must work both as:
+1. Structured sections (with article links as headers)
+2. One flowing conversation (when article links are removed)""",
+}
+
+SIMPLE_PODCAST_USER_PREFIX = "Here's the news data to create a podcast script for:\n\n"
+
 def generate_media_twin_script(topic_name, topic_posts_data, presenter_name="Alex", language="fr"):
     """
     Génère un script conversationnel pour un media twin (jumeau média) qui présente l'actualité.
@@ -745,72 +809,10 @@ def generate_simple_podcast_script(user_id, presenter_name="Alex", language="en"
             raise Exception("No topics found for user")
         
         # Create the podcast generation prompt
-        if language == "fr":
-            system_prompt = """Tu es un animateur de podcast amical qui crée un script conversationnel pour un briefing d'actualités. Ton ton doit être décontracté, engageant et informatif - comme si tu racontais des nouvelles intéressantes à un ami.
-
-Génère un script de podcast de 4-6 minutes basé sur TOUS les articles fournis, organisés par sujets et sous-sujets.
-
-IMPORTANT: Écris UNIQUEMENT le texte à lire à voix haute - AUCUNE indication de mise en scène comme [intro], [outro], [pause], etc. Le script doit être du texte pur, fluide et lisible directement.
-
-Directives de style:
-- Conversationnel et naturel (comme si tu parlais à un ami)
-- Utilise des transitions comme "En parlant de...", "Oh, et voici quelque chose d'intéressant...", "Tu sais ce qui m'a frappé?"
-- Inclus des réactions personnelles ("C'est assez fou...", "J'ai trouvé ça fascinant...")
-- Reste engageant mais informatif
-- Utilise les noms des sources pour ajouter de la crédibilité
-- Commence directement par un accueil naturel, termine par une conclusion naturelle
-- Pas de marqueurs de temps ou d'instructions techniques
-
-Flux naturel:
-- Commence par un accueil chaleureux et un aperçu des sujets
-- Enchaîne naturellement d'un sujet à l'autre avec des transitions fluides
-- Termine par une conclusion naturelle et engageante
-
-IMPORTANT: Couvre chaque article fourni - n'en laisse aucun de côté. Mentionne chaque titre d'article. Écris SEULEMENT ce qui doit être dit à voix haute."""
-
-        else:
-            system_prompt = """You are a friendly podcast host creating a conversational news briefing script. Your tone should be casual, engaging, and informative - like telling a friend about interesting news you've discovered.
-
-Generate a 10-12 minute podcast (1500-1700 words) script based on ALL the provided articles, organized by topics and subtopics.
-
-CRITICAL FORMATTING REQUIREMENT:
-Structure your script with clear article-based sections using this EXACT format:
-
-INTRO:
-[Your welcoming introduction text here]
-
-<<articlelink1>>:
-[Content discussing this specific article]
-
-<<articlelink2>>:
-[Content discussing this specific article]
-
-<<articlelink3>>:
-[Content discussing this specific article]
-
-[Continue for ALL articles...]
-
-CONCLUSION:
-[Your closing remarks]
-
-IMPORTANT RULES:
-- Write ONLY the text to be read aloud - NO stage directions like [intro], [outro], [pause], etc.
-- Each article section should flow naturally when read consecutively
-- Use natural transitions between articles ("Speaking of...", "Oh, and here's something interesting...", "You know what caught my eye?")
-- Include personal reactions/commentary ("This is pretty wild...", "I found this fascinating...")
-- Keep it engaging but informative
-- Use source names to add credibility
-- When article links are removed, the script should flow as one continuous, natural conversation
-- Cover every single article provided - don't leave any out
-- Write ONLY what needs to be spoken aloud
-
-The script must work both as:
-1. Structured sections (with article links as headers)
-2. One flowing conversation (when article links are removed)"""
-
-
-        # Fodrmat the articles data as a clean JSON string
-        user_message = f"Here's the news data to create a podcast script for:\n\n{json.dumps(topics_data, indent=2)}"
+        system_prompt = SIMPLE_PODCAST_SYSTEM_PROMPTS["fr" if language == "fr" else "en"]
+        
+        # Format the articles data as a clean JSON string
+        user_message = SIMPLE_PODCAST_USER_PREFIX + orjson.dumps(topics_data, option=orjson.OPT_INDENT_2).decode()
         
         # Use OpenAI to generate the script
         client = get_openai_client()
@@ -897,17 +899,19 @@ The script must work both as:
                 "status": "script_generated"  # Can be updated later when audio is generated
             }
             
-            # Store in audio_connections collection
+            # Store in audio_connections collection and update the user's latest
+            # script reference in the same batch: one commit round trip
+            batch = db_client.batch()
             doc_ref = db_client.collection('audio_connections').document()
-            doc_ref.set(audio_connection_data)
+            batch.set(doc_ref, audio_connection_data)
             
-            # Also update user's latest script reference
             user_audio_ref = db_client.collection('user_audio_connections').document(user_id)
-            user_audio_ref.set({
+            batch.set(user_audio_ref, {
                 "latest_script_id": doc_ref.id,
                 "latest_script_created": datetime.now().isoformat(),
                 "storage_url": storage_url
             }, merge=True)
+            batch.commit()
             
             db_storage_success = True
             logger.info(f"📀 Audio connection saved to database: {doc_ref.id}")
@@ -1041,9 +1045,12 @@ def generate_simple_podcast(user_id, presenter_name="Alex", language="en", voice
                 latest_doc = doc
                 break
             
+            # The podcast document and the audio/{user_id} link are written in
+            # one batch (one commit round trip, and never one without the other)
+            batch = db_client.batch()
             if latest_doc:
                 # Update existing document with audio info
-                latest_doc.reference.update({
+                batch.update(latest_doc.reference, {
                     'audio_url': audio_storage_url,
                     'audio_filename': audio_filename,
                     'audio_generated_at': datetime.now().isoformat(),
@@ -1073,34 +1080,35 @@ def generate_simple_podcast(user_id, presenter_name="Alex", language="en", voice
                 }
                 
                 doc_ref = db_client.collection('audio_connections').document()
-                doc_ref.set(complete_podcast_data)
+                batch.set(doc_ref, complete_podcast_data)
                 doc_id = doc_ref.id
             
-            logger.info(f"📀 Complete podcast saved to database: {doc_id}")
+            # Step 5: Save audio link in audio > user_id collection
+            audio_user_ref = db_client.collection('audio').document(user_id)
+            batch.set(audio_user_ref, {
+                "latest_podcast_url": audio_storage_url,
+                "latest_podcast_created": datetime.now().isoformat(),
+                "latest_podcast_id": doc_id,
+                "script_url": script_storage_url,
+                "presenter_name": presenter_name,
+                "language": language,
+                "voice_id": voice_id,
+                "audio_filename": audio_filename,
+                "status": "complete_podcast_generated"
+            }, merge=True)
             
-            # Step 5: Save audio link in audio > user_id collection with retries
+            # Commit with retries
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    audio_user_ref = db_client.collection('audio').document(user_id)
-                    audio_data = {
-                        "latest_podcast_url": audio_storage_url,
-                        "latest_podcast_created": datetime.now().isoformat(),
-                        "latest_podcast_id": doc_id,
-                        "script_url": script_storage_url,
-                        "presenter_name": presenter_name,
-                        "language": language,
-                        "voice_id": voice_id,
-                        "audio_filename": audio_filename,
-                        "status": "complete_podcast_generated"
-                    }
-                    audio_user_ref.set(audio_data, merge=True)
+                    batch.commit()
+                    logger.info(f"📀 Complete podcast saved to database: {doc_id}")
                     logger.info(f"🎵 Audio link saved in audio/{user_id}")
                     break
-                except Exception as audio_save_error:
-                    logger.warning(f"Attempt {attempt + 1} failed to save to audio collection: {audio_save_error}")
+                except Exception as commit_error:
+                    logger.warning(f"Attempt {attempt + 1} failed to save podcast to database: {commit_error}")
                     if attempt == max_retries - 1:
-                        logger.error(f"Failed to save audio link after {max_retries} attempts: {audio_save_error}")
+                        logger.error(f"Failed to save podcast after {max_retries} attempts: {commit_error}")
                         # Continue anyway - don't fail the whole process
             
         except Exception as db_error:
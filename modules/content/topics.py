@@ -8,142 +8,161 @@ logger = logging.getLogger(__name__)
 # Welcome to Cloud Functions for Firebase for Python!
 # Implementation of the Prysm backend for news aggregation
 
-import requests
 from modules.news.serpapi import  gnews_search, gnews_top_headlines
+from modules.utils.http import HTTP_SESSION
 
-def find_parent_topic_for_subtopic(subtopic_name):
-    """Find which topic a subtopic belongs to"""
-    # Map subtopics to their parent topics
-    subtopic_to_topic = {
-        # Technology subtopics
-        'AI': 'technology',
-        'Artificial Intelligence': 'technology',
-        'Gadgets': 'technology',
-        'Software': 'technology',
-        'Hardware': 'technology',
-        'Cybersecurity': 'technology',
-        'Startups': 'technology',
-        
-        # Business subtopics
-        'Finance': 'business',
-        'Economy': 'business',
-        'Markets': 'business',
-        'Cryptocurrency': 'business',
-        'Investment': 'business',
-        'Banking': 'business',
-        
-        # Sports subtopics
-        'Football': 'sports',
-        'Basketball': 'sports',
-        'Tennis': 'sports',
-        'Soccer': 'sports',
-        'Olympics': 'sports',
-        'Baseball': 'sports',
-        
-        # Science subtopics
-        'Space': 'science',
-        'Research': 'science',
-        'Climate': 'science',
-        'Physics': 'science',
-        'Chemistry': 'science',
-        'Biology': 'science',
-        
-        # Health subtopics
-        'Medicine': 'health',
-        'Fitness': 'health',
-        'Nutrition': 'health',
-        'Mental Health': 'health',
-        'Wellness': 'health',
-        
-        # Entertainment subtopics
-        'Movies': 'entertainment',
-        'Music': 'entertainment',
-        'Gaming': 'entertainment',
-        'TV Shows': 'entertainment',
-        'Celebrities': 'entertainment',
-        
-        # World subtopics
-        'Politics': 'world',
-        'International': 'world',
-        'Conflicts': 'world',
-        'Diplomacy': 'world'
+from types import MappingProxyType
+
+# Lookup tables of the legacy preferences conversion, built once at import
+# (read-only) instead of on every call.
+
+# Map subtopics to their parent topics
+SUBTOPIC_TO_TOPIC = MappingProxyType({
+    # Technology subtopics
+    'AI': 'technology',
+    'Artificial Intelligence': 'technology',
+    'Gadgets': 'technology',
+    'Software': 'technology',
+    'Hardware': 'technology',
+    'Cybersecurity': 'technology',
+    'Startups': 'technology',
+
+    # Business subtopics
+    'Finance': 'business',
+    'Economy': 'business',
+    'Markets': 'business',
+    'Cryptocurrency': 'business',
+    'Investment': 'business',
+    'Banking': 'business',
+
+    # Sports subtopics
+    'Football': 'sports',
+    'Basketball': 'sports',
+    'Tennis': 'sports',
+    'Soccer': 'sports',
+    'Olympics': 'sports',
+    'Baseball': 'sports',
+
+    # Science subtopics
+    'Space': 'science',
+    'Research': 'science',
+    'Climate': 'science',
+    'Physics': 'science',
+    'Chemistry': 'science',
+    'Biology': 'science',
+
+    # Health subtopics
+    'Medicine': 'health',
+    'Fitness': 'health',
+    'Nutrition': 'health',
+    'Mental Health': 'health',
+    'Wellness': 'health',
+
+    # Entertainment subtopics
+    'Movies': 'entertainment',
+    'Music': 'entertainment',
+    'Gaming': 'entertainment',
+    'TV Shows': 'entertainment',
+    'Celebrities': 'entertainment',
+
+    # World subtopics
+    'Politics': 'world',
+    'International': 'world',
+    'Conflicts': 'world',
+    'Diplomacy': 'world'
+})
+
+# Map common old topics to GNews format
+OLD_TOPIC_TO_GNEWS = MappingProxyType({
+    'technology': 'technology',
+    'technologie': 'technology',
+    'tecnología': 'technology',
+    'تكنولوجيا': 'technology',
+    'business': 'business',
+    'affaires': 'business',
+    'negocios': 'business',
+    'أعمال': 'business',
+    'sports': 'sports',
+    'deportes': 'sports',
+    'رياضة': 'sports',
+    'science': 'science',
+    'ciencia': 'science',
+    'علوم': 'science',
+    'health': 'health',
+    'santé': 'health',
+    'salud': 'health',
+    'صحة': 'health',
+    'entertainment': 'entertainment',
+    'divertissement': 'entertainment',
+    'entretenimiento': 'entertainment',
+    'ترفيه': 'entertainment',
+    'world': 'world',
+    'monde': 'world',
+    'mundo': 'world',
+    'عالم': 'world',
+    'general': 'general',
+    'général': 'general'
+})
+
+# Common subtopic mappings with basic subreddit suggestions
+SUBTOPIC_CATALOG = MappingProxyType({
+    'Artificial Intelligence': {
+        'subreddits': ['MachineLearning', 'artificial', 'singularity'],
+        'query': 'artificial intelligence OR AI'
+    },
+    'AI': {
+        'subreddits': ['MachineLearning', 'artificial', 'singularity'],
+        'query': 'artificial intelligence OR AI'
+    },
+    'Finance': {
+        'subreddits': ['personalfinance', 'stocks', 'cryptocurrency'],
+        'query': 'finance OR stock market OR investment'
+    },
+    'Gadgets': {
+        'subreddits': ['gadgets', 'Android', 'apple'],
+        'query': 'gadgets OR smartphones OR technology devices'
+    },
+    'Sports': {
+        'subreddits': ['sports', 'nfl', 'nba'],
+        'query': 'sports OR games OR athletics'
     }
+})
+
+# Case-insensitive index of both tables: subtopic -> (parent topic, catalog entry or None)
+_SUBTOPIC_INDEX = MappingProxyType({
+    name.casefold(): (SUBTOPIC_TO_TOPIC.get(name, 'general'), SUBTOPIC_CATALOG.get(name))
+    for name in SUBTOPIC_TO_TOPIC.keys() | SUBTOPIC_CATALOG.keys()
+})
+
+def lookup_subtopic(subtopic_name):
+    """
+    Parent topic and catalog metadata of a subtopic, in one case-insensitive lookup.
     
-    return subtopic_to_topic.get(subtopic_name, 'general')
+    Returns:
+        tuple: (parent topic, 'general' if unknown; {'subreddits', 'query'} or None)
+    """
+    parent_topic, entry = _SUBTOPIC_INDEX.get(subtopic_name.casefold(), ('general', None))
+    if entry is None:
+        return parent_topic, None
+    # Copy: callers store the subreddit list in user documents
+    return parent_topic, {'subreddits': list(entry['subreddits']), 'query': entry['query']}
+
+def find_parent_topic_for_subtopic(subtopic_name):
+    """Find which topic a subtopic belongs to"""
+    return lookup_subtopic(subtopic_name)[0]
 
 
 def convert_old_topic_to_gnews(old_topic):
     """Convert old topic format to GNews format"""
     if isinstance(old_topic, str):
         lowercased = old_topic.lower()
-        
-        # Map common old topics to GNews format
-        topic_mapping = {
-            'technology': 'technology',
-            'technologie': 'technology',
-            'tecnología': 'technology',
-            'تكنولوجيا': 'technology',
-            'business': 'business',
-            'affaires': 'business',
-            'negocios': 'business',
-            'أعمال': 'business',
-            'sports': 'sports',
-            'deportes': 'sports',
-            'رياضة': 'sports',
-            'science': 'science',
-            'ciencia': 'science',
-            'علوم': 'science',
-            'health': 'health',
-            'santé': 'health',
-            'salud': 'health',
-            'صحة': 'health',
-            'entertainment': 'entertainment',
-            'divertissement': 'entertainment',
-            'entretenimiento': 'entertainment',
-            'ترفيه': 'entertainment',
-            'world': 'world',
-            'monde': 'world',
-            'mundo': 'world',
-            'عالم': 'world',
-            'general': 'general',
-            'général': 'general'
-        }
-        
-        return topic_mapping.get(lowercased, 'general')
+        return OLD_TOPIC_TO_GNEWS.get(lowercased, 'general')
     
     return 'general'
 
 def find_subtopic_in_catalog(subtopic_name):
     """Find subtopic metadata in our predefined catalog"""
-    # This would need to be implemented based on your SubtopicsCatalog
-    # For now, return a basic structure
-    
-    # Common subtopic mappings with basic subreddit suggestions
-    subtopic_catalog = {
-        'Artificial Intelligence': {
-            'subreddits': ['MachineLearning', 'artificial', 'singularity'],
-            'query': 'artificial intelligence OR AI'
-        },
-        'AI': {
-            'subreddits': ['MachineLearning', 'artificial', 'singularity'],
-            'query': 'artificial intelligence OR AI'
-        },
-        'Finance': {
-            'subreddits': ['personalfinance', 'stocks', 'cryptocurrency'],
-            'query': 'finance OR stock market OR investment'
-        },
-        'Gadgets': {
-            'subreddits': ['gadgets', 'Android', 'apple'],
-            'query': 'gadgets OR smartphones OR technology devices'
-        },
-        'Sports': {
-            'subreddits': ['sports', 'nfl', 'nba'],
-            'query': 'sports OR games OR athletics'
-        }
-    }
-    
-    return subtopic_catalog.get(subtopic_name, None)
-
+    return lookup_subtopic(subtopic_name)[1]
 
 def get_trending_topics_for_subtopic(subtopic_title, subtopic_query, subreddits, lang="en", country="us", max_articles=10):
     """
@@ -180,7 +199,7 @@ def get_trending_topics_for_subtopic(subtopic_title, subtopic_query, subreddits,
         for subreddit in subreddits[:3]:  # Limit to top 3 subreddits
             try:
                 url = f"https://www.reddit.com/r/{subreddit}/hot.json?limit=5"
-                response = requests.get(url, headers=headers, timeout=10)
+                response = HTTP_SESSION.get(url, headers=headers, timeout=10)
                 response.raise_for_status()
                 data = response.json()
                 
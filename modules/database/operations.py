@@ -7,8 +7,52 @@ logger = logging.getLogger(__name__)
 
 from firebase_admin import firestore
 
+import asyncio
+import threading
 from datetime import datetime
-from modules.content.topics import convert_old_topic_to_gnews, find_parent_topic_for_subtopic, find_subtopic_in_catalog
+import msgspec
+from cachetools import TTLCache
+from modules.utils.schemas import PREFERENCES_V3_TYPE
+from modules.content.topics import convert_old_topic_to_gnews, lookup_subtopic
+
+# Short-lived cache of preferences reads, keyed by user_id. UI polling hits
+# get_user_preferences_from_db every few seconds; a warm container can answer
+# those from memory. Writers below invalidate the entry for their user.
+_PREFS_CACHE = TTLCache(maxsize=4096, ttl=30)
+_PREFS_CACHE_LOCK = threading.Lock()
+
+# Firestore client and preferences collection shared by every call on this
+# instance (created on first use, after main.py has initialized the app)
+_DB = None
+_PREFERENCES_COLLECTION = None
+
+def _get_db():
+    global _DB
+    if _DB is None:
+        _DB = firestore.client()
+    return _DB
+
+def _preferences_collection():
+    global _PREFERENCES_COLLECTION
+    if _PREFERENCES_COLLECTION is None:
+        _PREFERENCES_COLLECTION = _get_db().collection('preferences')
+    return _PREFERENCES_COLLECTION
+
+# Users whose legacy preferences this instance already tried to migrate to v3.0
+_MIGRATION_ATTEMPTS = TTLCache(maxsize=4096, ttl=3600)
+
+def _claim_migration(user_id):
+    """True the first time (per hour and instance) a user's migration is attempted."""
+    with _PREFS_CACHE_LOCK:
+        if user_id in _MIGRATION_ATTEMPTS:
+            return False
+        _MIGRATION_ATTEMPTS[user_id] = True
+        return True
+
+def invalidate_user_preferences_cache(user_id):
+    """Drop the cached preferences for a user (call after any write)."""
+    with _PREFS_CACHE_LOCK:
+        _PREFS_CACHE.pop(user_id, None)
 
 def save_user_preferences_to_db(user_id, preferences_data):
     """
@@ -37,9 +81,6 @@ def save_user_preferences_to_db(user_id, preferences_data):
         dict: Success status and any error
     """
     try:
-        # Use Firestore instead of Realtime Database
-        db_client = firestore.client()
-        
         # Prepare data structure for new nested format
         format_version = preferences_data.get('format_version', '3.0')
         
@@ -53,29 +94,13 @@ def save_user_preferences_to_db(user_id, preferences_data):
                 'updated_at': datetime.now().isoformat()
             }
             
-            # Validate the new nested format
-            if not isinstance(data['preferences'], dict):
-                logger.error(f"Invalid preferences format for user {user_id}: expected dict, got {type(data['preferences'])}")
-                return {"success": False, "error": "Invalid preferences format"}
-            
-            # Validate nested structure
-            for topic_name, topic_subtopics in data['preferences'].items():
-                if not isinstance(topic_subtopics, dict):
-                    logger.error(f"Invalid topic structure for {topic_name}: expected dict, got {type(topic_subtopics)}")
-                    return {"success": False, "error": f"Invalid topic structure for {topic_name}"}
-                
-                for subtopic_name, subtopic_data in topic_subtopics.items():
-                    if not isinstance(subtopic_data, dict):
-                        logger.error(f"Invalid subtopic data for {subtopic_name}: expected dict, got {type(subtopic_data)}")
-                        return {"success": False, "error": f"Invalid subtopic data for {subtopic_name}"}
-                    
-                    if 'subreddits' not in subtopic_data or 'queries' not in subtopic_data:
-                        logger.error(f"Missing required fields in subtopic {subtopic_name}")
-                        return {"success": False, "error": f"Missing required fields in subtopic {subtopic_name}"}
-                    
-                    if not isinstance(subtopic_data['subreddits'], list) or not isinstance(subtopic_data['queries'], list):
-                        logger.error(f"Invalid subreddits/queries format in subtopic {subtopic_name}")
-                        return {"success": False, "error": f"Invalid subreddits/queries format in subtopic {subtopic_name}"}
+            # Validate the new nested format (topics -> subtopics -> sources)
+            # with the same msgspec type the save endpoint decodes its body into
+            try:
+                msgspec.convert(data['preferences'], PREFERENCES_V3_TYPE)
+            except msgspec.ValidationError as e:
+                logger.error(f"Invalid preferences format for user {user_id}: {e}")
+                return {"success": False, "error": f"Invalid preferences format: {e}"}
             
             # Count topics and subtopics for logging
             topics_count = len(data['preferences'])
@@ -100,8 +125,9 @@ def save_user_preferences_to_db(user_id, preferences_data):
             logger.info(f"Preferences saved for user {user_id} in legacy format v{data['format_version']}")
         
         # Save to Firestore
-        doc_ref = db_client.collection('preferences').document(user_id)
+        doc_ref = _preferences_collection().document(user_id)
         doc_ref.set(data)
+        invalidate_user_preferences_cache(user_id)
         
         return {"success": True}
         
@@ -109,43 +135,41 @@ def save_user_preferences_to_db(user_id, preferences_data):
         logger.error(f"Error saving preferences to database: {e}")
         return {"success": False, "error": str(e)}
 
-def update_specific_subjects_in_db(user_id, new_specific_subjects):
+def update_specific_subjects_in_db(user_id, new_specific_subjects, return_all=False):
     """
     Update specific subjects in Firestore Database.
     
+    The subjects are added with an ArrayUnion transform: Firestore skips the
+    ones already stored, so no read is needed and concurrent updates for the
+    same user can't overwrite each other.
+    
     Args:
         user_id (str): User ID
         new_specific_subjects (list): List of new specific subjects to add
+        return_all (bool): Read the document back to return the full list
     
     Returns:
-        dict: Success status and any error
+        dict: Success status and any error, plus "updated_subjects" (all the
+              user's subjects) when return_all is set
     """
     try:
         # Use Firestore instead of Realtime Database
-        db_client = firestore.client()
-        doc_ref = db_client.collection('preferences').document(user_id)
-        
-        # Get current preferences
-        doc = doc_ref.get()
-        current_data = doc.to_dict() if doc.exists else {}
-        
-        # Get existing specific subjects
-        existing_subjects = current_data.get('specific_subjects', [])
-        
-        # Add new subjects (avoid duplicates)
-        for subject in new_specific_subjects:
-            if subject not in existing_subjects:
-                existing_subjects.append(subject)
+        doc_ref = _preferences_collection().document(user_id)
         
         # Update Firestore - use set with merge to handle non-existing documents
         doc_ref.set({
-            'specific_subjects': existing_subjects,
+            'specific_subjects': firestore.ArrayUnion(list(new_specific_subjects)),
             'updated_at': datetime.now().isoformat()
         }, merge=True)
+        invalidate_user_preferences_cache(user_id)
         
         logger.info(f"Updated specific subjects for user {user_id}: {new_specific_subjects}")
         
-        return {"success": True, "updated_subjects": existing_subjects}
+        result = {"success": True}
+        if return_all:
+            doc = doc_ref.get(field_paths=['specific_subjects'])
+            result["updated_subjects"] = (doc.to_dict() or {}).get('specific_subjects', [])
+        return result
 
     except Exception as e:
         logger.error(f"Error updating specific subjects: {e}")
@@ -177,10 +201,35 @@ def get_user_preferences_from_db(user_id):
                   'format_version': '3.0'
               }
     """
+    with _PREFS_CACHE_LOCK:
+        cached = _PREFS_CACHE.get(user_id)
+    if cached is not None:
+        logger.info(f"Preferences cache hit for user {user_id}")
+        return cached
+    
+    preferences = _fetch_user_preferences_from_db(user_id)
+    
+    # Only cache real documents: {} is also what we return on read errors
+    if preferences:
+        with _PREFS_CACHE_LOCK:
+            _PREFS_CACHE[user_id] = preferences
+    
+    return preferences
+
+async def get_user_preferences_from_db_async(user_id):
+    """
+    Async version of get_user_preferences_from_db.
+    
+    The Firestore read runs in a worker thread so callers already inside an
+    event loop can overlap it with their other I/O instead of blocking the loop.
+    """
+    return await asyncio.to_thread(get_user_preferences_from_db, user_id)
+
+def _fetch_user_preferences_from_db(user_id):
+    """Read (and convert if needed) a user's preferences from Firestore, bypassing the cache."""
     try:
         # Use Firestore instead of Realtime Database
-        db_client = firestore.client()
-        doc_ref = db_client.collection('preferences').document(user_id)
+        doc_ref = _preferences_collection().document(user_id)
         doc = doc_ref.get()
         
         if doc.exists:
@@ -228,30 +277,24 @@ def get_user_preferences_from_db(user_id):
                 # Distribute subtopics under their parent topics
                 if isinstance(old_subtopics, dict):
                     for subtopic_name, subtopic_data in old_subtopics.items():
-                        # Find which topic this subtopic belongs to
-                        parent_topic = find_parent_topic_for_subtopic(subtopic_name)
+                        # Parent topic and catalog metadata, in one lookup
+                        parent_topic, subtopic_meta = lookup_subtopic(subtopic_name)
                         
-                        if parent_topic and parent_topic in nested_preferences:
-                            # Convert subtopic data format if needed
+                        if parent_topic in nested_preferences:
+                            # Keep subtopic data already in the right format
                             if isinstance(subtopic_data, dict) and 'subreddits' in subtopic_data and 'queries' in subtopic_data:
                                 nested_preferences[parent_topic][subtopic_name] = subtopic_data
-                            else:
-                                # Create basic structure for legacy data
-                                subtopic_meta = find_subtopic_in_catalog(subtopic_name)
-                                nested_preferences[parent_topic][subtopic_name] = {
-                                    'subreddits': subtopic_meta.get('subreddits', []) if subtopic_meta else [],
-                                    'queries': [subtopic_meta.get('query', subtopic_name)] if subtopic_meta else [subtopic_name]
-                                }
+                                continue
                         else:
                             # If we can't find a parent topic, put it under 'general'
-                            if 'general' not in nested_preferences:
-                                nested_preferences['general'] = {}
-                            
-                            subtopic_meta = find_subtopic_in_catalog(subtopic_name)
-                            nested_preferences['general'][subtopic_name] = {
-                                'subreddits': subtopic_meta.get('subreddits', []) if subtopic_meta else [],
-                                'queries': [subtopic_meta.get('query', subtopic_name)] if subtopic_meta else [subtopic_name]
-                            }
+                            parent_topic = 'general'
+                            nested_preferences.setdefault('general', {})
+                        
+                        # Create basic structure for legacy data
+                        nested_preferences[parent_topic][subtopic_name] = {
+                            'subreddits': subtopic_meta.get('subreddits', []) if subtopic_meta else [],
+                            'queries': [subtopic_meta.get('query', subtopic_name)] if subtopic_meta else [subtopic_name]
+                        }
                 
                 # Create new v3.0 format structure
                 converted_data = {
@@ -269,12 +312,19 @@ def get_user_preferences_from_db(user_id):
                 logger.info(f"  - Topics: {topics_count} items")
                 logger.info(f"  - Subtopics: {subtopics_count} items")
                 
-                # Optionally save the converted format back to database
-                try:
-                    doc_ref.set(converted_data)
-                    logger.info(f"Saved converted v3.0 preferences for user {user_id}")
-                except Exception as e:
-                    logger.warning(f"Failed to save converted preferences for user {user_id}: {e}")
+                # Save the converted format back to database, once per instance
+                # and user: a failed migration is not retried on every read
+                if _claim_migration(user_id):
+                    try:
+                        # Only if the document is unchanged since it was read, so a
+                        # concurrent save isn't overwritten with converted stale data
+                        doc_ref.update(
+                            {**converted_data, 'topics': firestore.DELETE_FIELD, 'subtopics': firestore.DELETE_FIELD},
+                            option=_get_db().write_option(last_update_time=doc.update_time)
+                        )
+                        logger.info(f"Saved converted v3.0 preferences for user {user_id}")
+                    except Exception as e:
+                        logger.warning(f"Failed to save converted preferences for user {user_id}: {e}")
                 
                 return converted_data
             
@@ -301,8 +351,7 @@ def get_user_articles_from_db(user_id):
         dict: Stored articles data or None if not found
     """
     try:
-        db_client = firestore.client()
-        doc_ref = db_client.collection('articles').document(user_id)
+        doc_ref = _get_db().collection('articles').document(user_id)
         doc = doc_ref.get()
         
         if doc.exists:
@@ -315,4 +364,8 @@ def get_user_articles_from_db(user_id):
             
     except Exception as e:
         logger.error(f"Error retrieving articles for user {user_id}: {e}")
-        return None
\ No newline at end of file
+        return None
+
+async def get_user_articles_from_db_async(user_id):
+    """Async version of get_user_articles_from_db (runs the read in a worker thread)."""
+    return await asyncio.to_thread(get_user_articles_from_db, user_id)
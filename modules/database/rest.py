@@ -0,0 +1,93 @@
+"""
+Lecture de collections Firestore via l'API REST (sans canal gRPC)
+"""
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+FIRESTORE_REST_URL = "https://firestore.googleapis.com/v1/projects/{project}/databases/(default)/documents/{collection}"
+FIRESTORE_SCOPE = "https://www.googleapis.com/auth/datastore"
+
+# Documents per listDocuments page
+REST_PAGE_SIZE = 300
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _authorized_session():
+    """AuthorizedSession with the default credentials, created on first use and reused."""
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                import google.auth
+                from google.auth.transport.requests import AuthorizedSession
+                credentials, _ = google.auth.default(scopes=[FIRESTORE_SCOPE])
+                _SESSION = AuthorizedSession(credentials)
+    return _SESSION
+
+
+def _decode_value(value):
+    """Convert a Firestore REST typed value ({"stringValue": ...}) to Python."""
+    if "stringValue" in value:
+        return value["stringValue"]
+    if "integerValue" in value:
+        return int(value["integerValue"])
+    if "doubleValue" in value:
+        return float(value["doubleValue"])
+    if "booleanValue" in value:
+        return value["booleanValue"]
+    if "mapValue" in value:
+        return {k: _decode_value(v) for k, v in value["mapValue"].get("fields", {}).items()}
+    if "arrayValue" in value:
+        return [_decode_value(v) for v in value["arrayValue"].get("values", [])]
+    if "timestampValue" in value:
+        return value["timestampValue"]
+    return None
+
+
+class RestDocument:
+    """Subset of DocumentSnapshot (id, exists, update_time, to_dict) for a REST document."""
+    __slots__ = ("id", "update_time", "_fields")
+    exists = True
+
+    def __init__(self, document):
+        self.id = document["name"].rsplit("/", 1)[-1]
+        self.update_time = document.get("updateTime")
+        self._fields = document.get("fields", {})
+
+    def to_dict(self):
+        return {k: _decode_value(v) for k, v in self._fields.items()}
+
+
+def list_documents_rest(collection, field_paths=None):
+    """
+    Yield every document of a top-level collection, page by page, over HTTPS.
+
+    Args:
+        collection (str): Collection ID
+        field_paths (tuple): Fields to return (all fields if None)
+
+    Yields:
+        RestDocument
+    """
+    project_id = os.environ.get("GOOGLE_CLOUD_PROJECT") or os.environ.get("GCLOUD_PROJECT")
+    url = FIRESTORE_REST_URL.format(project=project_id, collection=collection)
+    params = {"pageSize": REST_PAGE_SIZE}
+    if field_paths:
+        params["mask.fieldPaths"] = list(field_paths)
+
+    session = _authorized_session()
+    while True:
+        response = session.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        page = response.json()
+        for document in page.get("documents", []):
+            yield RestDocument(document)
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            return
+        params["pageToken"] = page_token
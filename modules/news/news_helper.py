@@ -11,10 +11,41 @@ logger = logging.getLogger(__name__)
 
 from datetime import datetime, timedelta
 
-import requests
+import threading
 import time
+from concurrent.futures import Future
 
 from modules.news.serpapi import format_gnews_articles_for_prysm, gnews_search
+from modules.utils.http import HTTP_SESSION
+
+
+class SharedFetches:
+    """
+    Runs each distinct fetch once and shares its result between callers.
+
+    A topic's subtopics often list the same subreddits or queries. Passing one
+    SharedFetches to every get_articles_subtopics_user call of a topic (they run
+    in parallel threads) makes the duplicates wait for the first fetch instead
+    of hitting GNews/Reddit again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures = {}
+
+    def get(self, key, fetch):
+        with self._lock:
+            future = self._futures.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = self._futures[key] = Future()
+        if is_owner:
+            try:
+                future.set_result(fetch())
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
 
 def get_reddit_post_comments(post_permalink, max_comments=3):
     """
@@ -42,7 +73,7 @@ def get_reddit_post_comments(post_permalink, max_comments=3):
         # Reddit comments API endpoint
         url = f"https://www.reddit.com{post_permalink}.json?limit={max_comments}&sort=top"
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = HTTP_SESSION.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         data = response.json()
         
@@ -86,7 +117,7 @@ def get_reddit_post_comments(post_permalink, max_comments=3):
         logger.warning(f"Failed to fetch comments for {post_permalink}: {e}")
         return []
 
-def get_articles_subtopics_user(subtopic_name, subtopic_data, lang="en", country="us", include_comments=False, max_comments=3):
+def get_articles_subtopics_user(subtopic_name, subtopic_data, lang="en", country="us", include_comments=False, max_comments=3, shared_fetches=None):
     """
     Fetch articles and Reddit posts for a user's subtopic.
     
@@ -101,6 +132,7 @@ def get_articles_subtopics_user(subtopic_name, subtopic_data, lang="en", country
         country (str): Country code for GNews API
         include_comments (bool): Whether to include top comments for Reddit posts
         max_comments (int): Maximum number of top comments to fetch per post
+        shared_fetches (SharedFetches): Dedupes GNews/Reddit fetches across the subtopics of a topic
     
     Returns:
         dict: Response with format:
@@ -146,15 +178,24 @@ def get_articles_subtopics_user(subtopic_name, subtopic_data, lang="en", country
             "queries": {}
         }
         
+        fetches = shared_fetches if shared_fetches is not None else SharedFetches()
+        from_date = (datetime.now() - timedelta(hours=24)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        
+        def _search(query, delay=0):
+            # Delay before the request to avoid rate limiting (skipped on shared results)
+            if delay:
+                time.sleep(delay)
+            return gnews_search(
+                query=query,
+                lang=lang,
+                country=country,
+                max_articles=4,
+                from_date=from_date
+            )
+        
         # Step 1: Fetch top 2 articles for the subtopic name itself
         logger.info(f"Fetching articles for subtopic name: {subtopic_name}")
-        subtopic_response = gnews_search(
-            query=subtopic_name,
-            lang=lang,
-            country=country,
-            max_articles=4,
-            from_date=(datetime.now() - timedelta(hours=24)).strftime("%Y-%m-%dT%H:%M:%SZ")
-        )
+        subtopic_response = fetches.get(("gnews", subtopic_name), lambda: _search(subtopic_name))
         
         # Check if quota is exceeded from the first request
         quota_exceeded = False
@@ -170,9 +211,6 @@ def get_articles_subtopics_user(subtopic_name, subtopic_data, lang="en", country
         else:
             logger.warning(f"No articles found for subtopic name: {subtopic_name}")
         
-        # Add delay to avoid rate limiting
-        time.sleep(1)
-        
         # Step 2: Fetch top 2 articles for each query
         queries = subtopic_data.get("queries", [])
         logger.info(f"🔍 SUBTOPIC DEBUG: Fetching articles for {len(queries)} queries: {queries}")
@@ -186,17 +224,7 @@ def get_articles_subtopics_user(subtopic_name, subtopic_data, lang="en", country
                 logger.warning(f"⚠️ SUBTOPIC DEBUG: Skipping query '{query}' due to quota limit")
                 continue
             
-            # Add delay between requests to avoid rate limiting
-            if i > 0:
-                time.sleep(1)
-            
-            query_response = gnews_search(
-                query=query,
-                lang=lang,
-                country=country,
-                max_articles=4,
-                from_date=(datetime.now() - timedelta(hours=24)).strftime("%Y-%m-%dT%H:%M:%SZ")
-            )
+            query_response = fetches.get(("gnews", query), lambda: _search(query, delay=1))
             
             logger.info(f"📊 SUBTOPIC DEBUG: Query '{query}' response success: {query_response.get('success', False)}")
             logger.info(f"📊 SUBTOPIC DEBUG: Query '{query}' articles count: {len(query_response.get('articles', []))}")
@@ -238,38 +266,42 @@ def get_articles_subtopics_user(subtopic_name, subtopic_data, lang="en", country
         
         headers = {"User-Agent": "NewsXTrendingBot/1.0"}
         
+        def _fetch_subreddit(subreddit):
+            # Use 'top' endpoint with time filter for last 24 hours
+            url = f"https://www.reddit.com/r/{subreddit}/top.json?t=day&limit=2"
+            response = HTTP_SESSION.get(url, headers=headers, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            
+            posts = []
+            if "data" in data and "children" in data["data"]:
+                for post in data["data"]["children"]:
+                    post_data = post.get("data", {})
+                    
+                    # Check if post is from last 24 hours
+                    created_utc = post_data.get("created_utc", 0)
+                    post_time = datetime.fromtimestamp(created_utc)
+                    time_diff = datetime.now() - post_time
+                    
+                    if time_diff.total_seconds() <= 86400:  # 24 hours
+                        posts.append({
+                            "title": post_data.get("title", ""),
+                            "score": post_data.get("score", 0),
+                            "url": f"https://reddit.com{post_data.get('permalink', '')}",
+                            "subreddit": subreddit,
+                            "created_utc": created_utc,
+                            "num_comments": post_data.get("num_comments", 0),
+                            "author": post_data.get("author", ""),
+                            "selftext": post_data.get("selftext", "")  # Return full selftext
+                        })
+            return posts[:2]  # Top 2 posts
+        
         for subreddit in subreddits:
             logger.info(f"Fetching posts from r/{subreddit}")
             try:
-                # Use 'top' endpoint with time filter for last 24 hours
-                url = f"https://www.reddit.com/r/{subreddit}/top.json?t=day&limit=2"
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                
-                posts = []
-                if "data" in data and "children" in data["data"]:
-                    for post in data["data"]["children"]:
-                        post_data = post.get("data", {})
-                        
-                        # Check if post is from last 24 hours
-                        created_utc = post_data.get("created_utc", 0)
-                        post_time = datetime.fromtimestamp(created_utc)
-                        time_diff = datetime.now() - post_time
-                        
-                        if time_diff.total_seconds() <= 86400:  # 24 hours
-                            posts.append({
-                                "title": post_data.get("title", ""),
-                                "score": post_data.get("score", 0),
-                                "url": f"https://reddit.com{post_data.get('permalink', '')}",
-                                "subreddit": subreddit,
-                                "created_utc": created_utc,
-                                "num_comments": post_data.get("num_comments", 0),
-                                "author": post_data.get("author", ""),
-                                "selftext": post_data.get("selftext", "")  # Return full selftext
-                            })
-                
-                result["subreddits"][subreddit] = posts[:2]  # Top 2 posts
+                posts = fetches.get(("reddit", subreddit), lambda: _fetch_subreddit(subreddit))
+                # Copy the posts: comments are attached per subtopic below
+                result["subreddits"][subreddit] = [dict(post) for post in posts]
                 logger.info(f"Found {len(result['subreddits'][subreddit])} posts from r/{subreddit}")
                 
             except Exception as e:
@@ -457,7 +489,7 @@ def get_articles_subtopics_user_with_comments(subtopic_name, subtopic_data, lang
             try:
                 # Use 'top' endpoint with time filter for last 24 hours
                 url = f"https://www.reddit.com/r/{subreddit}/top.json?t=day&limit=2"
-                response = requests.get(url, headers=headers, timeout=10)
+                response = HTTP_SESSION.get(url, headers=headers, timeout=10)
                 response.raise_for_status()
                 data = response.json()
                 
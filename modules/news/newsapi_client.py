@@ -3,10 +3,10 @@ Module NewsAPI pour l'intégration dans Prysm Backend
 Basé sur la documentation: https://newsapi.org/docs
 """
 
-import requests
 import logging
 from datetime import datetime, timedelta
 from ..config import get_newsapi_key
+from ..utils.http import HTTP_SESSION
 
 logger = logging.getLogger(__name__)
 
@@ -59,7 +59,7 @@ class NewsAPIClient:
         
         try:
             url = f"{self.base_url}/everything"
-            response = requests.get(url, params=params, timeout=30)
+            response = HTTP_SESSION.get(url, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -152,7 +152,7 @@ class NewsAPIClient:
         
         try:
             url = f"{self.base_url}/top-headlines"
-            response = requests.get(url, params=params, timeout=30)
+            response = HTTP_SESSION.get(url, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -5,6 +5,7 @@ import sys
 sys.stdout.write("--- main.py PYTHON SCRIPT STARTED (STDOUT) ---\n")
 sys.stderr.write("--- main.py PYTHON SCRIPT STARTED (STDERR) ---\n")
 print("--- main.py PYTHON SCRIPT STARTED (PRINT) ---")
+import functools
 import time
 # Configure logging AS EARLY AS POSSIBLE
 import logging
@@ -13,9 +14,27 @@ logger = logging.getLogger(__name__)
 # Welcome to Cloud Functions for Firebase for Python!
 # Implementation of the Prysm backend for news aggregation
 from ..config import get_serpapi_key, get_gnews_key, GNEWS_BASE_URL
+from ..utils.http import HTTP_SESSION
 
-from datetime import datetime, timedelta
-import requests
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+
+# Pause between the GNews attempt and its US retry
+GNEWS_RETRY_DELAY = 1.5
+
+# Map GNews categories to SerpAPI topic tokens.
+# These tokens are for US English - different countries/languages may have different tokens.
+# Built once at import (read-only) instead of on every gnews_top_headlines call.
+CATEGORY_TOPIC_TOKENS = MappingProxyType({
+    "general": None,  # No topic token = general homepage
+    "world": "CAAqJggKIiBDQkFTRWdvSUwyMHZNRGx1YTJJZ0FTb0pFZ0ptQWpYUUFRUUFQUQ",  # World
+    "business": "CAAqJggKIiBDQkFTRWdvSUwyMHZNRGx6TVdZU0FTb0pFZ0ptQWpYUUFRUUFQUQ",  # Business
+    "technology": "CAAqJggKIiBDQkFTRWdvSUwyMHZNRGRqTVhZU0FTb0pFZ0ptQWpYUUFRUUFQUQ",  # Technology
+    "entertainment": "CAAqJggKIiBDQkFTRWdvSUwyMHZNREpxYW5RU0FTb0pFZ0ptQWpYUUFRUUFQUQ",  # Entertainment
+    "sports": "CAAqJggKIiBDQkFTRWdvSUwyMHZNRFp1ZEdvU0FTb0pFZ0ptQWpYUUFRUUFQUQ",  # Sports
+    "science": "CAAqJggKIiBDQkFTRWdvSUwyMHZNRGRqTVhZU0FTb0pFZ0ptQWpYUUFRUUFQUQ",  # Science (using tech token as fallback)
+    "health": "CAAqIQgKIhtDQkFTRGdvSUwyMHZNR3Q0ZGpVU0FTb0pFZ0EQAg"  # Health
+})
 
 def serpapi_google_news_search(query, gl="us", hl="en", max_articles=10, time_period=None, topic_token=None):
     """
@@ -120,8 +139,6 @@ def serpapi_google_news_search(query, gl="us", hl="en", max_articles=10, time_pe
         """Helper function to try NewsAPI search for 48h articles."""
         try:
             from ..config import get_newsapi_key
-            import requests
-            from datetime import datetime, timedelta
             
             logger.info(f"🔍 {attempt_name}: '{query}' | {lang} | Max: {articles_needed}")
             
@@ -144,7 +161,7 @@ def serpapi_google_news_search(query, gl="us", hl="en", max_articles=10, time_pe
                 'pageSize': min(articles_needed, 100)  # NewsAPI max is 100
             }
             
-            response = requests.get(url, params=params, timeout=30)
+            response = HTTP_SESSION.get(url, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -200,10 +217,12 @@ def serpapi_google_news_search(query, gl="us", hl="en", max_articles=10, time_pe
         
         # Step 1a: Try GNews with original country
         gnews_articles = _try_gnews_search(query, gl, hl, max_articles, time_period, "GNews (original)")
-        time.sleep(1.5)
         # Step 1b: If no results and original country is not "us", try with "us"
         if len(gnews_articles) == 0:
             logger.info(f"🔄 GNews original country '{gl}' returned no results, trying with US...")
+            # Space the two Google News requests; a first attempt that found
+            # articles returns (or moves on to SerpAPI) without waiting
+            time.sleep(GNEWS_RETRY_DELAY)
             gnews_articles_us = _try_gnews_search(query, None, hl, max_articles, time_period, "GNews (US fallback)")
             gnews_articles = gnews_articles_us
             
@@ -322,7 +341,7 @@ def serpapi_google_news_search(query, gl="us", hl="en", max_articles=10, time_pe
         logger.info(f"🏷️ Topic token: {topic_token}")
     
     try:
-        response = requests.get(url, params=params, timeout=30)
+        response = HTTP_SESSION.get(url, params=params, timeout=30)
         
         if response.status_code == 200:
             data_nofilter = response.json()
@@ -497,6 +516,36 @@ def serpapi_google_news_search(query, gl="us", hl="en", max_articles=10, time_pe
             }
 
 
+@functools.lru_cache(maxsize=512)
+def _parse_from_date(from_date):
+    """Parsed ISO from_date (trailing 'Z' accepted), or None if it is not a valid date."""
+    if not isinstance(from_date, str):
+        return None
+    try:
+        return datetime.fromisoformat(from_date.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+def _from_date_to_period(from_date):
+    """
+    SerpAPI time period ('h', 'd' or 'w') covering from_date, or None for all time.
+    Parsing is cached; the age is measured against the current time on every call.
+    """
+    if not from_date:
+        return None
+    from_dt = _parse_from_date(from_date)
+    if from_dt is None:
+        logger.warning(f"⚠️ Could not parse from_date '{from_date}', using all time")
+        return None
+    diff = datetime.now(from_dt.tzinfo) - from_dt
+    if diff <= timedelta(hours=1):
+        return "h"  # Last hour
+    if diff <= timedelta(days=1):
+        return "d"  # Last day
+    if diff <= timedelta(days=7):
+        return "w"  # Last week
+    return None  # Older than a week: all time
+
 def gnews_search(query, lang="en", country="us", max_articles=10, from_date=None, to_date=None, nullable=None):
     """
     Search for news articles using SerpAPI Google News API (updated from GNews).
@@ -519,24 +568,12 @@ def gnews_search(query, lang="en", country="us", max_articles=10, from_date=None
     gl = country  # Google's gl parameter
     hl = lang     # Google's hl parameter
     
-    # Determine time period based on from_date (approximate conversion)
+    # Any parseable from_date restricts the search to the last day
     time_period = None
     if from_date:
-        try:
-            from datetime import datetime, timedelta
-            from_dt = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-            now = datetime.now(from_dt.tzinfo)
-            diff = now - from_dt
-            
-            if diff <= timedelta(hours=1):
-                time_period = "h"  # Last hour
-            elif diff <= timedelta(days=1):
-                time_period = "d"  # Last day
-            elif diff <= timedelta(days=7):
-                time_period = "w"  # Last week
+        if _parse_from_date(from_date) is not None:
             time_period = "d"
-            # If older than a week, don't set time_period (all time)
-        except:
+        else:
             logger.warning(f"⚠️ Could not parse from_date '{from_date}', using all time")
     
     # Call SerpAPI Google News
@@ -594,61 +631,25 @@ def gnews_top_headlines(category="general", lang="en", country="us", max_article
     if query:
         return gnews_search(query, lang, country, max_articles, from_date, to_date)
     
-    # Map GNews categories to SerpAPI topic tokens
-    # These tokens are for US English - different countries/languages may have different tokens
-    category_topic_tokens = {
-        "general": None,  # No topic token = general homepage
-        "world": "CAAqJggKIiBDQkFTRWdvSUwyMHZNRGx1YTJJZ0FTb0pFZ0ptQWpYUUFRUUFQUQ",  # World
-        "business": "CAAqJggKIiBDQkFTRWdvSUwyMHZNRGx6TVdZU0FTb0pFZ0ptQWpYUUFRUUFQUQ",  # Business
-        "technology": "CAAqJggKIiBDQkFTRWdvSUwyMHZNRGRqTVhZU0FTb0pFZ0ptQWpYUUFRUUFQUQ",  # Technology
-        "entertainment": "CAAqJggKIiBDQkFTRWdvSUwyMHZNREpxYW5RU0FTb0pFZ0ptQWpYUUFRUUFQUQ",  # Entertainment
-        "sports": "CAAqJggKIiBDQkFTRWdvSUwyMHZNRFp1ZEdvU0FTb0pFZ0ptQWpYUUFRUUFQUQ",  # Sports
-        "science": "CAAqJggKIiBDQkFTRWdvSUwyMHZNRGRqTVhZU0FTb0pFZ0ptQWpYUUFRUUFQUQ",  # Science (using tech token as fallback)
-        "health": "CAAqIQgKIhtDQkFTRGdvSUwyMHZNR3Q0ZGpVU0FTb0pFZ0EQAg"  # Health
-    }
-    
-    # Get the topic token for the requested category
-    topic_token = category_topic_tokens.get(category.lower())
+    # Get the topic token for the requested category. "general" and unknown
+    # categories have none, which fetches the homepage headlines.
+    topic_token = CATEGORY_TOPIC_TOKENS.get(category.lower())
     
     # Determine time period based on from_date (approximate conversion)
-    time_period = None
-    if from_date:
-        try:
-            from datetime import datetime, timedelta
-            from_dt = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-            now = datetime.now(from_dt.tzinfo)
-            diff = now - from_dt
-            
-            if diff <= timedelta(hours=1):
-                time_period = "h"  # Last hour
-            elif diff <= timedelta(days=1):
-                time_period = "d"  # Last day
-            elif diff <= timedelta(days=7):
-                time_period = "w"  # Last week
-        except:
-            logger.warning(f"⚠️ Could not parse from_date '{from_date}', using all time")
+    time_period = _from_date_to_period(from_date)
     
-    if category.lower() == "general" or topic_token is None:
-        # For general news, get the homepage headlines
+    if topic_token is None:
         logger.info(f"📰 Fetching general homepage headlines")
-        result = serpapi_google_news_search(
-            query=None,
-            gl=gl,
-            hl=hl,
-            max_articles=max_articles,
-            time_period=time_period
-        )
     else:
-        # For specific categories, use the topic token
         logger.info(f"📰 Fetching {category} headlines using topic token: {topic_token}")
-        result = serpapi_google_news_search(
-            query=None,
-            gl=gl,
-            hl=hl,
-            max_articles=max_articles,
-            time_period=time_period,
-            topic_token=topic_token
-        )
+    result = serpapi_google_news_search(
+        query=None,
+        gl=gl,
+        hl=hl,
+        max_articles=max_articles,
+        time_period=time_period,
+        topic_token=topic_token
+    )
     
     # Add category information to the response
     if result.get('success'):
@@ -657,6 +658,21 @@ def gnews_top_headlines(category="general", lang="en", country="us", max_article
     
     return result
 
+def _format_gnews_article(article):
+    """One article in Prysm format, with empty fields left out."""
+    # Defaults only apply to missing keys; empty or null values are dropped
+    source = article.get('source', {}) or {}
+    fields = (
+        ('title', (article.get('title') or '').strip()),
+        ('link', (article.get('url', '#') or '').strip()),
+        ('source', source.get('name', 'Unknown Source')),
+        ('published', article.get('publishedAt') or ''),
+        ('snippet', (article.get('description') or '').strip()),
+        ('thumbnail', article.get('image') or ''),
+        ('content', (article.get('content') or '').strip()),
+    )
+    return {k: v for k, v in fields if v and v != 'No Title'}
+
 def format_gnews_articles_for_prysm(gnews_response):
     """
     Convert GNews API response to Prysm-compatible format.
@@ -670,24 +686,11 @@ def format_gnews_articles_for_prysm(gnews_response):
     if not gnews_response.get("success") or not gnews_response.get("articles"):
         return []
     
-    formatted_articles = []
-    
-    for article in gnews_response["articles"]:
-        formatted_article = {
-            'title': article.get('title', '').strip(),
-            'link': article.get('url', '#').strip(),
-            'source': article.get('source', {}).get('name', 'Unknown Source'),
-            'published': article.get('publishedAt', ''),
-            'snippet': article.get('description', '').strip(),
-            'thumbnail': article.get('image', ''),
-            'content': article.get('content', '').strip()
-        }
-        
-        # Clean empty fields
-        formatted_article = {k: v for k, v in formatted_article.items() if v and v != 'No Title'}
-        
-        if formatted_article:  # Only add non-empty articles
-            formatted_articles.append(formatted_article)
+    formatted_articles = [
+        formatted_article
+        for formatted_article in map(_format_gnews_article, gnews_response["articles"])
+        if formatted_article  # Only add non-empty articles
+    ]
     
     logger.info(f"Formatted {len(formatted_articles)} articles for Prysm")
     return formatted_articles
@@ -721,7 +724,6 @@ def _parse_serpapi_story(story):
                 logger.info(f"🔍 Attempting to extract summary for: {link}")
                 
                 from newspaper import Article
-                import requests
                 
                 # Create newspaper article object
                 article = Article(link)
@@ -824,7 +826,6 @@ Summary:"""
     
 
 import re
-from datetime import datetime, timedelta, timezone
 import dateutil.parser
 import copy
 
@@ -0,0 +1,179 @@
+"""
+Envoi des mises à jour utilisateur planifiées et des jobs longs vers des files Cloud Tasks
+"""
+import logging
+import os
+import re
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Deployment settings. Without PROCESS_USER_UPDATE_URL and TASKS_SERVICE_ACCOUNT
+# the scheduler keeps running the updates itself in a thread pool.
+PROCESS_USER_UPDATE_URL = os.environ.get("PROCESS_USER_UPDATE_URL")
+USER_UPDATE_QUEUE = os.environ.get("USER_UPDATE_QUEUE", "user-updates")
+USER_UPDATE_QUEUE_LOCATION = os.environ.get("USER_UPDATE_QUEUE_LOCATION", "us-central1")
+TASKS_SERVICE_ACCOUNT = os.environ.get("TASKS_SERVICE_ACCOUNT")
+
+# How long Cloud Tasks waits for process_user_update before treating the attempt
+# as failed and retrying. Must cover the function's 900 s timeout, or a long
+# update is retried while still running (pipeline and push sent twice).
+# Cloud Tasks allows at most 1800 s.
+USER_UPDATE_DISPATCH_DEADLINE_SECONDS = 930
+
+# Background jobs too long for a Pub/Sub-triggered function (540 s at most) are
+# POSTed to main.run_background_job_task instead (see modules.scheduling.jobs)
+BACKGROUND_JOB_URL = os.environ.get("BACKGROUND_JOB_URL")
+BACKGROUND_JOB_QUEUE = os.environ.get("BACKGROUND_JOB_QUEUE", "background-jobs")
+
+# Must cover run_background_job_task's 1770 s timeout, like the user updates
+# above; 1800 s is the Cloud Tasks maximum.
+BACKGROUND_JOB_DISPATCH_DEADLINE_SECONDS = 1800
+
+# Characters allowed in a task ID
+_TASK_ID_INVALID_CHARS = re.compile(r"[^A-Za-z0-9_-]")
+
+_CLIENT = None
+_AUTH_REQUEST = None
+
+
+def cloud_tasks_enabled():
+    """Whether scheduled updates should be dispatched through Cloud Tasks."""
+    # process_user_update only accepts tasks signed for TASKS_SERVICE_ACCOUNT
+    return bool(PROCESS_USER_UPDATE_URL and TASKS_SERVICE_ACCOUNT)
+
+
+def background_job_tasks_enabled():
+    """Whether long background jobs can be dispatched through Cloud Tasks."""
+    return bool(BACKGROUND_JOB_URL and TASKS_SERVICE_ACCOUNT)
+
+
+def is_cloud_tasks_request(req, audience):
+    """
+    Whether the request carries an OIDC token issued to TASKS_SERVICE_ACCOUNT
+    for audience, as attached by Cloud Tasks to the tasks created here.
+
+    Args:
+        req (https_fn.Request): Incoming request
+        audience (str): URL the token must have been issued for
+
+    Returns:
+        bool: False when the token is missing, invalid or for another account
+    """
+    global _AUTH_REQUEST
+    if not TASKS_SERVICE_ACCOUNT or not audience:
+        return False
+    scheme, _, token = req.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+
+    from google.auth.exceptions import GoogleAuthError
+    from google.auth.transport import requests as google_requests
+    from google.oauth2 import id_token
+
+    if _AUTH_REQUEST is None:
+        _AUTH_REQUEST = google_requests.Request()
+    try:
+        claims = id_token.verify_oauth2_token(token, _AUTH_REQUEST, audience=audience)
+    except (ValueError, GoogleAuthError) as e:
+        logger.warning("Rejected Cloud Tasks request: %s", e)
+        return False
+    return claims.get("email") == TASKS_SERVICE_ACCOUNT and bool(claims.get("email_verified"))
+
+
+def _tasks_client():
+    """Cloud Tasks client, created on first use."""
+    global _CLIENT
+    if _CLIENT is None:
+        from google.cloud import tasks_v2
+        _CLIENT = tasks_v2.CloudTasksClient()
+    return _CLIENT
+
+
+def _create_task(queue, task_id, url, payload, dispatch_deadline_seconds):
+    """
+    Create a named task POSTing payload to url with the OIDC token of
+    TASKS_SERVICE_ACCOUNT (checked by is_cloud_tasks_request).
+
+    Returns:
+        str: Name of the task (the existing one if a task with this ID was already created)
+    """
+    from google.api_core.exceptions import AlreadyExists
+
+    client = _tasks_client()
+    project_id = os.environ.get("GOOGLE_CLOUD_PROJECT") or os.environ.get("GCLOUD_PROJECT")
+    queue_path = client.queue_path(project_id, USER_UPDATE_QUEUE_LOCATION, queue)
+    task = {
+        "name": f"{queue_path}/tasks/{_TASK_ID_INVALID_CHARS.sub('_', task_id)}",
+        "http_request": {
+            "http_method": "POST",
+            "url": url,
+            "headers": {"Content-Type": "application/json"},
+            "body": orjson.dumps(payload),
+            "oidc_token": {
+                "service_account_email": TASKS_SERVICE_ACCOUNT,
+                "audience": url,
+            },
+        },
+        "dispatch_deadline": {"seconds": dispatch_deadline_seconds},
+    }
+    try:
+        return client.create_task(parent=queue_path, task=task).name
+    except AlreadyExists:
+        logger.info("Task already exists", extra={"task": task["name"]})
+        return task["name"]
+
+
+def enqueue_user_update(user_id, presenter_name, language, voice_id, scheduled_time):
+    """
+    Create a Cloud Tasks task that POSTs one user's update to process_user_update.
+
+    Args:
+        user_id (str): User to update
+        presenter_name (str): Presenter name for the podcast
+        language (str): Content language
+        voice_id (str): Voice ID for TTS
+        scheduled_time (str): ISO time of the scheduler run that triggered it
+
+    Returns:
+        str: Name of the task (the existing one if this update was already enqueued)
+    """
+    # Named after the user and the scheduler run: enqueueing the same update
+    # again (e.g. a retried scheduler run) is rejected by Cloud Tasks
+    task_name = _create_task(
+        USER_UPDATE_QUEUE,
+        f"user-update-{user_id}-{scheduled_time}",
+        PROCESS_USER_UPDATE_URL,
+        {
+            "user_id": user_id,
+            "presenter_name": presenter_name,
+            "language": language,
+            "voice_id": voice_id,
+            "scheduled_time": scheduled_time,
+        },
+        USER_UPDATE_DISPATCH_DEADLINE_SECONDS,
+    )
+    logger.info("User update enqueued", extra={"user_id": user_id, "task": task_name})
+    return task_name
+
+
+def enqueue_background_job(message):
+    """
+    Create a Cloud Tasks task that POSTs a background job to run_background_job_task.
+
+    Args:
+        message (dict): Job message built by modules.scheduling.jobs.enqueue_job
+
+    Returns:
+        str: Name of the task
+    """
+    task_name = _create_task(
+        BACKGROUND_JOB_QUEUE,
+        f"job-{message['job_id']}",
+        BACKGROUND_JOB_URL,
+        message,
+        BACKGROUND_JOB_DISPATCH_DEADLINE_SECONDS,
+    )
+    logger.info("Background job enqueued", extra={"job_id": message["job_id"], "task": task_name})
+    return task_name
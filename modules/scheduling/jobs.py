@@ -0,0 +1,180 @@
+"""
+Traitements longs exécutés en arrière-plan via Pub/Sub ou Cloud Tasks
+"""
+import logging
+import os
+import secrets
+from datetime import datetime
+
+import orjson
+
+from modules.database.operations import _get_db
+from modules.scheduling.cloud_tasks import background_job_tasks_enabled, enqueue_background_job
+from modules.utils.http import now_iso
+
+logger = logging.getLogger(__name__)
+
+# Topic consumed by main.run_background_job, and the collection where each
+# job's status (and result once done) is written for the client to poll.
+JOBS_TOPIC = "background-jobs"
+JOBS_COLLECTION = "background_jobs"
+
+# Jobs that can outlast a Pub/Sub-triggered function (540 s at most). They are
+# POSTed through Cloud Tasks to main.run_background_job_task instead.
+CLOUD_TASKS_JOB_KINDS = frozenset({"complete_user_media_twin_script"})
+
+# Result fields left out of the job document. The artifact is stored elsewhere
+# (aifeed collection, Storage), and inlining it could push the document past
+# Firestore's 1 MiB limit.
+JOB_RESULT_OMITTED_FIELDS = {
+    "complete_report": ("reports",),
+    "complete_user_media_twin_script": ("script",),
+}
+
+_PUBLISHER = None
+_TOPIC_PATH = None
+
+
+def _publisher():
+    """Publisher client and topic path, created on the first enqueue."""
+    global _PUBLISHER, _TOPIC_PATH
+    if _PUBLISHER is None:
+        from google.cloud import pubsub_v1
+        project_id = os.environ.get("GOOGLE_CLOUD_PROJECT") or os.environ.get("GCLOUD_PROJECT")
+        _PUBLISHER = pubsub_v1.PublisherClient()
+        _TOPIC_PATH = _PUBLISHER.topic_path(project_id, JOBS_TOPIC)
+    return _PUBLISHER, _TOPIC_PATH
+
+
+def _refresh_articles(user_id):
+    from modules.scheduling.tasks import refresh_articles
+    return refresh_articles(user_id)
+
+
+def _complete_report(user_id):
+    from modules.scheduling.tasks import get_complete_report
+    return get_complete_report(user_id)
+
+
+def _complete_user_media_twin_script(user_id, presenter_name="Alex", language="fr"):
+    from firebase_admin import storage
+    from modules.content.podcast import generate_complete_user_media_twin_script
+    result = generate_complete_user_media_twin_script(
+        user_id=user_id,
+        presenter_name=presenter_name,
+        language=language
+    )
+    if result.get("success"):
+        # The job document only points to the script (see JOB_RESULT_OMITTED_FIELDS)
+        filename = f"media_twin_scripts/{user_id}/script_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+        blob = storage.bucket().blob(filename)
+        blob.upload_from_string(result["script"], content_type='text/plain; charset=utf-8')
+        blob.make_public()
+        result["script_storage_url"] = blob.public_url
+    return result
+
+
+JOB_HANDLERS = {
+    "refresh_articles": _refresh_articles,
+    "complete_report": _complete_report,
+    "complete_user_media_twin_script": _complete_user_media_twin_script,
+}
+
+
+def enqueue_job(kind, user_id, **params):
+    """
+    Record a queued job in Firestore and publish it to the jobs topic, or to
+    the Cloud Tasks queue for CLOUD_TASKS_JOB_KINDS.
+
+    Args:
+        kind (str): Key of JOB_HANDLERS
+        user_id (str): User the job runs for
+        **params: Extra keyword arguments for the handler
+
+    Returns:
+        dict: {"success": True, "job_id": ..., "status": "queued"}
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    use_cloud_tasks = kind in CLOUD_TASKS_JOB_KINDS
+    if use_cloud_tasks and not background_job_tasks_enabled():
+        raise RuntimeError(f"{kind} jobs need BACKGROUND_JOB_URL and TASKS_SERVICE_ACCOUNT")
+
+    job_id = secrets.token_hex(12)
+    _get_db().collection(JOBS_COLLECTION).document(job_id).set({
+        "kind": kind,
+        "user_id": user_id,
+        "status": "queued",
+        "created_at": now_iso(),
+    })
+
+    message = {"job_id": job_id, "kind": kind, "user_id": user_id, "params": params}
+    if use_cloud_tasks:
+        enqueue_background_job(message)
+    else:
+        publisher, topic_path = _publisher()
+        # Only wait for the broker to accept the message, not for the job itself
+        publisher.publish(
+            topic_path,
+            orjson.dumps(message),
+            kind=kind,
+            user_id=user_id,
+        ).result(timeout=10)
+
+    logger.info("Job queued", extra={"job_id": job_id, "kind": kind, "user_id": user_id})
+    return {
+        "success": True,
+        "job_id": job_id,
+        "kind": kind,
+        "status": "queued",
+        "status_collection": JOBS_COLLECTION,
+    }
+
+
+def run_job(message):
+    """
+    Run a job queued by enqueue_job and store its outcome.
+
+    The job document gets the handler's result without JOB_RESULT_OMITTED_FIELDS.
+    If that write fails, the job is still marked "failed".
+
+    Args:
+        message (dict): Decoded Pub/Sub message or Cloud Tasks body
+
+    Returns:
+        dict: Result of the job handler
+    """
+    job_id = message["job_id"]
+    kind = message["kind"]
+    user_id = message["user_id"]
+    job_ref = _get_db().collection(JOBS_COLLECTION).document(job_id)
+
+    job_ref.update({"status": "running", "started_at": now_iso()})
+    logger.info("Job started", extra={"job_id": job_id, "kind": kind, "user_id": user_id})
+
+    try:
+        result = JOB_HANDLERS[kind](user_id, **message.get("params", {}))
+    except Exception as e:
+        logger.error("Job %s failed: %s", job_id, e, extra={"kind": kind, "user_id": user_id})
+        job_ref.update({"status": "failed", "error": str(e), "finished_at": now_iso()})
+        return {"success": False, "error": str(e)}
+
+    omitted = JOB_RESULT_OMITTED_FIELDS.get(kind, ())
+    try:
+        job_ref.update({
+            "status": "done" if result.get("success") else "failed",
+            "result": {k: v for k, v in result.items() if k not in omitted},
+            "finished_at": now_iso(),
+        })
+    except Exception as e:
+        logger.error("Could not store the result of job %s: %s", job_id, e, extra={"kind": kind, "user_id": user_id})
+        job_ref.update({"status": "failed", "error": f"Could not store the job result: {e}", "finished_at": now_iso()})
+        return {"success": False, "error": str(e)}
+    logger.info("Job finished", extra={"job_id": job_id, "kind": kind, "success": result.get("success")})
+    return result
+
+
+def get_job_status(job_id):
+    """Return the job document, or None if it does not exist."""
+    doc = _get_db().collection(JOBS_COLLECTION).document(job_id).get()
+    return doc.to_dict() if doc.exists else None
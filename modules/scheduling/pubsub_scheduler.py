@@ -1,6 +1,7 @@
-import json
 import logging
 from datetime import datetime
+
+import orjson
 from google.cloud import pubsub_v1
 from firebase_admin import firestore
 
@@ -54,10 +55,9 @@ class PubSubScheduler:
                     }
                     
                     # Publish message to Pub/Sub
-                    message_json = json.dumps(message_data)
                     future = self.publisher.publish(
                         self.topic_path, 
-                        message_json.encode('utf-8'),
+                        orjson.dumps(message_data),
                         user_id=user_id,  # Message attributes for filtering
                         timestamp=current_time.isoformat()
                     )
@@ -105,8 +105,7 @@ def process_user_update_pubsub(cloud_event):
     
     try:
         # Decode Pub/Sub message
-        pubsub_message = base64.b64decode(cloud_event.data['message']['data']).decode('utf-8')
-        message_data = json.loads(pubsub_message)
+        message_data = orjson.loads(base64.b64decode(cloud_event.data['message']['data']))
         
         user_id = message_data.get('user_id')
         presenter_name = message_data.get('presenter_name', 'Alex')
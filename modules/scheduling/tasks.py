@@ -11,8 +11,10 @@ from firebase_admin import firestore
 from datetime import datetime, timedelta
 
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from modules.utils.country import get_user_country_from_db
+from modules.utils.http import invalidate_user_response, now_iso
 
 
 from modules.content.generation import get_complete_topic_report, get_topic_posts
@@ -20,13 +22,19 @@ from modules.database.operations import get_user_articles_from_db, get_user_pref
 from modules.notifications.push import send_push_notification
 logger.info("--- main.py: Logging configured ---")
 
+# Topic reports generated at once by get_complete_report. Each one fans out its
+# own LLM calls (REPORT_LLM_WORKERS): 8 x 6 = 48 fits the shared OpenAI client's
+# 50 connections. Beyond that (several reports at once), calls queue on the pool.
+COMPLETE_REPORT_TOPIC_WORKERS = 8
 
-def update(user_id, presenter_name="Alex", language="en", voice_id="cmudN4ihcI42n48urXgc"):
+
+def update_stages(user_id, presenter_name="Alex", language="en", voice_id="cmudN4ihcI42n48urXgc"):
     """
-    Complete user update pipeline that chains three operations:
+    Run the user update pipeline, yielding each stage's summary as soon as the
+    stage completes:
     1. Refresh articles for the user
     2. Generate complete report
-    3. Generate simple podcast
+    3. Generate simple podcast (concurrently with 2)
     4. Send push notification
     
     Args:
@@ -35,89 +43,113 @@ def update(user_id, presenter_name="Alex", language="en", voice_id="cmudN4ihcI42
         language (str): Language for the content ('en', 'fr', etc.)
         voice_id (str): ElevenLabs voice ID for TTS
     
-    Returns:
-        dict: Complete result with all operation results
+    Yields:
+        tuple: (result key, stage summary dict), e.g. ("refresh_result", {...})
+    
+    Raises:
+        Exception: If one of the first three stages fails
     """
-    try:
-        logger.info(f"🚀 Starting complete update pipeline for user: {user_id}")
-        
-        # Step 1: Refresh articles
-        logger.info(f"📰 Step 1/4: Refreshing articles for user {user_id}")
-        refresh_result = refresh_articles(user_id)
-        
-        if not refresh_result.get("success"):
-            raise Exception(f"Failed to refresh articles: {refresh_result.get('error', 'Unknown error')}")
-        
-        logger.info(f"✅ Articles refreshed: {refresh_result.get('total_articles_saved', 0)} articles")
-        
-        # Step 2: Generate complete report
-        logger.info(f"📊 Step 2/4: Generating complete report for user {user_id}")
-        report_result = get_complete_report(user_id)
-        
-        if not report_result.get("success"):
-            raise Exception(f"Failed to generate complete report: {report_result.get('error', 'Unknown error')}")
-        
-        logger.info(f"✅ Complete report generated")
-        
-        # Step 3: Generate simple podcast
+    logger.info(f"🚀 Starting complete update pipeline for user: {user_id}")
+    
+    # Step 1: Refresh articles
+    logger.info(f"📰 Step 1/4: Refreshing articles for user {user_id}")
+    refresh_result = refresh_articles(user_id)
+    
+    if not refresh_result.get("success"):
+        raise Exception(f"Failed to refresh articles: {refresh_result.get('error', 'Unknown error')}")
+    
+    logger.info(f"✅ Articles refreshed: {refresh_result.get('total_articles_saved', 0)} articles")
+    yield "refresh_result", {
+        "success": refresh_result.get("success"),
+        "total_articles": refresh_result.get("total_articles_saved", 0),
+        "timestamp": refresh_result.get("timestamp")
+    }
+    
+    # Steps 2 and 3 both only need the refreshed articles (the podcast script is
+    # written from them, not from the reports), so the podcast is generated in
+    # the background while the report runs
+    # Lazy import to avoid circular dependency
+    from ..content.podcast import generate_simple_podcast
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
         logger.info(f"🎙️ Step 3/4: Generating podcast for user {user_id}")
-        # Lazy import to avoid circular dependency
-        from ..content.podcast import generate_simple_podcast
-        
-        podcast_result = generate_simple_podcast(
+        podcast_future = executor.submit(
+            generate_simple_podcast,
             user_id=user_id,
             presenter_name=presenter_name,
             language=language,
             voice_id=voice_id
         )
         
-        if not podcast_result.get("success"):
-            raise Exception(f"Failed to generate podcast: {podcast_result.get('error', 'Unknown error')}")
-        
-        logger.info(f"✅ Podcast generated: {podcast_result.get('audio_url', 'No URL')}")
+        # Step 2: Generate complete report
+        logger.info(f"📊 Step 2/4: Generating complete report for user {user_id}")
+        report_result = get_complete_report(user_id)
         
-        # Step 4: Send push notification
-        logger.info(f"📱 Step 4/4: Sending push notification to user {user_id}")
-        notification_result = send_push_notification(
-            user_id=user_id,
-            title="Your updates are available",
-            body="Fresh news articles and podcast are ready!"
-        )
+        if not report_result.get("success"):
+            raise Exception(f"Failed to generate complete report: {report_result.get('error', 'Unknown error')}")
         
-        if notification_result.get("success"):
-            logger.info(f"✅ Push notification sent successfully")
-        else:
-            logger.warning(f"⚠️ Push notification failed: {notification_result.get('error', 'Unknown error')}")
+        logger.info(f"✅ Complete report generated")
+        yield "report_result", {
+            "success": report_result.get("success"),
+            "reports_count": len(report_result.get("reports", [])),
+            "timestamp": report_result.get("timestamp")
+        }
         
-        # Prepare complete result
+        podcast_result = podcast_future.result()
+    
+    if not podcast_result.get("success"):
+        raise Exception(f"Failed to generate podcast: {podcast_result.get('error', 'Unknown error')}")
+    
+    logger.info(f"✅ Podcast generated: {podcast_result.get('audio_url', 'No URL')}")
+    yield "podcast_result", {
+        "success": podcast_result.get("success"),
+        "audio_url": podcast_result.get("audio_url"),
+        "script_storage_url": podcast_result.get("script_storage_url"),
+        "metadata": podcast_result.get("metadata", {})
+    }
+    
+    # Step 4: Send push notification
+    logger.info(f"📱 Step 4/4: Sending push notification to user {user_id}")
+    notification_result = send_push_notification(
+        user_id=user_id,
+        title="Your updates are available",
+        body="Fresh news articles and podcast are ready!"
+    )
+    
+    if notification_result.get("success"):
+        logger.info(f"✅ Push notification sent successfully")
+    else:
+        logger.warning(f"⚠️ Push notification failed: {notification_result.get('error', 'Unknown error')}")
+    
+    yield "notification_result", {
+        "success": notification_result.get("success"),
+        "message_id": notification_result.get("message_id"),
+        "error": notification_result.get("error") if not notification_result.get("success") else None
+    }
+
+def update(user_id, presenter_name="Alex", language="en", voice_id="cmudN4ihcI42n48urXgc"):
+    """
+    Complete user update pipeline (see update_stages), run to completion.
+    
+    Args:
+        user_id (str): User ID to update
+        presenter_name (str): Name of the presenter for podcast
+        language (str): Language for the content ('en', 'fr', etc.)
+        voice_id (str): ElevenLabs voice ID for TTS
+    
+    Returns:
+        dict: Complete result with all operation results
+    """
+    try:
         result = {
             "success": True,
             "user_id": user_id,
-            "pipeline_completed": True,
-            "refresh_result": {
-                "success": refresh_result.get("success"),
-                "total_articles": refresh_result.get("total_articles_saved", 0),
-                "timestamp": refresh_result.get("timestamp")
-            },
-            "report_result": {
-                "success": report_result.get("success"),
-                "reports_count": len(report_result.get("reports", [])),
-                "timestamp": report_result.get("timestamp")
-            },
-            "podcast_result": {
-                "success": podcast_result.get("success"),
-                "audio_url": podcast_result.get("audio_url"),
-                "script_storage_url": podcast_result.get("script_storage_url"),
-                "metadata": podcast_result.get("metadata", {})
-            },
-            "notification_result": {
-                "success": notification_result.get("success"),
-                "message_id": notification_result.get("message_id"),
-                "error": notification_result.get("error") if not notification_result.get("success") else None
-            },
-            "pipeline_timestamp": datetime.now().isoformat(),
-            "total_duration_estimate": "Complete pipeline execution"
+            "pipeline_completed": True
         }
+        for key, stage_result in update_stages(user_id, presenter_name, language, voice_id):
+            result[key] = stage_result
+        result["pipeline_timestamp"] = datetime.now().isoformat()
+        result["total_duration_estimate"] = "Complete pipeline execution"
         
         logger.info(f"🎉 Complete update pipeline successful for user {user_id}")
         return result
@@ -130,11 +162,14 @@ def update(user_id, presenter_name="Alex", language="en", voice_id="cmudN4ihcI42
             "pipeline_completed": False,
             "error": str(e),
             "message": "Failed to complete update pipeline",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }
 
 # --- Scheduled User Updates ---
 
+# scheduling_preferences fields read by should_trigger_update_for_user
+SCHEDULING_TRIGGER_FIELDS = ('type', 'hour', 'minute', 'day')
+
 def should_trigger_update_for_user(user_id, scheduling_prefs, current_time):
     """
     Check if a user should receive an update based on their scheduling preferences.
@@ -149,7 +184,7 @@ def should_trigger_update_for_user(user_id, scheduling_prefs, current_time):
     """
     try:
         if not scheduling_prefs:
-            logger.info(f"⏭️ No scheduling preferences for user {user_id}")
+            logger.info("⏭️ No scheduling preferences for user %s", user_id)
             return False
         
         pref_type = scheduling_prefs.get('type')
@@ -167,7 +202,7 @@ def should_trigger_update_for_user(user_id, scheduling_prefs, current_time):
         if pref_type == 'daily':
             # Check if target time was within the last 15 minutes
             if timedelta(minutes=0) <= time_diff <= timedelta(minutes=15):
-                logger.info(f"✅ Daily update trigger for user {user_id}: target was {target_time}, current is {current_time}")
+                logger.info("✅ Daily update trigger for user %s: target was %s, current is %s", user_id, target_time, current_time)
                 return True
         
         # For weekly scheduling
@@ -177,7 +212,7 @@ def should_trigger_update_for_user(user_id, scheduling_prefs, current_time):
             # Check if it's the right day and within the time window
             if current_day == pref_day.lower():
                 if timedelta(minutes=0) <= time_diff <= timedelta(minutes=15):
-                    logger.info(f"✅ Weekly update trigger for user {user_id}: target was {pref_day} {target_time}, current is {current_day} {current_time}")
+                    logger.info("✅ Weekly update trigger for user %s: target was %s %s, current is %s %s", user_id, pref_day, target_time, current_day, current_time)
                     return True
         
         return False
@@ -186,6 +221,47 @@ def should_trigger_update_for_user(user_id, scheduling_prefs, current_time):
         logger.error(f"Error checking update trigger for user {user_id}: {e}")
         return False
 
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+def next_update_time_for_user(scheduling_prefs, current_time):
+    """
+    Earliest time should_trigger_update_for_user can return True for these
+    preferences, assuming it returned False at current_time.
+    
+    Args:
+        scheduling_prefs (dict): User's scheduling preferences
+        current_time (datetime): Current datetime
+    
+    Returns:
+        datetime: Start of the next trigger window (datetime.max if none)
+    """
+    try:
+        if not scheduling_prefs:
+            return datetime.max
+        
+        pref_type = scheduling_prefs.get('type')
+        pref_day = scheduling_prefs.get('day')
+        target_time = current_time.replace(
+            hour=scheduling_prefs.get('hour', 9),
+            minute=scheduling_prefs.get('minute', 0),
+            second=0,
+            microsecond=0
+        )
+        
+        if pref_type == 'daily':
+            return target_time if target_time > current_time else target_time + timedelta(days=1)
+        
+        if pref_type == 'weekly' and pref_day and pref_day.lower() in WEEKDAYS:
+            days_ahead = (WEEKDAYS.index(pref_day.lower()) - current_time.weekday()) % 7
+            target_time += timedelta(days=days_ahead)
+            return target_time if target_time > current_time else target_time + timedelta(days=7)
+        
+        return datetime.max
+        
+    except Exception:
+        # Let should_trigger_update_for_user see (and log) the preferences again
+        return current_time
+
 def trigger_user_update_async(user_id, presenter_name="Alex", language="en", voice_id="cmudN4ihcI42n48urXgc"):
     """
     Trigger user update asynchronously without blocking.
@@ -388,6 +464,7 @@ def refresh_articles(user_id):
                 # Store in articles collection with user_id as document ID
                 doc_ref = db_client.collection('articles').document(user_id)
                 doc_ref.set(articles_document)
+                invalidate_user_response("articles", user_id)
                 
                 logger.info(f"✅ Stored articles for user {user_id} in database")
                 refresh_result["database_stored"] = True
@@ -503,44 +580,50 @@ def get_complete_report(user_id):
             "language": articles_data.get("summary", {}).get("language", "en")
         }
         
-        # Step 3: Process each topic
-        for topic_name, topic_data in topics.items():
+        # Step 3: Generate the topic reports concurrently (they are independent and
+        # spend their time waiting on the LLM), then fold them in in topic order
+        def _topic_report(topic_item):
+            topic_name, topic_data = topic_item
             logger.info(f"Processing topic: {topic_name}")
-            complete_report["generation_stats"]["topics_processed"] += 1
-            
             try:
-                # Call get_complete_topic_report for this topic
-                topic_report = get_complete_topic_report(topic_name, topic_data)
-                
-                if topic_report.get("success"):
-                    complete_report["reports"][topic_name] = {
-                        "pickup_line": topic_report.get("pickup_line", ""),
-                        "topic_summary": topic_report.get("topic_summary", ""),
-                        "subtopics": topic_report.get("subtopics", {}),
-                        "generation_stats": topic_report.get("generation_stats", {})
-                    }
-                    complete_report["generation_stats"]["successful_reports"] += 1
-                    logger.info(f"✅ Successfully generated report for {topic_name}")
-                else:
-                    # Store failed report with fallback content
-                    complete_report["reports"][topic_name] = {
-                        "pickup_line": f"Discover the latest {topic_name} developments and trends.",
-                        "topic_summary": f"# {topic_name}\n\nReport generation failed. Please try again.",
-                        "subtopics": {},
-                        "generation_stats": {"error": topic_report.get("error", "Unknown error")}
-                    }
-                    complete_report["generation_stats"]["failed_reports"] += 1
-                    logger.warning(f"❌ Failed to generate report for {topic_name}: {topic_report.get('error')}")
-                    
+                return get_complete_topic_report(topic_name, topic_data)
             except Exception as e:
-                logger.error(f"Error processing topic {topic_name}: {e}")
+                return e
+        
+        with ThreadPoolExecutor(max_workers=min(COMPLETE_REPORT_TOPIC_WORKERS, len(topics))) as executor:
+            topic_reports = list(executor.map(_topic_report, topics.items()))
+        
+        for topic_name, topic_report in zip(topics, topic_reports):
+            complete_report["generation_stats"]["topics_processed"] += 1
+            
+            if isinstance(topic_report, Exception):
+                logger.error(f"Error processing topic {topic_name}: {topic_report}")
                 complete_report["reports"][topic_name] = {
                     "pickup_line": f"Explore the latest {topic_name} news and insights.",
                     "topic_summary": f"# {topic_name}\n\nReport generation encountered an error.",
                     "subtopics": {},
-                    "generation_stats": {"error": str(e)}
+                    "generation_stats": {"error": str(topic_report)}
+                }
+                complete_report["generation_stats"]["failed_reports"] += 1
+            elif topic_report.get("success"):
+                complete_report["reports"][topic_name] = {
+                    "pickup_line": topic_report.get("pickup_line", ""),
+                    "topic_summary": topic_report.get("topic_summary", ""),
+                    "subtopics": topic_report.get("subtopics", {}),
+                    "generation_stats": topic_report.get("generation_stats", {})
+                }
+                complete_report["generation_stats"]["successful_reports"] += 1
+                logger.info(f"✅ Successfully generated report for {topic_name}")
+            else:
+                # Store failed report with fallback content
+                complete_report["reports"][topic_name] = {
+                    "pickup_line": f"Discover the latest {topic_name} developments and trends.",
+                    "topic_summary": f"# {topic_name}\n\nReport generation failed. Please try again.",
+                    "subtopics": {},
+                    "generation_stats": {"error": topic_report.get("error", "Unknown error")}
                 }
                 complete_report["generation_stats"]["failed_reports"] += 1
+                logger.warning(f"❌ Failed to generate report for {topic_name}: {topic_report.get('error')}")
         
         # Step 4: Final statistics
         logger.info(f"Complete report generation finished for user {user_id}:")
@@ -571,6 +654,7 @@ def get_complete_report(user_id):
             
             # Save to database
             aifeed_ref.set(aifeed_data)
+            invalidate_user_response("aifeed", user_id)
             logger.info(f"✅ Complete report saved to aifeed collection for user {user_id}")
             
             # Add database storage confirmation to response
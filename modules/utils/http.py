@@ -0,0 +1,612 @@
+"""
+Utilitaires HTTP partagés par les endpoints (JSON, CORS, compression)
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+import atexit
+import functools
+import gzip
+import hashlib
+import threading
+import time
+import zlib
+from datetime import datetime
+
+import msgspec
+import orjson
+import requests
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from firebase_functions import https_fn
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Responses smaller than this are sent as-is: gzip framing costs more than it saves
+GZIP_MIN_BYTES = 4096
+
+# Brotli quality 4 costs about as much CPU as gzip level 1 and compresses JSON
+# noticeably better; it is used whenever the client accepts br.
+BROTLI_QUALITY = 4
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Vary: Accept on JSON too, since the same URL can answer with MessagePack:
+# without it a shared cache could serve one format to a client asking for the other
+JSON_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Content-Type': 'application/json',
+    'Vary': 'Accept'
+}
+
+# Clients sending `Accept: application/msgpack` get successful payloads as
+# MessagePack (about a third smaller than compact JSON on article/report
+# payloads). Errors are always JSON.
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+MSGPACK_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Content-Type': MSGPACK_MEDIA_TYPE,
+    'Vary': 'Accept'
+}
+
+
+def _encoded_headers(base, encoding):
+    return dict(base, **{'Content-Encoding': encoding, 'Vary': 'Accept, Accept-Encoding'})
+
+
+# Response header dicts for every (msgpack, Content-Encoding) combination, built
+# once. They are shared between requests (the Response copies them into its own
+# Headers) and only copied when an endpoint adds extra headers.
+_RESPONSE_HEADERS = {
+    (msgpack, encoding): (_encoded_headers(base, encoding) if encoding else base)
+    for msgpack, base in ((False, JSON_HEADERS), (True, MSGPACK_HEADERS))
+    for encoding in (None, 'gzip', 'br')
+}
+
+# Browsers cap this (Chromium: 2h, Firefox: 24h); the longest allowed value
+# means a client pays the preflight round-trip at most once per endpoint a day
+PREFLIGHT_MAX_AGE = '86400'
+
+# Requests to <endpoint>/_warmup return 204 after loading what the endpoints
+# otherwise load on first use (see warm_up). Hitting it (e.g. from a Cloud
+# Scheduler job) spins up an instance and leaves it ready for real traffic.
+WARMUP_PATH = '/_warmup'
+
+
+def warm_up():
+    """
+    Load the lazily imported dependencies: the OpenAI SDK and shared client,
+    the GNews wrapper and newspaper. Failures are logged and skipped, a warmup
+    request must never fail. Cheap once everything is loaded.
+    """
+    # Imported here: these modules import this one
+    try:
+        from modules.ai.client import get_openai_client
+        get_openai_client()
+    except Exception as e:
+        logger.warning("Warmup: OpenAI client not loaded: %s", e)
+    for module_name in ('gnews_api_function', 'newspaper'):
+        try:
+            __import__(module_name)
+        except Exception as e:
+            logger.warning("Warmup: %s not loaded: %s", module_name, e)
+
+
+def _preflight_headers(allowed):
+    return {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': ', '.join(allowed + ('OPTIONS',)),
+        'Access-Control-Allow-Headers': 'Content-Type, Authorization, If-None-Match',
+        'Access-Control-Max-Age': PREFLIGHT_MAX_AGE,
+        'Cache-Control': f'public, max-age={PREFLIGHT_MAX_AGE}',
+        'Vary': 'Origin'
+    }
+
+
+def _method_not_allowed_body(allowed):
+    return orjson.dumps({"success": False, "error": f"Method not allowed. Use {' or '.join(allowed)}."})
+
+
+# Preflight headers and 405 bodies are built once per allowed-methods set
+POST_ONLY = ('POST',)
+GET_OR_POST = ('GET', 'POST')
+_PREFLIGHT_HEADERS = {allowed: _preflight_headers(allowed) for allowed in (POST_ONLY, GET_OR_POST)}
+_METHOD_NOT_ALLOWED_BODIES = {allowed: _method_not_allowed_body(allowed) for allowed in (POST_ONLY, GET_OR_POST)}
+
+# Serialized responses of expensive, idempotent endpoints (trending analysis),
+# keyed by their request parameters. Warm instances answer repeats from memory.
+RESPONSE_CACHE_TTL = 300
+_RESPONSE_CACHE = TTLCache(maxsize=512, ttl=RESPONSE_CACHE_TTL)
+_RESPONSE_CACHE_LOCK = threading.Lock()
+_CACHE_CONTROL = f'public, s-maxage={RESPONSE_CACHE_TTL}, stale-while-revalidate=86400'
+
+# Serialized per-user reads (stored articles, AI feed) that clients re-poll,
+# keyed by (namespace, user_id). Writers call invalidate_user_response(), which
+# only clears the cache of the instance that ran the write: other warm
+# instances can serve the previous data until the TTL expires, so it is kept
+# to a few seconds.
+USER_RESPONSE_CACHE_TTL = 5
+_USER_RESPONSE_CACHE = TTLCache(maxsize=2048, ttl=USER_RESPONSE_CACHE_TTL)
+_USER_CACHE_CONTROL = f'private, max-age={USER_RESPONSE_CACHE_TTL}'
+
+# Outbound connections per host kept in the shared pool. pool_block makes extra
+# concurrent requests wait for a free connection instead of opening new sockets,
+# which caps per-instance memory when subtopic fetches run in parallel.
+HTTP_POOL_MAXSIZE = 16
+
+# A kept-alive connection can be closed by the server between two warm
+# invocations: idempotent requests (the news API GETs) are retried on a fresh
+# connection, and on gateway errors, instead of failing. POSTs (TTS) are not.
+HTTP_RETRIES = Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504), raise_on_status=False)
+
+
+def _build_http_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=HTTP_POOL_MAXSIZE, pool_block=True, max_retries=HTTP_RETRIES)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Shared across invocations of a warm instance so TCP/TLS connections are reused
+HTTP_SESSION = _build_http_session()
+atexit.register(HTTP_SESSION.close)
+
+
+# Second-resolution ISO timestamp, reformatted at most once per second
+_TIMESTAMP_CACHE = [0, '', b'""']
+
+
+def _refresh_timestamp():
+    now = int(time.time())
+    cached = _TIMESTAMP_CACHE
+    if cached[0] != now:
+        iso = datetime.fromtimestamp(now).isoformat()
+        cached[:] = [now, iso, orjson.dumps(iso)]
+    return cached
+
+
+def now_iso():
+    """Current local time as an ISO 8601 string, truncated to the second."""
+    return _refresh_timestamp()[1]
+
+
+def now_iso_json():
+    """now_iso() already encoded as a JSON string (bytes, with quotes)."""
+    return _refresh_timestamp()[2]
+
+
+def dumps(payload):
+    """Serialize a payload to JSON bytes with orjson."""
+    return orjson.dumps(payload, option=_ORJSON_OPTIONS)
+
+
+def _msgpack_default(obj):
+    # numpy values, which orjson serializes natively (OPT_SERIALIZE_NUMPY)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise NotImplementedError(f"Cannot encode {type(obj).__name__} as MessagePack")
+
+
+_MSGPACK_ENCODER = msgspec.msgpack.Encoder(enc_hook=_msgpack_default)
+
+
+def wants_msgpack(req):
+    """Whether the client asked for MessagePack instead of JSON."""
+    return req is not None and MSGPACK_MEDIA_TYPE in req.headers.get('Accept', '')
+
+
+def encode_payload(payload, req=None):
+    """Serialize a payload as MessagePack if the client asked for it, else JSON."""
+    if wants_msgpack(req):
+        return _MSGPACK_ENCODER.encode(payload)
+    return dumps(payload)
+
+
+def parse_json_body(req):
+    """
+    Parse the request body as JSON with orjson.
+
+    Args:
+        req (https_fn.Request): Incoming request
+
+    Returns:
+        The decoded JSON value, or None if the body is empty
+
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    body = req.get_data(cache=True)
+    if not body:
+        return None
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON body: {e}")
+
+
+INVALID_JSON_BODY = orjson.dumps({"success": False, "error": "Request body must be a JSON object"})
+
+
+def parse_json_object(req):
+    """
+    Parse a JSON object body without raising, so handlers can reject bad input
+    with a pre-encoded 400 (INVALID_JSON_BODY) before doing any work.
+
+    Args:
+        req (https_fn.Request): Incoming request
+
+    Returns:
+        dict: The decoded object ({} if the body is empty), or None if the
+        body is not valid JSON or not an object
+    """
+    body = req.get_data(cache=False)
+    if not body:
+        return {}
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def cors_preflight_response(allowed=POST_ONLY):
+    """Empty 204 answer to a CORS preflight, cacheable by browsers and CDNs."""
+    return https_fn.Response('', headers=_PREFLIGHT_HEADERS[allowed], status=204)
+
+
+def reject_unsupported_method(req, allowed=POST_ONLY):
+    """
+    Answer CORS preflights and warmup pings, and reject HTTP methods an
+    endpoint does not support.
+
+    Args:
+        req (https_fn.Request): Incoming request
+        allowed (tuple): POST_ONLY or GET_OR_POST
+
+    Returns:
+        https_fn.Response to return as-is, or None if the request should be handled
+    """
+    if req.path.endswith(WARMUP_PATH):
+        warm_up()
+        return https_fn.Response('', status=204)
+    if req.method == 'OPTIONS':
+        return cors_preflight_response(allowed)
+    if req.method not in allowed:
+        return https_fn.Response(_METHOD_NOT_ALLOWED_BODIES[allowed], headers=JSON_HEADERS, status=405)
+    return None
+
+
+def _error_template(fields):
+    """
+    Pre-encode an error envelope with its constant fields.
+
+    Returns bytes with two %b slots, for the JSON-encoded error and timestamp:
+    {"success":false,"error":%b,<fields>,"timestamp":%b}
+    """
+    encoded = b''.join(b',' + dumps(key) + b':' + dumps(value) for key, value in fields.items())
+    return b'{"success":false,"error":%b' + encoded.replace(b'%', b'%%') + b',"timestamp":%b}'
+
+
+def json_post_endpoint(required=(), error_message=None, error_defaults=None, schema=None):
+    """
+    Decorator for JSON POST endpoints.
+
+    Takes care of the CORS preflight, method check, JSON body parsing,
+    required-field validation (400), serializing the returned payload and
+    turning exceptions into a 500 JSON error. The decorated function receives
+    the parsed body and the request, and returns a payload dict (status 200 if
+    it has a truthy "success", else 500) or a ready-made https_fn.Response.
+
+    With a schema (a msgspec.Struct from modules.utils.schemas), the body is
+    decoded and validated against it in one pass, the function receives the
+    Struct instance, and invalid bodies are rejected with a 400.
+
+    Args:
+        required (tuple): Body fields that must be present and non-empty
+        error_message (str): "message" field added to 500 error payloads
+        error_defaults (dict): Extra fields added to error payloads (e.g. empty result lists)
+        schema (type): msgspec.Struct the body must match (replaces `required`)
+
+    Usage:
+        @https_fn.on_request(timeout_sec=60)
+        @json_post_endpoint(required=('user_id',))
+        def my_endpoint(data, req):
+            return do_work(data['user_id'])
+    """
+    def decorator(fn):
+        # Built once per endpoint at import time, not on every request: a reusable
+        # Decoder skips msgspec's per-call type lookup, and the log field is constant.
+        decoder = msgspec.json.Decoder(schema) if schema is not None else None
+        log_extra = {"endpoint": fn.__name__}
+
+        # Error envelopes are pre-encoded too; only the error text and timestamp vary
+        client_error_template = _error_template(dict(error_defaults or {}))
+        server_fields = dict(error_defaults or {})
+        if error_message:
+            server_fields["message"] = error_message
+        server_error_template = _error_template(server_fields)
+
+        def _error(error, status, req):
+            template = server_error_template if status >= 500 else client_error_template
+            body = template % (dumps(error), now_iso_json())
+            return json_bytes_response(body, status=status, req=req)
+
+        @functools.wraps(fn)
+        def wrapper(req):
+            method_response = reject_unsupported_method(req)
+            if method_response is not None:
+                return method_response
+
+            try:
+                if decoder is not None:
+                    body = req.get_data(cache=True)
+                    if not body:
+                        return _error("No JSON data provided", 400, req)
+                    try:
+                        data = decoder.decode(body)
+                    except msgspec.ValidationError as e:
+                        return _error(f"Invalid request: {e}", 400, req)
+                    except msgspec.DecodeError as e:
+                        return _error(f"Invalid JSON body: {e}", 400, req)
+                else:
+                    data = parse_json_body(req)
+                    if not data or not isinstance(data, dict):
+                        return _error("No JSON data provided", 400, req)
+
+                    missing = [field for field in required if not data.get(field)]
+                    if missing:
+                        return _error(f"Missing {', '.join(missing)}", 400, req)
+
+                result = fn(data, req)
+                if isinstance(result, https_fn.Response):
+                    return result
+                return json_response(result, status=200 if result.get("success") else 500, req=req)
+
+            except Exception as e:
+                logger.error("Error in %s: %s", fn.__name__, e, extra=log_extra)
+                return _error(str(e), 500, req)
+
+        return wrapper
+    return decorator
+
+
+def json_response(payload, status=200, req=None, headers=None):
+    """
+    Build a JSON https_fn.Response with CORS headers.
+
+    When the request is given and its Accept-Encoding allows it, bodies of
+    GZIP_MIN_BYTES or more are compressed with Brotli (quality 4) or gzip
+    (level 1: fast, and JSON still shrinks by more than half). Successful (2xx) payloads are sent as
+    MessagePack to clients that accept it.
+
+    Args:
+        payload: JSON-serializable value
+        status (int): HTTP status code
+        req (https_fn.Request): Incoming request, used for content negotiation
+        headers (dict): Extra response headers
+
+    Returns:
+        https_fn.Response
+    """
+    if status < 300 and wants_msgpack(req):
+        return json_bytes_response(_MSGPACK_ENCODER.encode(payload), status=status, req=req, headers=headers, msgpack=True)
+    return json_bytes_response(dumps(payload), status=status, req=req, headers=headers)
+
+
+def json_bytes_response(body, status=200, req=None, headers=None, msgpack=False):
+    """
+    Same as json_response for a body that is already serialized JSON bytes
+    (e.g. a cached response), or MessagePack bytes with msgpack=True.
+    """
+    encoding = _content_encoding(req) if len(body) >= GZIP_MIN_BYTES else None
+    if encoding == 'br':
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=1)
+
+    response_headers = _RESPONSE_HEADERS[(msgpack, encoding)]
+    if headers:
+        response_headers = {**response_headers, **headers}
+    return https_fn.Response(body, headers=response_headers, status=status)
+
+
+def _content_encoding(req):
+    """Best compression the client accepts: 'br', 'gzip' or None."""
+    if req is None:
+        return None
+    accepted = req.headers.get('Accept-Encoding', '')
+    if BROTLI_AVAILABLE and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def json_stream_response(chunks, req=None, status=200):
+    """
+    Build a chunked JSON https_fn.Response from an iterable of JSON byte chunks.
+
+    The body is never held in memory in full. When the client accepts Brotli
+    or gzip the chunks are compressed on the fly.
+
+    Args:
+        chunks: Iterable of bytes that concatenate to a JSON document
+        req (https_fn.Request): Incoming request, used for content negotiation
+        status (int): HTTP status code
+
+    Returns:
+        https_fn.Response
+    """
+    encoding = _content_encoding(req)
+    if encoding == 'br':
+        chunks = _brotli_chunks(chunks)
+    elif encoding == 'gzip':
+        chunks = _gzip_chunks(chunks)
+    return https_fn.Response(chunks, headers=_RESPONSE_HEADERS[(False, encoding)], status=status)
+
+
+EVENT_STREAM_MEDIA_TYPE = 'text/event-stream'
+EVENT_STREAM_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Content-Type': EVENT_STREAM_MEDIA_TYPE,
+    'Cache-Control': 'no-cache',
+    'Vary': 'Accept'
+}
+
+
+def wants_event_stream(req):
+    """Whether the client asked for a Server-Sent Events stream."""
+    return req is not None and EVENT_STREAM_MEDIA_TYPE in req.headers.get('Accept', '')
+
+
+def sse_event(payload, event=None):
+    """One Server-Sent Events frame carrying payload as JSON."""
+    frame = b'data: ' + dumps(payload) + b'\n\n'
+    if event:
+        frame = b'event: ' + event.encode() + b'\n' + frame
+    return frame
+
+
+def event_stream_response(events, status=200):
+    """
+    Build a text/event-stream https_fn.Response from an iterable of frames
+    (see sse_event). Frames are sent as they are produced and never
+    compressed, since compression would hold them back.
+    """
+    return https_fn.Response(events, headers=EVENT_STREAM_HEADERS, status=status)
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(1, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _brotli_chunks(chunks):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in chunks:
+        compressed = compressor.process(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.finish()
+
+
+def etag_json_response(req, payload, validator):
+    """
+    JSON response with an ETag, or an empty 304 if the client already has it.
+
+    The ETag is a hash of `validator` (the part of the payload that identifies
+    its content, without volatile fields such as timestamps). When it matches
+    the request's If-None-Match the payload is not even serialized.
+
+    Args:
+        req (https_fn.Request): Incoming request
+        payload: JSON-serializable response body
+        validator: JSON-serializable value the ETag is computed from
+
+    Returns:
+        https_fn.Response
+    """
+    etag = f'"{hashlib.blake2b(dumps(validator), digest_size=16).hexdigest()}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'private, no-cache',
+        'Access-Control-Expose-Headers': 'ETag'
+    }
+    if etag in req.headers.get('If-None-Match', ''):
+        headers['Access-Control-Allow-Origin'] = '*'
+        return https_fn.Response(b'', headers=headers, status=304)
+    return json_response(payload, req=req, headers=headers)
+
+
+def response_cache_key(namespace, *parts):
+    """Build a compact cache key from a namespace and the request parameters."""
+    digest = hashlib.blake2b(dumps(parts), digest_size=16).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+def cached_json_response(req, cache_key, compute):
+    """
+    Serve a JSON response from the in-process response cache, or compute it.
+
+    Only successful payloads ({"success": True, ...}) are cached. Responses carry
+    X-Cache: HIT/MISS and a Cache-Control header so CDNs can cache them too.
+
+    Args:
+        req (https_fn.Request): Incoming request
+        cache_key (str): Key from response_cache_key()
+        compute (callable): Returns the payload dict on a cache miss
+
+    Returns:
+        https_fn.Response
+    """
+    with _RESPONSE_CACHE_LOCK:
+        body = _RESPONSE_CACHE.get(cache_key)
+    if body is not None:
+        return json_bytes_response(body, req=req, headers={'X-Cache': 'HIT', 'Cache-Control': _CACHE_CONTROL})
+
+    result = compute()
+    body = dumps(result)
+    if not result.get("success"):
+        return json_bytes_response(body, status=500, req=req, headers={'X-Cache': 'MISS'})
+
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE[cache_key] = body
+    return json_bytes_response(body, req=req, headers={'X-Cache': 'MISS', 'Cache-Control': _CACHE_CONTROL})
+
+
+def invalidate_user_response(namespace, user_id):
+    """
+    Drop a user's cached response for a namespace (call after writing the data).
+
+    Only this instance's cache is cleared; other instances expire their copy
+    after USER_RESPONSE_CACHE_TTL seconds.
+    """
+    with _RESPONSE_CACHE_LOCK:
+        for msgpack in (False, True):
+            _USER_RESPONSE_CACHE.pop((namespace, user_id, msgpack), None)
+
+
+def cached_user_json_response(req, namespace, user_id, compute):
+    """
+    Serve a user's JSON response from the per-user cache, or compute it.
+
+    Only 200 responses are cached, already serialized (JSON and MessagePack
+    separately), so a hit skips both the database read and the encoding. They
+    are sent with a short private Cache-Control so the client itself can skip
+    re-polls. A read right after a write can return the previous data for up
+    to USER_RESPONSE_CACHE_TTL seconds (see invalidate_user_response).
+
+    Args:
+        req (https_fn.Request): Incoming request
+        namespace (str): Kind of data (e.g. "articles")
+        user_id (str): User the data belongs to
+        compute (callable): Returns (payload, status) on a cache miss
+
+    Returns:
+        https_fn.Response
+    """
+    msgpack = wants_msgpack(req)
+    key = (namespace, user_id, msgpack)
+    with _RESPONSE_CACHE_LOCK:
+        body = _USER_RESPONSE_CACHE.get(key)
+    if body is not None:
+        return json_bytes_response(body, req=req, headers={'X-Cache': 'HIT', 'Cache-Control': _USER_CACHE_CONTROL}, msgpack=msgpack)
+
+    payload, status = compute()
+    if status != 200:
+        return json_response(payload, status=status, req=req, headers={'X-Cache': 'MISS'})
+
+    body = encode_payload(payload, req)
+    with _RESPONSE_CACHE_LOCK:
+        _USER_RESPONSE_CACHE[key] = body
+    return json_bytes_response(body, req=req, headers={'X-Cache': 'MISS', 'Cache-Control': _USER_CACHE_CONTROL}, msgpack=msgpack)
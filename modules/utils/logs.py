@@ -0,0 +1,39 @@
+"""
+Logs structurés au format JSON pour Cloud Logging
+"""
+import logging
+
+import orjson
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line.
+
+    Cloud Logging parses these lines into structured entries: "severity" sets the
+    log level and fields passed with `extra=` become searchable jsonPayload fields.
+    The message is only %-formatted when a handler actually emits the record.
+    """
+
+    def format(self, record):
+        entry = {
+            "severity": record.levelname,
+            "message": record.getMessage(),
+            "logger": record.name,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+def json_log_handler(stream=None):
+    """StreamHandler writing JSON lines (stderr by default)."""
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    return handler
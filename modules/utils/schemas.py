@@ -0,0 +1,192 @@
+"""
+Schémas de validation des corps de requête (msgspec)
+"""
+from typing import Annotated, Any, Literal, TypedDict
+
+import msgspec
+
+NonEmptyStr = Annotated[str, msgspec.Meta(min_length=1)]
+
+# Decoding only materializes the fields a Struct declares: any other key in the
+# body (e.g. a large payload sent along with user_id) is skipped by the parser
+# without building Python objects. Structs holding only scalars are declared
+# gc=False, so the garbage collector never has to track them.
+
+
+class SubtopicSources(TypedDict):
+    """Reddit sources of a subtopic. Decoded as a plain dict for the content helpers."""
+    subreddits: list[Any]
+    queries: list[Any]
+
+
+# v3.0 preferences document: topics -> subtopics -> sources. Only checks that
+# both source lists are present and are arrays, as the v3.0 format always did.
+PREFERENCES_V3_TYPE = dict[str, dict[str, SubtopicSources]]
+
+
+class SavePreferencesRequest(msgspec.Struct):
+    """Body of save_initial_preferences (topics -> subtopics -> sources)."""
+    user_id: NonEmptyStr
+    # Plain dicts, so extra subtopic keys are saved as sent (a TypedDict would
+    # drop them); the shape is checked against PREFERENCES_V3_TYPE below
+    preferences: dict[str, dict[str, dict[str, Any]]] = {}
+    detail_level: str = 'Medium'
+    language: str = 'en'
+
+    def __post_init__(self):
+        msgspec.convert(self.preferences, PREFERENCES_V3_TYPE)
+
+
+class AnswerRequest(msgspec.Struct):
+    """Body of answer."""
+    user_message: NonEmptyStr
+    user_id: str | None = None
+    user_preferences: dict = {}
+    conversation_history: list = []
+
+
+class SpecificSubjectsRequest(msgspec.Struct):
+    """Body of update_specific_subjects (user_message is only needed for 'analyze')."""
+    user_id: NonEmptyStr
+    action: Literal['analyze', 'get'] = 'analyze'
+    conversation_history: list = []
+    user_message: str = ''
+    language: str = 'en'
+
+
+class TrendingSubtopicRequest(msgspec.Struct):
+    """Body of get_trending_for_subtopic."""
+    subtopic_title: NonEmptyStr
+    subtopic_query: NonEmptyStr
+    subreddits: list[str] = []
+    lang: str = 'en'
+    country: str = 'us'
+    max_articles: int = 10
+
+
+class TrendingTopicRequest(msgspec.Struct, gc=False):
+    """Body of get_trending_subtopics."""
+    topic: NonEmptyStr
+    lang: str = 'en'
+    country: str = 'us'
+    max_articles: int = 10
+
+
+class UserRequest(msgspec.Struct, gc=False):
+    """Body of endpoints that only take a user_id (preferences, articles, reports)."""
+    user_id: NonEmptyStr
+
+
+class UserJobRequest(msgspec.Struct, gc=False):
+    """Body of refresh_articles_endpoint and get_complete_report_endpoint ("async": true queues a background job)."""
+    user_id: NonEmptyStr
+    run_async: bool = msgspec.field(default=False, name='async')
+
+
+class JobStatusRequest(msgspec.Struct, gc=False):
+    """Body of get_job_status_endpoint."""
+    job_id: NonEmptyStr
+
+
+class UserMediaTwinScriptRequest(msgspec.Struct, gc=False):
+    """Body of the generate_*user_media_twin_script endpoints."""
+    user_id: NonEmptyStr
+    presenter_name: str = 'Alex'
+    language: str = 'fr'
+
+
+class CompleteUserMediaTwinScriptRequest(UserMediaTwinScriptRequest, gc=False):
+    """Body of generate_complete_user_media_twin_script_endpoint ("async": true queues a background job)."""
+    run_async: bool = msgspec.field(default=False, name='async')
+
+
+class UserUpdateRequest(msgspec.Struct, gc=False):
+    """Body of update_endpoint and process_user_update."""
+    user_id: NonEmptyStr
+    presenter_name: str = 'Alex'
+    language: str = 'en'
+    voice_id: str = '96c64eb5-a945-448f-9710-980abe7a514c'
+    scheduled_time: str | None = None
+
+
+class PushNotificationRequest(msgspec.Struct, gc=False):
+    """Body of send_push_notification_endpoint."""
+    user_id: NonEmptyStr
+    title: str = 'Notification'
+    body: str = 'You have a new update'
+
+
+class TextToSpeechRequest(msgspec.Struct, gc=False):
+    """Parameters of text_to_speech (JSON body, or query string for GET)."""
+    text: NonEmptyStr
+    voice_id: str = 'cmudN4ihcI42n48urXgc'
+    model_id: str = 'eleven_multilingual_v2'
+    output_format: str = 'mp3_44100_128'
+
+
+class SimplePodcastRequest(msgspec.Struct, gc=False):
+    """Body of generate_simple_podcast_endpoint."""
+    user_id: NonEmptyStr
+    presenter_name: str = 'Alex'
+    language: str = 'en'
+    voice_id: str = '96c64eb5-a945-448f-9710-980abe7a514c'
+
+
+class SubtopicContentRequest(msgspec.Struct):
+    """Body of get_articles_subtopics_user_endpoint."""
+    subtopic_name: NonEmptyStr
+    subtopic_data: SubtopicSources
+    lang: str = 'en'
+    country: str = 'us'
+    include_comments: bool = False
+    max_comments: int = 3
+
+
+class TopicPostsRequest(msgspec.Struct):
+    """Body of get_topic_posts_endpoint."""
+    topic_name: NonEmptyStr
+    topic_data: Annotated[dict[str, SubtopicSources], msgspec.Meta(min_length=1)]
+    lang: str = 'en'
+    country: str = 'us'
+
+
+class TopicContentRequest(msgspec.Struct):
+    """Body of get_pickup_line_endpoint and get_topic_summary_endpoint."""
+    topic_name: NonEmptyStr
+    topic_content_data: Annotated[dict, msgspec.Meta(min_length=1)]
+
+
+class RedditWorldSummaryRequest(msgspec.Struct):
+    """Body of get_reddit_world_summary_endpoint."""
+    reddit_posts: list = []
+
+
+class TopicReportRequest(msgspec.Struct):
+    """Body of get_complete_topic_report_endpoint."""
+    topic_name: NonEmptyStr
+    topic_posts_data: Annotated[dict, msgspec.Meta(min_length=1)]
+
+
+class MediaTwinScriptRequest(msgspec.Struct):
+    """Body of generate_media_twin_script_endpoint."""
+    topic_name: NonEmptyStr
+    topic_posts_data: Annotated[dict, msgspec.Meta(min_length=1)]
+    presenter_name: str = 'Alex'
+    language: str = 'fr'
+
+
+class TestSessionRequest(msgspec.Struct, gc=False):
+    """Body of start_interactive_test."""
+    user_id: str = 'test_user'
+
+
+class TestAudioRequest(msgspec.Struct, gc=False):
+    """Body of generate_test_audio."""
+    session_id: NonEmptyStr
+    voice_id: str = '96c64eb5-a945-448f-9710-980abe7a514c'
+
+
+class TestInterruptionRequest(msgspec.Struct, gc=False):
+    """Body of handle_test_interruption."""
+    session_id: NonEmptyStr
+    user_question: NonEmptyStr
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Checks of the json_post_endpoint error contract (modules/utils/http.py):
+status codes and error envelopes for preflight, wrong method, missing or
+invalid bodies, failed results and exceptions.
+"""
+
+import json
+
+import msgspec
+from firebase_functions import https_fn
+from werkzeug.test import EnvironBuilder
+
+from modules.utils.http import json_post_endpoint
+
+
+class DemoRequest(msgspec.Struct):
+    user_id: str
+    count: int = 1
+
+
+def make_request(method='POST', data=None, path='/demo'):
+    """Build an https_fn.Request like the ones Cloud Functions passes in."""
+    builder = EnvironBuilder(path=path, method=method, data=data, content_type='application/json')
+    return https_fn.Request(builder.get_environ())
+
+
+@json_post_endpoint(schema=DemoRequest, error_message="Demo failed", error_defaults={"items": []})
+def demo_endpoint(body, req):
+    if body.user_id == 'boom':
+        raise RuntimeError("exploded")
+    if body.user_id == 'fail':
+        return {"success": False, "error": "could not do it"}
+    return {"success": True, "user_id": body.user_id, "count": body.count}
+
+
+@json_post_endpoint(required=('user_id',))
+def legacy_endpoint(data, req):
+    return {"success": True, "user_id": data['user_id']}
+
+
+def call(endpoint, *args, **kwargs):
+    response = endpoint(make_request(*args, **kwargs))
+    body = json.loads(response.get_data()) if response.get_data() else None
+    return response.status_code, body
+
+
+def test_json_post_endpoint_error_contract():
+    """Each failure mode maps to its status and error envelope."""
+
+    print("=" * 60)
+    print("Testing json_post_endpoint error contract")
+    print("=" * 60)
+
+    # Success
+    status, body = call(demo_endpoint, data=b'{"user_id": "u1", "count": 3}')
+    print(f"\n1. Valid body: {status} {body}")
+    assert status == 200
+    assert body == {"success": True, "user_id": "u1", "count": 3}
+
+    # CORS preflight and wrong method
+    status, _ = call(demo_endpoint, method='OPTIONS')
+    print(f"2. OPTIONS: {status}")
+    assert status == 204
+    status, body = call(demo_endpoint, method='GET')
+    print(f"3. GET: {status} {body}")
+    assert status == 405
+    assert body["success"] is False
+
+    # Client errors: 400 with the error envelope, without the server-side message
+    for label, data, expected in (
+        ("Empty body", b'', "No JSON data provided"),
+        ("Invalid JSON", b'{not json', "Invalid JSON body"),
+        ("Schema violation", b'{"user_id": 5}', "Invalid request"),
+        ("Missing field", b'{"count": 2}', "Invalid request"),
+    ):
+        status, body = call(demo_endpoint, data=data)
+        print(f"4. {label}: {status} {body}")
+        assert status == 400
+        assert body["success"] is False
+        assert body["error"].startswith(expected)
+        assert body["items"] == []
+        assert "message" not in body
+        assert "timestamp" in body
+
+    # Failed result: the payload is returned as-is with a 500
+    status, body = call(demo_endpoint, data=b'{"user_id": "fail"}')
+    print(f"5. Failed result: {status} {body}")
+    assert status == 500
+    assert body == {"success": False, "error": "could not do it"}
+
+    # Exception: 500 with the error text, message and error_defaults
+    status, body = call(demo_endpoint, data=b'{"user_id": "boom"}')
+    print(f"6. Exception: {status} {body}")
+    assert status == 500
+    assert body["success"] is False
+    assert body["error"] == "exploded"
+    assert body["message"] == "Demo failed"
+    assert body["items"] == []
+
+    # Without a schema: required fields are checked on the parsed dict
+    status, body = call(legacy_endpoint, data=b'{"user_id": ""}')
+    print(f"7. Missing required field: {status} {body}")
+    assert status == 400
+    assert body["error"] == "Missing user_id"
+    status, body = call(legacy_endpoint, data=b'[1, 2]')
+    print(f"8. Non-object body: {status} {body}")
+    assert status == 400
+    assert body["error"] == "No JSON data provided"
+
+    print("\n" + "=" * 60)
+    print("json_post_endpoint error contract checks passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    test_json_post_endpoint_error_contract()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Checks of lookup_subtopic (modules/content/topics.py), the case-insensitive
+index behind find_parent_topic_for_subtopic and find_subtopic_in_catalog.
+"""
+
+from modules.content.topics import (
+    SUBTOPIC_CATALOG,
+    SUBTOPIC_TO_TOPIC,
+    find_parent_topic_for_subtopic,
+    find_subtopic_in_catalog,
+    lookup_subtopic,
+)
+
+
+def test_lookup_subtopic():
+    """Parent topic and catalog entry of known, unknown and partially known subtopics."""
+
+    print("=" * 60)
+    print("Testing lookup_subtopic")
+    print("=" * 60)
+
+    # In both tables
+    parent, entry = lookup_subtopic('AI')
+    print(f"\n1. 'AI': {parent} {entry}")
+    assert parent == 'technology'
+    assert entry == {'subreddits': list(SUBTOPIC_CATALOG['AI']['subreddits']), 'query': SUBTOPIC_CATALOG['AI']['query']}
+
+    # Case-insensitive
+    for name in ('ai', 'FINANCE', 'mental health'):
+        parent, entry = lookup_subtopic(name)
+        print(f"2. {name!r}: {parent}")
+        assert parent != 'general'
+    assert lookup_subtopic('finance') == lookup_subtopic('Finance')
+
+    # Only in SUBTOPIC_TO_TOPIC: parent known, no catalog entry
+    parent, entry = lookup_subtopic('Software')
+    print(f"3. 'Software': {parent} {entry}")
+    assert parent == 'technology'
+    assert entry is None
+
+    # Only in SUBTOPIC_CATALOG: catalog entry, 'general' parent
+    parent, entry = lookup_subtopic('Sports')
+    print(f"4. 'Sports': {parent} {entry}")
+    assert parent == 'general'
+    assert entry is not None and entry['subreddits']
+
+    # Unknown
+    print(f"5. 'Underwater Basket Weaving': {lookup_subtopic('Underwater Basket Weaving')}")
+    assert lookup_subtopic('Underwater Basket Weaving') == ('general', None)
+
+    # Callers store the subreddit list: it must be a fresh copy every time
+    _, first = lookup_subtopic('AI')
+    first['subreddits'].append('mutated')
+    _, second = lookup_subtopic('AI')
+    print(f"6. Copy after mutation: {second['subreddits']}")
+    assert 'mutated' not in second['subreddits']
+
+    # The wrappers agree with the tables for every known subtopic
+    for name, topic in SUBTOPIC_TO_TOPIC.items():
+        assert find_parent_topic_for_subtopic(name) == topic
+    for name in SUBTOPIC_CATALOG:
+        assert find_subtopic_in_catalog(name)['query'] == SUBTOPIC_CATALOG[name]['query']
+    print(f"7. Wrappers checked for {len(SUBTOPIC_TO_TOPIC)} parents and {len(SUBTOPIC_CATALOG)} catalog entries")
+
+    print("\n" + "=" * 60)
+    print("lookup_subtopic checks passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    test_lookup_subtopic()
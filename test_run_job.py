@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Checks of the background job lifecycle (modules/scheduling/jobs.py): the
+status written to the job document by run_job for each outcome, with a mocked
+Firestore client.
+"""
+
+from unittest.mock import MagicMock, patch
+
+from modules.scheduling import jobs
+
+
+class FakeJobDocument:
+    """Stands in for the job's DocumentReference and records each update()."""
+
+    def __init__(self, fail_on_result=False):
+        self.updates = []
+        self.fail_on_result = fail_on_result
+
+    def update(self, fields):
+        if self.fail_on_result and "result" in fields:
+            raise ValueError("Document exceeds maximum size")
+        self.updates.append(fields)
+
+    @property
+    def statuses(self):
+        return [fields["status"] for fields in self.updates]
+
+
+def run(handler, kind="complete_report", fail_on_result=False):
+    """Run one job with handler as the job's implementation; returns (result, job document)."""
+    job_doc = FakeJobDocument(fail_on_result)
+    db = MagicMock()
+    db.collection.return_value.document.return_value = job_doc
+    with patch.object(jobs, '_get_db', return_value=db), \
+         patch.dict(jobs.JOB_HANDLERS, {kind: handler}):
+        result = jobs.run_job({"job_id": "job1", "kind": kind, "user_id": "user123", "params": {}})
+    db.collection.assert_called_with(jobs.JOBS_COLLECTION)
+    db.collection.return_value.document.assert_called_with("job1")
+    return result, job_doc
+
+
+def test_run_job_state_transitions():
+    """queued -> running -> done / failed, whatever the handler does."""
+
+    print("=" * 60)
+    print("Testing run_job state transitions")
+    print("=" * 60)
+
+    # Success: the stored result leaves out the large fields
+    report = {"success": True, "user_id": "user123", "reports": {"business": {"topic_summary": "..."}}, "generation_stats": {"topics_processed": 1}}
+    result, job_doc = run(lambda user_id: dict(report))
+    print(f"\n1. Success: {job_doc.statuses} stored={job_doc.updates[-1]['result']}")
+    assert result == report
+    assert job_doc.statuses == ["running", "done"]
+    assert job_doc.updates[-1]["result"] == {"success": True, "user_id": "user123", "generation_stats": {"topics_processed": 1}}
+    assert "started_at" in job_doc.updates[0] and "finished_at" in job_doc.updates[-1]
+
+    # Handler reports a failure
+    result, job_doc = run(lambda user_id: {"success": False, "error": "No articles"})
+    print(f"2. Failed result: {job_doc.statuses}")
+    assert job_doc.statuses == ["running", "failed"]
+    assert job_doc.updates[-1]["result"] == {"success": False, "error": "No articles"}
+
+    # Handler raises
+    def explode(user_id):
+        raise RuntimeError("OpenAI unavailable")
+    result, job_doc = run(explode)
+    print(f"3. Exception: {job_doc.statuses} error={job_doc.updates[-1]['error']!r}")
+    assert result == {"success": False, "error": "OpenAI unavailable"}
+    assert job_doc.statuses == ["running", "failed"]
+    assert job_doc.updates[-1]["error"] == "OpenAI unavailable"
+
+    # The final write fails: the job must not stay "running"
+    result, job_doc = run(lambda user_id: {"success": True}, kind="refresh_articles", fail_on_result=True)
+    print(f"4. Result write fails: {job_doc.statuses} error={job_doc.updates[-1]['error']!r}")
+    assert result["success"] is False
+    assert job_doc.statuses == ["running", "failed"]
+    assert job_doc.updates[-1]["error"].startswith("Could not store the job result")
+
+    # Media twin jobs need Cloud Tasks: nothing is queued without it
+    db = MagicMock()
+    with patch.object(jobs, '_get_db', return_value=db), \
+         patch.object(jobs, 'background_job_tasks_enabled', return_value=False):
+        try:
+            jobs.enqueue_job("complete_user_media_twin_script", "user123")
+            raised = None
+        except RuntimeError as e:
+            raised = str(e)
+    print(f"5. Media twin without Cloud Tasks: {raised!r}")
+    assert raised is not None
+    db.collection.assert_not_called()
+
+    print("\n" + "=" * 60)
+    print("run_job state transition checks passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    test_run_job_state_transitions()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Checks of the update pipeline's failure path (modules/scheduling/tasks.py):
+update_stages stops at the first failed stage, without sending the push
+notification, and update() turns that into a failed result.
+"""
+
+from unittest.mock import patch
+
+from modules.scheduling import tasks
+
+REFRESH_OK = {"success": True, "total_articles_saved": 12, "timestamp": "2025-06-01T09:00:00"}
+REPORT_OK = {"success": True, "reports": {"business": {}}, "timestamp": "2025-06-01T09:01:00"}
+PODCAST_OK = {"success": True, "audio_url": "https://example.com/podcast.wav", "script_storage_url": "https://example.com/script.txt"}
+PUSH_OK = {"success": True, "message_id": "projects/prysmios/messages/1"}
+
+
+def run_pipeline(refresh=REFRESH_OK, report=REPORT_OK, podcast=PODCAST_OK, push=PUSH_OK):
+    """Run update_stages and update() with mocked stages; returns (stages, result, push mock)."""
+    with patch.object(tasks, 'refresh_articles', return_value=refresh), \
+         patch.object(tasks, 'get_complete_report', return_value=report), \
+         patch('modules.content.podcast.generate_simple_podcast', return_value=podcast), \
+         patch.object(tasks, 'send_push_notification', return_value=push) as push_mock:
+        stages = []
+        error = None
+        try:
+            for key, _ in tasks.update_stages('user123'):
+                stages.append(key)
+        except Exception as e:
+            error = str(e)
+        result = tasks.update('user123')
+    return stages, error, result, push_mock
+
+
+def test_update_stages_failure_path():
+    """Each failing stage stops the pipeline before the notification."""
+
+    print("=" * 60)
+    print("Testing update_stages failure path")
+    print("=" * 60)
+
+    # Everything succeeds: four stages, one notification
+    stages, error, result, push_mock = run_pipeline()
+    print(f"\n1. All stages succeed: {stages}")
+    assert error is None
+    assert stages == ["refresh_result", "report_result", "podcast_result", "notification_result"]
+    assert result["success"] is True and result["pipeline_completed"] is True
+    assert result["refresh_result"]["total_articles"] == 12
+    assert result["report_result"]["reports_count"] == 1
+    assert push_mock.call_count == 2  # once for update_stages, once for update()
+
+    # A failed stage raises after the stages before it were yielded
+    failures = (
+        ("refresh", {"refresh": {"success": False, "error": "no topics"}}, [], "Failed to refresh articles: no topics"),
+        ("report", {"report": {"success": False, "error": "LLM down"}}, ["refresh_result"], "Failed to generate complete report: LLM down"),
+        ("podcast", {"podcast": {"success": False, "error": "TTS down"}}, ["refresh_result", "report_result"], "Failed to generate podcast: TTS down"),
+    )
+    for label, overrides, expected_stages, expected_error in failures:
+        stages, error, result, push_mock = run_pipeline(**overrides)
+        print(f"2. {label} fails: stages={stages} error={error!r}")
+        assert stages == expected_stages
+        assert error == expected_error
+        push_mock.assert_not_called()
+
+        print(f"   update(): success={result['success']} error={result['error']!r}")
+        assert result["success"] is False
+        assert result["pipeline_completed"] is False
+        assert result["user_id"] == "user123"
+        assert result["error"] == expected_error
+        assert "timestamp" in result
+
+    # A failed notification does not fail the pipeline
+    stages, error, result, _ = run_pipeline(push={"success": False, "error": "no FCM token"})
+    print(f"3. Push fails: success={result['success']} notification={result['notification_result']}")
+    assert error is None
+    assert result["success"] is True
+    assert result["notification_result"] == {"success": False, "message_id": None, "error": "no FCM token"}
+
+    print("\n" + "=" * 60)
+    print("update_stages failure path checks passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    test_update_stages_failure_path()